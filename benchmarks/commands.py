@@ -0,0 +1,229 @@
+#! /usr/bin/env python3
+
+# This library is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this library; if not, see <http://www.gnu.org/licenses/>.
+
+
+"""
+Runs ksd commands end to end against a synthetic hub from the
+``fakehub`` module, and reports the wall time, hub calls, and peak
+memory used by each.
+
+The hub is run in a separate process, so that its own work is not
+counted against the commands.
+
+:author: Christopher O'Brien <obriencj@gmail.com>
+:license: GPL v3
+"""
+
+
+import json
+import sys
+import tracemalloc
+
+from argparse import ArgumentParser
+from contextlib import redirect_stderr, redirect_stdout
+from os import devnull
+from os.path import abspath, dirname, join
+from subprocess import PIPE, Popen
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from types import SimpleNamespace
+
+from koji import ClientSession
+
+from fakehub import FakeHub, add_scale_arguments
+from kojismokydingo.cli.builds import FilterBuilds, ListComponents
+from kojismokydingo.cli.tags import AffectedTargets, CheckRepo, FilterTags
+from kojismokydingo.metrics import enable_metrics
+
+
+def scenarios(options, workdir):
+    """
+    The commands to run, as tuples of (label, command class,
+    arguments), scaled to match the synthetic hub
+    """
+
+    hub = FakeHub(builds=options.builds, tags=options.tags,
+                  depth=options.depth)
+
+    def write_nvrs(filename, count):
+        filename = join(workdir, filename)
+        with open(filename, "wt") as fout:
+            for build_id in range(1, min(count, hub.build_count) + 1):
+                print(hub._build(build_id)["nvr"], file=fout)
+        return filename
+
+    nvrs = write_nvrs("nvrs.txt", options.sample)
+    components = write_nvrs("components.txt", options.sample // 10)
+
+    # the deepest tag of the first inheritance chain, which is also
+    # the build tag of a target
+    leaf = hub._tag_name(min(hub.depth, hub.tag_count))
+
+    # the first tag of every inheritance chain
+    roots = [hub._tag_name(t) for t in range(1, hub.tag_count + 1)
+             if not hub._parent(t)]
+
+    return (
+        ("filter-builds", FilterBuilds,
+         ["-f", nvrs]),
+        ("filter-builds --tag", FilterBuilds,
+         ["-f", devnull, "--tag", leaf, "--inherit", "--latest"]),
+        ("list-component-builds", ListComponents,
+         ["-f", components]),
+        ("filter-tags", FilterTags,
+         ["-f", devnull, "--search", "tag-*"]),
+        ("check-repo", CheckRepo,
+         [leaf, "--verbose"]),
+        ("affected-targets", AffectedTargets,
+         ["-q"] + roots),
+    )
+
+
+def run_once(url, label, cls, args, trace=False):
+    session = ClientSession(url)
+    metrics = enable_metrics(session)
+    goptions = SimpleNamespace(profile=None, force_auth=False)
+
+    dingo = cls(label.split()[0])
+
+    with open(devnull, "wt") as out, \
+         redirect_stdout(out), redirect_stderr(out):
+
+        if trace:
+            tracemalloc.start()
+
+        start = perf_counter()
+        try:
+            rc = dingo(goptions, session, list(args))
+        finally:
+            elapsed = perf_counter() - start
+            if trace:
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+            else:
+                peak = None
+
+    # check-repo and affected-targets use 1 as a legitimate result
+    if rc not in (0, 1):
+        raise Exception(f"{label} exited with {rc}")
+
+    if session.rsession:
+        session.rsession.close()
+
+    return {
+        "elapsed": elapsed,
+        "requests": metrics.total_calls(),
+        "calls": sum(m.calls + m.multicalled
+                     for m in metrics.methods.values()
+                     if m.name != "multiCall"),
+        "bytes": sum(m.nbytes for m in metrics.methods.values()),
+        "peak": peak,
+    }
+
+
+def start_hub(options):
+    here = dirname(abspath(__file__))
+    cmd = [sys.executable, join(here, "fakehub.py"),
+           "--builds", str(options.builds),
+           "--tags", str(options.tags),
+           "--depth", str(options.depth),
+           "--components", str(options.components)]
+
+    proc = Popen(cmd, stdout=PIPE, text=True)
+    url = proc.stdout.readline().strip()
+    if not url:
+        proc.kill()
+        raise Exception("fake hub failed to start")
+
+    return proc, url
+
+
+def main(args=None):
+    parser = ArgumentParser(description="Benchmark ksd commands against"
+                            " a synthetic hub")
+    add_scale_arguments(parser)
+
+    addarg = parser.add_argument
+    addarg("--sample", type=int, default=5000,
+           help="count of NVRs given to filter-builds, and ten times the"
+           " count given to list-component-builds. Default 5000")
+    addarg("--repeat", type=int, default=3,
+           help="report the best wall time of this many runs. Default 3")
+    addarg("--only", action="append", default=[], metavar="COMMAND",
+           help="run only the named command. May be repeated")
+    addarg("--json", default=None, metavar="FILE",
+           help="also write the results to FILE as JSON")
+
+    options = parser.parse_args(args)
+
+    proc, url = start_hub(options)
+    results = {}
+
+    try:
+        with TemporaryDirectory() as workdir:
+            for label, cls, cmdargs in scenarios(options, workdir):
+                if options.only and label.split()[0] not in options.only:
+                    continue
+
+                runs = [run_once(url, label, cls, cmdargs)
+                        for _ in range(max(1, options.repeat))]
+                found = min(runs, key=lambda r: r["elapsed"])
+
+                # memory tracing slows everything, so it gets a run of
+                # its own
+                traced = run_once(url, label, cls, cmdargs, trace=True)
+                found["peak"] = traced["peak"]
+
+                results[label] = found
+                report(label, found)
+    finally:
+        proc.terminate()
+        proc.wait()
+
+    if options.json:
+        data = {"scale": {"builds": options.builds, "tags": options.tags,
+                          "depth": options.depth,
+                          "components": options.components,
+                          "sample": options.sample},
+                "results": results}
+        with open(options.json, "wt") as fout:
+            json.dump(data, fout, indent=2)
+
+    return 0
+
+
+_header = False
+
+
+def report(label, found):
+    global _header
+
+    fmt = "{:<24} {:>9} {:>9} {:>9} {:>11} {:>10}"
+    if not _header:
+        print(fmt.format("Command", "Wall s", "Requests", "Calls",
+                         "Bytes", "Peak MiB"))
+        _header = True
+
+    print(fmt.format(label, f"{found['elapsed']:.3f}", found["requests"],
+                     found["calls"], found["bytes"],
+                     f"{found['peak'] / 1048576:.1f}"), flush=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
+
+
+#
+# The end.
@@ -0,0 +1,794 @@
+#! /usr/bin/env python3
+
+# This library is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this library; if not, see <http://www.gnu.org/licenses/>.
+
+
+"""
+A stand-in for a koji hub, serving synthetic data over XML-RPC
+
+The data is generated on demand from simple formulas rather than
+being stored, so that very large scales cost the hub nothing until
+they are asked for. The same scale will always produce the same data.
+
+* builds are numbered from 1, and each belongs to one of a number of
+  packages. The build ID is the first part of its release
+* each build has its own buildroot of the same ID, which has a
+  number of component RPMs installed from earlier builds
+* tags are numbered from 1, and form inheritance chains of a given
+  depth. Each tag inherits from the tag numbered one less than it,
+  unless it is the first in its chain. The last tag in each chain is
+  the build and destination tag of a target
+* each build is tagged into a single tag, and every tagging happens
+  at an event following the previous one. Repos were generated
+  before the last several taggings in their tag
+
+:author: Christopher O'Brien <obriencj@gmail.com>
+:license: GPL v3
+"""
+
+
+import koji
+import sys
+
+from argparse import ArgumentParser
+from fnmatch import fnmatchcase
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from koji.xmlrpcplus import Fault, dumps, loads
+from re import compile as compile_re
+from threading import Thread
+
+
+__all__ = (
+    "FakeHub",
+    "FakeHubServer",
+)
+
+
+KOJI_VERSION = "1.35.0"
+
+EVENT_BASE = 1000000
+TASK_BASE = 5000000
+TS_BASE = 1700000000.0
+
+ARCHES = ("x86_64", "noarch")
+
+
+class FakeHub():
+    """
+    Implements the hub API calls used by the ksd commands, answering
+    from synthetic data of the given scale
+    """
+
+    def __init__(
+            self,
+            builds=10000,
+            tags=500,
+            depth=10,
+            packages=None,
+            rpms=3,
+            components=20,
+            recent=5):
+
+        self.build_count = max(1, builds)
+        self.tag_count = max(1, tags)
+        self.depth = max(1, depth)
+        self.package_count = packages or max(1, self.build_count // 20)
+        self.rpm_count = rpms
+        self.component_count = components
+        self.recent = recent
+
+        self.exported = {
+            name: getattr(self, name) for name in dir(self)
+            if (name[0].islower() and
+                name not in ("dispatch", "exported") and
+                callable(getattr(self, name)))
+        }
+
+
+    # -- synthetic data --
+
+
+    def _build_id(self, info):
+        if isinstance(info, dict):
+            info = info.get("id") or info.get("nvr")
+
+        if isinstance(info, str):
+            try:
+                release = info.rsplit("-", 1)[1]
+                info = int(release.split(".", 1)[0])
+            except (IndexError, ValueError):
+                return None
+
+        if isinstance(info, int) and 0 < info <= self.build_count:
+            return info
+        return None
+
+
+    def _tag_id(self, info):
+        if isinstance(info, dict):
+            info = info.get("id") or info.get("name")
+
+        if isinstance(info, str):
+            if not info.startswith("tag-"):
+                return None
+            try:
+                info = int(info[4:])
+            except ValueError:
+                return None
+
+        if isinstance(info, int) and 0 < info <= self.tag_count:
+            return info
+        return None
+
+
+    def _tag_name(self, tag_id):
+        return f"tag-{tag_id:05d}"
+
+
+    def _build_tag(self, build_id):
+        return (build_id % self.tag_count) + 1
+
+
+    def _build(self, build_id):
+        # a multiplicative hash, to spread each package's builds
+        # across many tags
+        spread = (build_id * 2654435761) % (2 ** 32)
+        package_id = spread % self.package_count + 1
+        name = f"pkg-{package_id:05d}"
+        version = f"1.{build_id // self.package_count}"
+        release = f"{build_id}.fc40"
+
+        return {
+            "id": build_id,
+            "build_id": build_id,
+            "package_id": package_id,
+            "package_name": name,
+            "name": name,
+            "version": version,
+            "release": release,
+            "epoch": None,
+            "nvr": f"{name}-{version}-{release}",
+            "state": 1,
+            "draft": False,
+            "task_id": TASK_BASE + build_id,
+            "owner_id": 1,
+            "owner_name": "builder",
+            "volume_id": 0,
+            "volume_name": "DEFAULT",
+            "creation_event_id": EVENT_BASE + build_id,
+            "creation_time": "2023-11-14 22:13:20",
+            "creation_ts": TS_BASE + build_id,
+            "start_time": "2023-11-14 22:13:20",
+            "start_ts": TS_BASE + build_id,
+            "completion_time": "2023-11-14 22:23:20",
+            "completion_ts": TS_BASE + build_id + 600,
+            "source": f"git+https://git.example.com/{name}#{build_id:x}",
+            "extra": {"source": {"original_url": f"{name}.git"}},
+            "cg_id": None,
+            "cg_name": None,
+        }
+
+
+    def _tagged(self, build_id, tag_id):
+        info = self._build(build_id)
+        info["tag_id"] = tag_id
+        info["tag_name"] = self._tag_name(tag_id)
+        info["create_event"] = EVENT_BASE + build_id
+        return info
+
+
+    def _tag(self, tag_id):
+        return {
+            "id": tag_id,
+            "name": self._tag_name(tag_id),
+            "arches": " ".join(ARCHES),
+            "extra": {"mock.package_manager": "dnf"},
+            "locked": False,
+            "maven_include_all": False,
+            "maven_support": False,
+            "perm": None,
+            "perm_id": None,
+        }
+
+
+    def _parent(self, tag_id):
+        if (tag_id - 1) % self.depth:
+            return tag_id - 1
+        return None
+
+
+    def _ancestors(self, tag_id):
+        parent = self._parent(tag_id)
+        while parent:
+            yield parent
+            parent = self._parent(parent)
+
+
+    def _descendants(self, tag_id):
+        child = tag_id + 1
+        while child <= self.tag_count and self._parent(child) == child - 1:
+            yield child
+            child += 1
+
+
+    def _is_leaf(self, tag_id):
+        return tag_id == self.tag_count or not (tag_id % self.depth)
+
+
+    def _target(self, tag_id):
+        name = self._tag_name(tag_id)
+        return {
+            "id": tag_id,
+            "name": f"target-{tag_id:05d}",
+            "build_tag": tag_id,
+            "build_tag_name": name,
+            "dest_tag": tag_id,
+            "dest_tag_name": name,
+        }
+
+
+    def _tag_builds(self, tag_id):
+        # build IDs directly tagged into tag_id, newest first as koji
+        # does
+        first = tag_id - 1 or self.tag_count
+        last = self.build_count - ((self.build_count - first)
+                                   % self.tag_count)
+        return range(last, 0, -self.tag_count)
+
+
+    def _repo_event(self, tag_id):
+        # the repo predates the most recent taggings into the tag
+        builds = self._tag_builds(tag_id)
+        if len(builds) > self.recent:
+            return EVENT_BASE + builds[self.recent]
+        return EVENT_BASE
+
+
+    def _rpm(self, rpm_id):
+        build_id = rpm_id // 10
+        build = self._build(build_id)
+        index = rpm_id % 10
+        return {
+            "id": rpm_id,
+            "build_id": build_id,
+            "buildroot_id": build_id,
+            "name": build["name"] if not index else
+            f"{build['name']}-sub{index}",
+            "version": build["version"],
+            "release": build["release"],
+            "epoch": None,
+            "arch": ARCHES[index % len(ARCHES)],
+            "external_repo_id": 0,
+            "external_repo_name": "INTERNAL",
+            "payloadhash": f"{rpm_id:032x}",
+            "size": 4096 + rpm_id % 8192,
+            "buildtime": int(TS_BASE) + build_id,
+            "metadata_only": False,
+            "extra": None,
+        }
+
+
+    def _buildroot(self, broot_id):
+        tag_id = self._build_tag(broot_id)
+        return {
+            "id": broot_id,
+            "br_type": 0,
+            "arch": "x86_64",
+            "cg_id": None,
+            "cg_name": None,
+            "cg_version": None,
+            "container_arch": "x86_64",
+            "container_type": "chroot",
+            "host_arch": "x86_64",
+            "host_id": 1,
+            "host_name": "builder-01",
+            "host_os": "fedora",
+            "repo_id": 10 * tag_id,
+            "repo_state": 2,
+            "retire_event_id": EVENT_BASE + broot_id,
+            "retire_ts": TS_BASE + broot_id + 600,
+            "state": 3,
+            "tag_id": tag_id,
+            "tag_name": self._tag_name(tag_id),
+            "task_id": TASK_BASE + broot_id,
+        }
+
+
+    # -- hub API --
+
+
+    def getAPIVersion(self):
+        return koji.API_VERSION
+
+
+    def getKojiVersion(self):
+        return KOJI_VERSION
+
+
+    def getLastEvent(self, before=None):
+        return {"id": EVENT_BASE + self.build_count,
+                "ts": TS_BASE + self.build_count}
+
+
+    def getLoggedInUser(self):
+        return None
+
+
+    def getUser(self, userInfo=None, strict=False, **_kw):
+        if userInfo in (None, 1, "builder"):
+            return {"id": 1, "name": "builder", "status": 0,
+                    "usertype": 0, "krb_principals": []}
+        if strict:
+            raise koji.GenericError(f"No such user: {userInfo!r}")
+        return None
+
+
+    def getBuild(self, buildInfo, strict=False):
+        build_id = self._build_id(buildInfo)
+        if build_id is None:
+            if strict:
+                raise koji.GenericError(f"No such build: {buildInfo!r}")
+            return None
+        return self._build(build_id)
+
+
+    def listBuilds(self, packageID=None, **_kw):
+        if packageID is None:
+            raise koji.GenericError("listBuilds requires packageID here")
+        return [self._build(b) for b in
+                range(packageID - 1 or self.package_count,
+                      self.build_count + 1, self.package_count)]
+
+
+    def getTag(self, tagInfo, strict=False, event=None, blocked=False):
+        tag_id = self._tag_id(tagInfo)
+        if tag_id is None:
+            if strict:
+                raise koji.GenericError(f"No such tagInfo: {tagInfo!r}")
+            return None
+        return self._tag(tag_id)
+
+
+    def listTags(self, build=None, package=None, perms=True, **_kw):
+        if build is not None:
+            build_id = self._build_id(build)
+            if build_id is None:
+                raise koji.GenericError(f"No such build: {build!r}")
+            return [self._tag(self._build_tag(build_id))]
+
+        return [self._tag(t) for t in range(1, self.tag_count + 1)]
+
+
+    def getInheritanceData(self, tag, event=None):
+        tag_id = self._tag_id(tag)
+        parent = self._parent(tag_id) if tag_id else None
+        if not parent:
+            return []
+        return [{"child_id": tag_id, "parent_id": parent,
+                 "name": self._tag_name(parent), "priority": 0,
+                 "maxdepth": None, "intransitive": False,
+                 "noconfig": False, "pkg_filter": ""}]
+
+
+    def getFullInheritance(self, tag, event=None, reverse=False, **_kw):
+        tag_id = self._tag_id(tag)
+        if tag_id is None:
+            raise koji.GenericError(f"No such tagInfo: {tag!r}")
+
+        results = []
+        if reverse:
+            for depth, child in enumerate(self._descendants(tag_id), 1):
+                results.append({
+                    "tag_id": child, "child_id": child,
+                    "parent_id": child - 1, "name": self._tag_name(child),
+                    "depth": depth, "priority": 0, "maxdepth": None,
+                    "intransitive": False, "noconfig": False,
+                    "pkg_filter": "", "filter": [], "nextdepth": None,
+                })
+        else:
+            child = tag_id
+            for depth, parent in enumerate(self._ancestors(tag_id), 1):
+                results.append({
+                    "tag_id": parent, "child_id": child,
+                    "parent_id": parent, "name": self._tag_name(parent),
+                    "depth": depth, "priority": 0, "maxdepth": None,
+                    "intransitive": False, "noconfig": False,
+                    "pkg_filter": "", "filter": [], "nextdepth": None,
+                })
+                child = parent
+
+        return results
+
+
+    def listTagged(self, tag, event=None, inherit=False, prefix=None,
+                   latest=False, package=None, owner=None, type=None,
+                   **_kw):
+
+        tag_id = self._tag_id(tag)
+        if tag_id is None:
+            raise koji.GenericError(f"No such tagInfo: {tag!r}")
+
+        if type not in (None, "rpm"):
+            return []
+
+        tags = [tag_id]
+        if inherit:
+            tags.extend(self._ancestors(tag_id))
+
+        results = []
+        seen = set()
+        for tid in tags:
+            for build_id in self._tag_builds(tid):
+                info = self._tagged(build_id, tid)
+                if package and info["name"] != package:
+                    continue
+                if prefix and not info["name"].startswith(prefix):
+                    continue
+                if latest:
+                    if info["name"] in seen:
+                        continue
+                    seen.add(info["name"])
+                results.append(info)
+
+        return results
+
+
+    def getLatestBuilds(self, tag, event=None, package=None, type=None):
+        return self.listTagged(tag, event=event, inherit=True,
+                               latest=True, package=package, type=type)
+
+
+    def getBuildTarget(self, info, event=None, strict=False):
+        tag_id = None
+        if isinstance(info, str) and info.startswith("target-"):
+            tag_id = self._tag_id(f"tag-{info[7:]}")
+        elif isinstance(info, int):
+            tag_id = self._tag_id(info)
+
+        if tag_id is None or not self._is_leaf(tag_id):
+            if strict:
+                raise koji.GenericError(f"No such build target: {info!r}")
+            return None
+        return self._target(tag_id)
+
+
+    def getBuildTargets(self, info=None, event=None, buildTagID=None,
+                        destTagID=None, **_kw):
+
+        tag_id = buildTagID or destTagID
+        if tag_id is not None:
+            tag_id = self._tag_id(tag_id)
+            if tag_id and self._is_leaf(tag_id):
+                return [self._target(tag_id)]
+            return []
+
+        if info is not None:
+            found = self.getBuildTarget(info)
+            return [found] if found else []
+
+        return [self._target(t) for t in range(1, self.tag_count + 1)
+                if self._is_leaf(t)]
+
+
+    def getRepo(self, tag, state=None, event=None, dist=False):
+        tag_id = self._tag_id(tag)
+        if tag_id is None:
+            raise koji.GenericError(f"No such tagInfo: {tag!r}")
+
+        create_event = self._repo_event(tag_id)
+        return {
+            "id": 10 * tag_id,
+            "state": 1,
+            "create_event": create_event,
+            "create_ts": TS_BASE + create_event - EVENT_BASE,
+            "creation_time": "2023-11-14 22:13:20",
+            "dist": False,
+            "task_id": None,
+        }
+
+
+    def repoInfo(self, repo_id, strict=False):
+        found = self.getRepo(repo_id // 10)
+        found["tag_id"] = repo_id // 10
+        found["tag_name"] = self._tag_name(repo_id // 10)
+        return found
+
+
+    def tagChangedSinceEvent(self, event, taglist):
+        for tag_id in taglist:
+            builds = self._tag_builds(tag_id)
+            if builds and EVENT_BASE + builds[0] > event:
+                return True
+        return False
+
+
+    def queryHistory(self, tables=None, afterEvent=None, tag=None,
+                     **_kw):
+
+        tables = tables or ("tag_listing", )
+        results = {table: [] for table in tables}
+
+        tag_id = self._tag_id(tag) if tag is not None else None
+        if tag_id is None or "tag_listing" not in results:
+            return results
+
+        after = afterEvent or 0
+        listing = results["tag_listing"]
+        for build_id in self._tag_builds(tag_id):
+            event = EVENT_BASE + build_id
+            if event <= after:
+                break
+
+            info = self._build(build_id)
+            listing.append({
+                "build_id": build_id,
+                "tag_id": tag_id,
+                "tag.name": self._tag_name(tag_id),
+                "name": info["name"],
+                "version": info["version"],
+                "release": info["release"],
+                "active": True,
+                "create_event": event,
+                "create_ts": TS_BASE + build_id,
+                "creator_id": 1,
+                "creator_name": "builder",
+                "revoke_event": None,
+                "revoke_ts": None,
+                "revoker_id": None,
+                "revoker_name": None,
+            })
+
+        listing.reverse()
+        return results
+
+
+    def getBuildroot(self, buildrootID, strict=False):
+        if 0 < buildrootID <= self.build_count:
+            return self._buildroot(buildrootID)
+        if strict:
+            raise koji.GenericError(f"No such buildroot: {buildrootID!r}")
+        return None
+
+
+    def listRPMs(self, buildID=None, buildrootID=None,
+                 componentBuildrootID=None, arches=None, **_kw):
+
+        if buildID is not None:
+            build_id = self._build_id(buildID)
+            if build_id is None:
+                return []
+            rpm_ids = range(build_id * 10, build_id * 10 + self.rpm_count)
+
+        elif buildrootID is not None:
+            return self.listRPMs(buildID=buildrootID, arches=arches)
+
+        elif componentBuildrootID is not None:
+            # components come from a spread of earlier builds
+            broot_id = componentBuildrootID
+            rpm_ids = []
+            for index in range(1, self.component_count + 1):
+                build_id = (broot_id * 7919 + index * 104729) % broot_id
+                if build_id:
+                    rpm_ids.append(build_id * 10)
+
+        else:
+            raise koji.GenericError("listRPMs needs a constraint here")
+
+        found = [self._rpm(r) for r in rpm_ids]
+        if arches:
+            if isinstance(arches, str):
+                arches = [arches]
+            found = [r for r in found if r["arch"] in arches]
+        return found
+
+
+    def listArchives(self, buildID=None, buildrootID=None,
+                     componentBuildrootID=None, type=None, **_kw):
+        # the synthetic builds are all RPM builds
+        return []
+
+
+    def listBuildRPMs(self, build):
+        return self.listRPMs(buildID=build)
+
+
+    def getTaskInfo(self, task_id, request=False, strict=False):
+        if isinstance(task_id, list):
+            return [self.getTaskInfo(t, request, strict) for t in task_id]
+
+        build_id = task_id - TASK_BASE
+        if not (0 < build_id <= self.build_count):
+            if strict:
+                raise koji.GenericError(f"No such task: {task_id!r}")
+            return None
+
+        info = {
+            "id": task_id,
+            "method": "build",
+            "state": 2,
+            "arch": "noarch",
+            "channel_id": 1,
+            "host_id": 1,
+            "owner": 1,
+            "parent": None,
+            "priority": 20,
+            "create_ts": TS_BASE + build_id,
+            "completion_ts": TS_BASE + build_id + 600,
+        }
+        if request:
+            info["request"] = [f"git+https://git.example.com/{build_id}",
+                               "target-00001", {}]
+        return info
+
+
+    def search(self, terms, type, matchType, queryOpts=None):
+        if type == "tag":
+            names = (self._tag_name(t) for t in range(1, self.tag_count + 1))
+        elif type == "target":
+            names = (f"target-{t:05d}" for t in
+                     range(1, self.tag_count + 1) if self._is_leaf(t))
+        elif type == "package":
+            names = (f"pkg-{p:05d}" for p in
+                     range(1, self.package_count + 1))
+        else:
+            return []
+
+        if matchType == "glob":
+            match = lambda n: fnmatchcase(n, terms)
+        elif matchType == "regex":
+            match = compile_re(terms).search
+        else:
+            match = lambda n: n == terms
+
+        return [{"id": int(n.rsplit("-", 1)[1]), "name": n}
+                for n in names if match(n)]
+
+
+    # -- dispatching --
+
+
+    def dispatch(self, method, params):
+        """
+        Invoke the named hub API with the XML-RPC encoded params
+        """
+
+        if method == "multiCall":
+            results = []
+            for call in params[0]:
+                try:
+                    found = self.dispatch(call["methodName"], call["params"])
+                except Fault as fault:
+                    results.append({"faultCode": fault.faultCode,
+                                    "faultString": fault.faultString})
+                else:
+                    results.append([found])
+            return results
+
+        fn = self.exported.get(method)
+        if fn is None:
+            raise Fault(1000, f"Invalid method: {method}")
+
+        args, kwargs = koji.decode_args(*params)
+        try:
+            return fn(*args, **kwargs)
+        except koji.GenericError as gerr:
+            raise Fault(gerr.faultCode, str(gerr))
+        except TypeError as terr:
+            raise Fault(koji.ParameterError.faultCode, str(terr))
+
+
+class _HubHandler(BaseHTTPRequestHandler):
+
+    protocol_version = "HTTP/1.1"
+
+
+    def do_POST(self):
+        size = int(self.headers.get("Content-Length") or 0)
+        params, method = loads(self.rfile.read(size))
+
+        try:
+            result = self.server.hub.dispatch(method, params)
+            body = dumps((result, ), methodresponse=True, allow_none=True)
+        except Fault as fault:
+            body = dumps(fault, methodresponse=True, allow_none=True)
+
+        body = body.encode()
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/xml")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Koji-Version", KOJI_VERSION)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+    def log_message(self, *_args):
+        pass
+
+
+class FakeHubServer(ThreadingHTTPServer):
+    """
+    An HTTP server answering XML-RPC requests from a `FakeHub`.
+    Binds to an ephemeral port on localhost unless told otherwise.
+    """
+
+    daemon_threads = True
+
+
+    def __init__(self, hub, address=("127.0.0.1", 0)):
+        super().__init__(address, _HubHandler)
+        self.hub = hub
+
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/kojihub"
+
+
+    def start(self):
+        """
+        Begin serving from a background thread
+        """
+
+        thread = Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return thread
+
+
+def add_scale_arguments(parser):
+    addarg = parser.add_argument
+
+    addarg("--builds", type=int, default=10000,
+           help="count of synthetic builds. Default 10000")
+    addarg("--tags", type=int, default=500,
+           help="count of synthetic tags. Default 500")
+    addarg("--depth", type=int, default=10,
+           help="depth of tag inheritance chains. Default 10")
+    addarg("--components", type=int, default=20,
+           help="count of component RPMs per buildroot. Default 20")
+
+    return parser
+
+
+def hub_from_options(options):
+    return FakeHub(builds=options.builds, tags=options.tags,
+                   depth=options.depth, components=options.components)
+
+
+def main(args=None):
+    parser = ArgumentParser(description="Serve a synthetic koji hub")
+    parser.add_argument("--port", type=int, default=0,
+                        help="port to listen on. Default, any free port")
+    add_scale_arguments(parser)
+    options = parser.parse_args(args)
+
+    server = FakeHubServer(hub_from_options(options),
+                           ("127.0.0.1", options.port))
+    print(server.url, flush=True)
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
+
+
+#
+# The end.
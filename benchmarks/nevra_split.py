@@ -0,0 +1,135 @@
+#! /usr/bin/env python3
+
+# This library is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this library; if not, see <http://www.gnu.org/licenses/>.
+
+
+"""
+Compares splitting a large list of RPM NEVRAs one at a time via
+`kojismokydingo.rpm.nevra_split` against doing so in bulk via
+`kojismokydingo.rpm.bulk_nevra_split`, in both time and the memory
+held by the results.
+
+Given no arguments, a synthetic list of a million NEVRAs is generated
+in which, as in the combined contents of many tags, the same RPMs
+recur. Otherwise each argument is taken to be a file containing one
+NEVRA per line.
+
+:author: Christopher O'Brien <obriencj@gmail.com>
+:license: GPL v3
+"""
+
+
+import sys
+
+from argparse import ArgumentParser
+from random import Random
+from time import perf_counter
+from tracemalloc import get_traced_memory, start, stop
+
+from kojismokydingo.rpm import _nevra_record, bulk_nevra_split, nevra_split
+
+
+ARCHES = ("noarch", "x86_64", "aarch64", "ppc64le", "s390x", "src")
+
+
+def synthesize(count, unique):
+    rand = Random(count)
+
+    distinct = []
+    for index in range(0, unique):
+        name = f"pkg{index % (unique // 20 or 1)}"
+        version = f"{rand.randint(0, 9)}.{rand.randint(0, 30)}"
+        release = f"{rand.randint(1, 20)}.el{rand.randint(7, 9)}"
+        arch = rand.choice(ARCHES)
+        distinct.append(f"{name}-{version}-{release}.{arch}")
+
+    return [rand.choice(distinct) for _ in range(0, count)]
+
+
+def measure(fn, data):
+    # returns the elapsed time and the memory still held by the
+    # result. tracing slows everything, so the time is taken from a
+    # separate untraced run
+
+    _nevra_record.cache_clear()
+    start()
+    result = fn(data)
+    held = get_traced_memory()[0]
+    stop()
+    del result
+
+    _nevra_record.cache_clear()
+    begin = perf_counter()
+    result = fn(data)
+    elapsed = perf_counter() - begin
+
+    return elapsed, held, result
+
+
+def best_of(repeat, fn, data):
+    best = None
+    for _ in range(0, repeat):
+        elapsed, held, result = measure(fn, data)
+        if best is None or elapsed < best:
+            best = elapsed
+    return best, held, result
+
+
+def main(args=None):
+    parser = ArgumentParser()
+    parser.add_argument("lists", nargs="*", metavar="FILE",
+                        help="files of NEVRAs, one per line")
+    parser.add_argument("--count", type=int, default=1000000,
+                        help="synthetic NEVRAs to generate")
+    parser.add_argument("--unique", type=int, default=50000,
+                        help="distinct NEVRAs among those generated")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="take the best of this many runs")
+    options = parser.parse_args(args)
+
+    if options.lists:
+        samples = []
+        for filename in options.lists:
+            with open(filename, "rt") as fin:
+                samples.append((filename, fin.read().split()))
+    else:
+        samples = [("synthetic",
+                    synthesize(options.count, options.unique))]
+
+    print(f"{'List':<24} {'count':>9} {'split s':>9} {'MiB':>8}"
+          f" {'bulk s':>9} {'MiB':>8} {'speedup':>8}")
+
+    for name, nevras in samples:
+        plain, plain_mem, expected = best_of(
+            options.repeat, lambda d: list(map(nevra_split, d)), nevras)
+        bulk, bulk_mem, found = best_of(
+            options.repeat, bulk_nevra_split, nevras)
+
+        if found != expected:
+            print(f"{name}: results differ!", file=sys.stderr)
+            return 1
+
+        print(f"{name:<24} {len(nevras):>9} {plain:>9.3f}"
+              f" {plain_mem / 1048576:>8.1f} {bulk:>9.3f}"
+              f" {bulk_mem / 1048576:>8.1f} {plain / bulk:>7.2f}x")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
+
+
+#
+# The end.
@@ -0,0 +1,235 @@
+#! /usr/bin/env python3
+
+# This library is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this library; if not, see <http://www.gnu.org/licenses/>.
+
+
+"""
+Compares the parse throughput of `kojismokydingo.sift.parse.parse_exprs`
+against the character-at-a-time parser it replaced, which is retained
+here for reference.
+
+Given no arguments, a synthetic sieve source is generated in the
+style of a machine-written policy, with many ``(nvr ...)`` literals.
+Otherwise each argument is taken to be the filename of a sieve source.
+
+:author: Christopher O'Brien <obriencj@gmail.com>
+:license: GPL v3
+"""
+
+
+import sys
+
+from argparse import ArgumentParser
+from functools import partial
+from io import StringIO
+from time import perf_counter
+
+from kojismokydingo.sift.parse import (
+    Glob, ParserError, Reader, Regex,
+    convert_escapes, convert_token, parse_exprs, parse_itempath, )
+
+
+def legacy_parse_exprs(reader, start=None, stop=None):
+    # parse_exprs as of 2.2
+
+    if not (start and stop):
+        unterminated = True
+        start = '('
+        stop = ')'
+    else:
+        unterminated = False
+
+    token_breaks = f"{start}{stop} [;#|/\"\'\n\r\t"  # nosec
+
+    token = None
+    esc = None
+
+    srciter = iter(partial(reader.read, 1), '')
+    for c in srciter:
+        if esc:
+            if not token:
+                token = StringIO()
+            if c not in token_breaks:
+                token.write(esc)
+            token.write(c)
+            esc = None
+            continue
+
+        if c == '\\':
+            esc = c
+            continue
+
+        elif c == '.' and token is None:
+            yield parse_itempath(reader, None, c)
+            continue
+
+        elif c == '[':
+            prefix = None
+            if token:
+                prefix = token.getvalue()
+                token = None
+            yield parse_itempath(reader, prefix, c)
+            continue
+
+        elif c in token_breaks:
+            if token:
+                yield convert_token(token.getvalue())
+                token = None
+
+        else:
+            if not token:
+                token = StringIO()
+            token.write(c)
+            continue
+
+        if c in ';#':
+            reader.readline()
+
+        elif c == start:
+            yield list(legacy_parse_exprs(reader, start, stop))
+
+        elif c == stop:
+            if unterminated:
+                raise ParserError(f"Unexpected closing {c!r}")
+            else:
+                return
+
+        elif c in '\'\"/|':
+            yield legacy_parse_quoted(reader, c)
+
+    if unterminated:
+        if token:
+            yield convert_token(token.getvalue())
+    else:
+        raise ParserError(f"Unexpected EOF, missing closing {stop!r}")
+
+
+def legacy_parse_quoted(reader, quotec):
+    # parse_quoted as of 2.2, with advanced escapes
+
+    token = StringIO()
+    esc = None
+
+    srciter = iter(partial(reader.read, 1), '')
+    for c in srciter:
+        if esc:
+            if c != quotec:
+                token.write(esc)
+            token.write(c)
+            esc = None
+        elif c == quotec:
+            break
+        elif c == '\\':
+            esc = c
+        else:
+            token.write(c)
+
+    else:
+        msg = f"Unterminated matcher: missing closing {quotec!r}"
+        raise ParserError(msg)
+
+    val = convert_escapes(token.getvalue())
+
+    if quotec == "/":
+        flags = []
+        while reader.peek(1) and reader.peek(1) in "aiLmsux":
+            flags.append(reader.read(1))
+        return Regex(val, "".join(flags))
+
+    elif quotec == "|":
+        iflag = False
+        if reader.peek(1) == 'i':
+            reader.read(1)
+            iflag = True
+        return Glob(val, ignorecase=iflag)
+
+    else:
+        return val
+
+
+def synthesize(count):
+    # a policy in the style of one written by a tool, blocking a long
+    # list of specific builds and allowing a few families by pattern
+
+    lines = ["# generated policy, do not edit",
+             "(flag blocked (nvr"]
+
+    for index in range(0, count):
+        lines.append(f"  package-{index % 500}-1.{index % 17}-{index}.el9"
+                     f"  ; ticket {index}")
+
+    lines.append("))")
+    lines.append("(flag allowed (not (flagged blocked))")
+    lines.append("  (or (name |python3-*| /^golang-.*$/i)")
+    lines.append("      (and (type rpm) (state COMPLETE)")
+    lines.append("           (owner \"release-bot\" \"builder\"))))")
+
+    return "\n".join(lines)
+
+
+def best_of(repeat, fn, data):
+    best = None
+    for _ in range(0, repeat):
+        start = perf_counter()
+        result = fn(data)
+        elapsed = perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best, result
+
+
+def main(args=None):
+    parser = ArgumentParser()
+    parser.add_argument("sources", nargs="*", metavar="FILE",
+                        help="sieve source files")
+    parser.add_argument("--count", type=int, default=20000,
+                        help="synthetic nvr literals to generate")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="take the best of this many runs")
+    options = parser.parse_args(args)
+
+    if options.sources:
+        samples = []
+        for filename in options.sources:
+            with open(filename, "rt") as fin:
+                samples.append((filename, fin.read()))
+    else:
+        samples = [("synthetic", synthesize(options.count))]
+
+    print(f"{'Source':<24} {'KiB':>8} {'legacy s':>9}"
+          f" {'regex s':>9} {'speedup':>8}")
+
+    for name, src in samples:
+        legacy, expected = best_of(options.repeat,
+                                   lambda s: list(legacy_parse_exprs(
+                                       Reader(s))), src)
+        fast, found = best_of(options.repeat,
+                              lambda s: list(parse_exprs(Reader(s))), src)
+
+        if repr(found) != repr(expected):
+            print(f"{name}: results differ!", file=sys.stderr)
+            return 1
+
+        print(f"{name:<24} {len(src) / 1024:>8.1f} {legacy:>9.3f}"
+              f" {fast:>9.3f} {legacy / fast:>7.2f}x")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
+
+
+#
+# The end.
@@ -0,0 +1,150 @@
+#! /usr/bin/env python3
+
+# This library is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this library; if not, see <http://www.gnu.org/licenses/>.
+
+
+"""
+Compares the stock XML-RPC decoder used by koji against
+`kojismokydingo.unmarshal.FastUnmarshaller`
+
+Given no arguments, a set of synthetic multicall responses shaped
+like those of ``listTagged`` and ``listRPMs`` are generated and
+decoded. Otherwise each argument is taken to be the filename of a
+recorded response body.
+
+:author: Christopher O'Brien <obriencj@gmail.com>
+:license: GPL v3
+"""
+
+
+import sys
+
+from argparse import ArgumentParser
+from koji.xmlrpcplus import dumps, loads
+from time import perf_counter
+
+from kojismokydingo.unmarshal import loads_response
+
+
+def fake_build(index):
+    return {
+        "build_id": index,
+        "id": index,
+        "name": f"package-{index % 500}",
+        "version": f"1.{index % 17}",
+        "release": f"{index}.el9",
+        "nvr": f"package-{index % 500}-1.{index % 17}-{index}.el9",
+        "epoch": None if index % 3 else index % 5,
+        "state": 1,
+        "draft": False,
+        "task_id": index * 3,
+        "owner_id": 7,
+        "owner_name": "builder",
+        "package_id": index % 500,
+        "package_name": f"package-{index % 500}",
+        "creation_event_id": 100000 + index,
+        "creation_ts": 1700000000.0 + index,
+        "completion_ts": 1700000600.5 + index,
+        "volume_id": 0,
+        "volume_name": "DEFAULT",
+        "tag_id": 42,
+        "tag_name": "example-1.0-build",
+        "extra": {"source": {"original_url": f"git+https://x/{index}"}},
+    }
+
+
+def fake_rpm(index):
+    return {
+        "id": index,
+        "build_id": index // 10,
+        "name": f"package-{index % 500}-libs",
+        "version": "1.0",
+        "release": f"{index}.el9",
+        "epoch": None,
+        "arch": ("x86_64", "noarch", "src")[index % 3],
+        "external_repo_id": 0,
+        "external_repo_name": "INTERNAL",
+        "payloadhash": f"{index:032x}",
+        "size": 1024 * index,
+        "buildtime": 1700000000 + index,
+        "metadata_only": False,
+        "extra": None,
+    }
+
+
+def synthesize(count):
+    # one multicall response with a single listTagged result, and
+    # one with many listRPMs results, each wrapped as multicall does
+    builds = [[[fake_build(i) for i in range(0, count)]]]
+    rpms = [[[fake_rpm(i * 10 + j) for j in range(0, 10)]]
+            for i in range(0, count // 10)]
+
+    for name, result in (("listTagged", builds), ("listRPMs", rpms)):
+        body = dumps((result, ), methodresponse=True, allow_none=True)
+        yield name, body.encode()
+
+
+def best_of(repeat, fn, data):
+    best = None
+    for _ in range(0, repeat):
+        start = perf_counter()
+        result = fn(data)
+        elapsed = perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best, result
+
+
+def main(args=None):
+    parser = ArgumentParser()
+    parser.add_argument("responses", nargs="*", metavar="FILE",
+                        help="recorded XML-RPC response bodies")
+    parser.add_argument("--count", type=int, default=20000,
+                        help="synthetic builds to generate")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="take the best of this many runs")
+    options = parser.parse_args(args)
+
+    if options.responses:
+        samples = []
+        for filename in options.responses:
+            with open(filename, "rb") as fin:
+                samples.append((filename, fin.read()))
+    else:
+        samples = synthesize(options.count)
+
+    print(f"{'Response':<24} {'MiB':>8} {'stock s':>9}"
+          f" {'fast s':>9} {'speedup':>8}")
+
+    for name, data in samples:
+        stock, expected = best_of(options.repeat,
+                                  lambda d: loads(d)[0], data)
+        fast, found = best_of(options.repeat, loads_response, data)
+
+        if found != expected:
+            print(f"{name}: results differ!", file=sys.stderr)
+            return 1
+
+        print(f"{name:<24} {len(data) / 1048576:>8.2f} {stock:>9.3f}"
+              f" {fast:>9.3f} {stock / fast:>7.2f}x")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
+
+
+#
+# The end.
@@ -21,17 +21,27 @@ build system
 """
 
 
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from functools import partial
+from itertools import islice
 from koji import (
     ClientSession, Fault, GenericError, ParameterError,
-    convertFault, read_config)
+    convertFault, encode_args, read_config)
 from koji_cli.lib import activate_session, ensure_connection
 from logging import DEBUG, basicConfig
+from time import perf_counter
 from typing import (
-    Any, Callable, Dict, Iterator, Iterable, List,
+    Any, Callable, Dict, Generator, Iterator, Iterable, List,
     Optional, Sequence, TypeVar, Tuple, Union, cast)
 
-from .common import chunkseq
+from .cache import ObjectCache
+from .common import AdaptiveChunker, chunkseq, ichunkseq
+from .metrics import HubMetrics, enable_metrics, get_metrics
+from .pinning import get_pinned_event, pin_event
+from .replay import (
+    HubPlayback, HubRecording, enable_recording, get_recording, )
+from .unmarshal import enable_fast_unmarshal
 from .types import (
     ArchiveInfo, ArchiveInfos, ArchiveSpec,
     BuildInfo, BuildSpec,
@@ -43,11 +53,14 @@ from .types import (
     RPMInfo, RPMInfos, RPMSignature, RPMSpec,
     TagInfo, TagSpec,
     TargetInfo, TargetSpec,
+    BuildrootState, BuildrootType, BuildState,
     TaskInfo, TaskSpec,
     UserInfo, UserSpec, )
 
 
 __all__ = (
+    "DEFAULT_CHUNK_SIZES",
+
     "AnonClientSession",
     "BadDingo",
     "FeatureUnavailable",
@@ -66,7 +79,9 @@ __all__ = (
     "NoSuchTask",
     "NoSuchUser",
     "NotPermitted",
+    "NotRecorded",
     "ProfileClientSession",
+    "ReplayClientSession",
 
     "as_archiveinfo",
     "as_buildinfo",
@@ -90,9 +105,20 @@ __all__ = (
     "bulk_load_tags",
     "bulk_load_tasks",
     "bulk_load_users",
+    "clone_session",
+    "enable_identity_map",
+    "get_bulk_chunker",
+    "get_bulk_concurrency",
+    "get_bulk_saved",
+    "get_object_cache",
     "hub_version",
+    "invalidate_identity_map",
     "iter_bulk_load",
+    "iter_bulk_load_stream",
     # "paged_query_history",
+    "set_bulk_chunking",
+    "set_bulk_concurrency",
+    "set_object_cache",
     "version_check",
     "version_require",
 )
@@ -130,6 +156,53 @@ class ManagedClientSession(ClientSession):
         return activate_session(self, self.opts)
 
 
+    def enable_metrics(self) -> HubMetrics:
+        """
+        Begin recording per-method metrics for the calls this session
+        makes to the hub. See `kojismokydingo.metrics.enable_metrics`
+
+        :since: 2.3
+        """
+        return enable_metrics(self)
+
+
+    def get_metrics(self) -> Optional[HubMetrics]:
+        """
+        The metrics recorded for this session, or None if
+        `enable_metrics` has not been invoked
+
+        :since: 2.3
+        """
+        return get_metrics(self)
+
+
+    def enable_recording(self) -> HubRecording:
+        """
+        Begin logging every call this session makes to the hub, along
+        with its outcome. The result may be saved and later served by
+        a `ReplayClientSession`. See
+        `kojismokydingo.replay.enable_recording`
+
+        :since: 2.3
+        """
+        return enable_recording(self)
+
+
+    def enable_fast_unmarshal(self, enabled: bool = True) -> None:
+        """
+        Decode hub responses with the faster
+        `kojismokydingo.unmarshal.FastUnmarshaller` rather than with
+        the stock XML-RPC unmarshaller. See
+        `kojismokydingo.unmarshal.enable_fast_unmarshal`
+
+        :param enabled: whether to use the faster unmarshaller.
+          Default, True
+
+        :since: 2.3
+        """
+        enable_fast_unmarshal(self, enabled)
+
+
     @property
     def logger(self):
         # a cached copy of `logging.getLogger('koji')`, assigned
@@ -218,6 +291,76 @@ class AnonClientSession(ProfileClientSession):
         ensure_connection(self)
 
 
+class ReplayClientSession(ManagedClientSession):
+    """
+    A `koji.ClientSession` which never contacts a hub, but instead
+    answers calls from a `kojismokydingo.replay.HubRecording`. Calls
+    bundled into multicalls are answered individually, so the
+    multicall batching need not match that of the recording.
+
+    :since: 2.3
+    """
+
+    def __init__(
+            self,
+            recording: Union[str, HubRecording, HubPlayback],
+            opts: Optional[dict] = None):
+        """
+        :param recording: the recorded hub traffic to serve, or the
+          filename of a saved recording
+
+        :param opts: session options
+        """
+
+        if isinstance(recording, str):
+            recording = HubRecording.load(recording)
+        if isinstance(recording, HubRecording):
+            recording = HubPlayback(recording)
+
+        super().__init__("replay:", opts=opts)
+        self.playback: HubPlayback = recording
+
+
+    def activate(self):
+        """
+        Does nothing, as there is no hub to login to
+
+        :since: 2.3
+        """
+
+        pass
+
+
+    def _respond(self, name, params):
+        entry = self.playback.respond(name, params)
+        if entry is None:
+            raise NotRecorded(f"{name}{tuple(params)!r}")
+        return entry
+
+
+    def _callMethod(self, name, args, kwargs=None, retry=True):
+        if self.multicall:
+            # legacy multicall pathway, which only records the call
+            return super()._callMethod(name, args, kwargs, retry)
+
+        params = encode_args(*args, **(kwargs or {}))
+
+        if name == "multiCall":
+            results = []
+            for call in params[0]:
+                entry = self._respond(call["methodName"], call["params"])
+                if "fault" in entry:
+                    results.append(entry["fault"])
+                else:
+                    results.append([entry["result"]])
+            return results
+
+        entry = self._respond(name, params)
+        if "fault" in entry:
+            raise convertFault(Fault(**entry["fault"]))
+        return entry["result"]
+
+
 class BadDingo(Exception):
     """
     Generalized base class for exceptions raised from kojismokydingo.
@@ -376,6 +519,17 @@ class NotPermitted(BadDingo):
     complaint = "Insufficient permissions"
 
 
+class NotRecorded(BadDingo):
+    """
+    A `ReplayClientSession` was asked to make a call which was not
+    present in its recording
+
+    :since: 2.3
+    """
+
+    complaint = "No recorded response for call"
+
+
 class FeatureUnavailable(BadDingo):
     """
     A given feature isn't available due to the version on the koji hub
@@ -387,12 +541,406 @@ class FeatureUnavailable(BadDingo):
 KT = TypeVar('KT')
 
 
+def clone_session(
+        session: ClientSession) -> ClientSession:
+    """
+    Produces a new session connected to the same hub and using the
+    same options as the given session. If the given session is logged
+    in, then the clone will be a subsession sharing that login.
+
+    The clone does not share a connection with the original session,
+    and so may be used from another thread while the original remains
+    in use.
+
+    If the given session is recording metrics or hub traffic, then
+    the clone will record into the same collector or recording. A
+    `ReplayClientSession` is cloned as another replay session serving
+    from the same recording.
+
+    If the given session is pinned to an event via
+    `kojismokydingo.pinning.pin_event`, then the clone will be pinned
+    to the same event.
+
+    :param session: an active koji client session
+
+    :since: 2.3
+    """
+
+    clone: ClientSession
+
+    if isinstance(session, ReplayClientSession):
+        clone = ReplayClientSession(session.playback, opts=session.opts)
+
+    else:
+        if session.logged_in:
+            sinfo = session.callMethod("subsession")
+        else:
+            sinfo = None
+
+        clone = ClientSession(session.baseurl, opts=session.opts,
+                              sinfo=sinfo)
+
+    metrics = get_metrics(session)
+    if metrics is not None:
+        enable_metrics(clone, metrics)
+
+    recording = get_recording(session)
+    if recording is not None:
+        enable_recording(clone, recording)
+
+    event = get_pinned_event(session)
+    if event is not None:
+        pin_event(clone, event)
+
+    return clone
+
+
+def get_bulk_concurrency(
+        session: ClientSession) -> int:
+    """
+    The default count of multicalls that `iter_bulk_load` will keep in
+    flight at once for the given session. Unless changed via
+    `set_bulk_concurrency` this will be 1, meaning that each multicall
+    must complete before the next is sent.
+
+    :param session: an active koji client session
+
+    :since: 2.3
+    """
+
+    return vars(session).get("__ksd_bulk_concurrency") or 1
+
+
+def set_bulk_concurrency(
+        session: ClientSession,
+        concurrency: int) -> None:
+    """
+    Set the default count of multicalls that `iter_bulk_load` will
+    keep in flight at once for the given session. This default is
+    honored by all of the ``bulk_load_*`` functions, and by anything
+    else which relies upon them (such as the prep phase of many
+    sieves).
+
+    A concurrency greater than 1 will cause `iter_bulk_load` to
+    dispatch its multicalls over a pool of sessions cloned via
+    `clone_session`.
+
+    :param session: an active koji client session
+
+    :param concurrency: count of multicalls to keep in flight. Values
+      less than 1 are treated as 1
+
+    :since: 2.3
+    """
+
+    vars(session)["__ksd_bulk_concurrency"] = max(1, int(concurrency))
+
+
+DEFAULT_CHUNK_SIZES: Dict[str, int] = {
+    "getBuild": 500,
+    "getBuildTargets": 100,
+    "getBuildroot": 100,
+    "getFullInheritance": 50,
+    "getLatestBuilds": 10,
+    "getTag": 500,
+    "getTaskInfo": 100,
+    "getUser": 500,
+    "listArchives": 25,
+    "listPackages": 10,
+    "listRPMs": 25,
+    "listTagged": 10,
+    "listTags": 100,
+    "queryRPMSigs": 250,
+}
+"""
+The initial chunk sizes used by adaptive chunking for calls to the
+given hub methods. Methods not listed here start with the size given
+by the caller.
+
+:since: 2.3
+"""
+
+
+def set_bulk_chunking(
+        session: ClientSession,
+        target: float = 2.0,
+        sizes: Optional[Dict[str, int]] = None,
+        min_size: int = 1,
+        max_size: int = 1000,
+        max_bytes: int = 0) -> None:
+    """
+    Enable adaptive chunk sizing for the bulk loading operations on
+    the given session. Rather than using a fixed size for each
+    multicall, `iter_bulk_load` will start from a per-method initial
+    size and then grow or shrink subsequent chunks toward the target
+    latency, based on the observed round-trip time and response size
+    of each multicall.
+
+    The tuned sizes are retained on the session for each method, so
+    later bulk loads of the same method begin where the previous ones
+    left off.
+
+    :param session: an active koji client session
+
+    :param target: desired round-trip time in seconds for a single
+      multicall. Default, 2.0
+
+    :param sizes: initial chunk sizes by hub method name, overriding
+      those in `DEFAULT_CHUNK_SIZES`
+
+    :param min_size: smallest permitted chunk size. Default, 1
+
+    :param max_size: largest permitted chunk size. Default, 1000
+
+    :param max_bytes: desired upper bound on the response size of a
+      single multicall. Default, 0 for no bound
+
+    :since: 2.3
+    """
+
+    initial = {key.lower(): val for key, val in DEFAULT_CHUNK_SIZES.items()}
+    if sizes:
+        initial.update((key.lower(), int(val)) for key, val in sizes.items())
+
+    vars(session)["__ksd_bulk_chunking"] = {
+        "target": target,
+        "sizes": initial,
+        "min_size": min_size,
+        "max_size": max_size,
+        "max_bytes": max_bytes,
+        "chunkers": {},
+    }
+
+
+def get_bulk_chunker(
+        session: ClientSession,
+        method: str,
+        size: int = 100) -> Optional[AdaptiveChunker]:
+    """
+    The adaptive chunker for the given hub method on this session. If
+    adaptive chunking has not been enabled via `set_bulk_chunking`
+    then returns None.
+
+    :param session: an active koji client session
+
+    :param method: name of the hub method being chunked
+
+    :param size: initial chunk size if the method has no configured
+      default. Default, 100
+
+    :since: 2.3
+    """
+
+    tuning = vars(session).get("__ksd_bulk_chunking")
+    if tuning is None:
+        return None
+
+    key = method.lower() if method else None
+    chunkers = tuning["chunkers"]
+
+    chunker = chunkers.get(key)
+    if chunker is None:
+        chunker = AdaptiveChunker(tuning["sizes"].get(key, size),
+                                  target=tuning["target"],
+                                  min_size=tuning["min_size"],
+                                  max_size=tuning["max_size"],
+                                  max_bytes=tuning["max_bytes"])
+        chunkers[key] = chunker
+
+    return chunker
+
+
+def _bulk_results(
+        key_chunk: Iterable[KT],
+        results: List[Any],
+        err: bool = True) -> Iterator[Tuple[KT, Any]]:
+
+    # pairs up the keys from a chunk with the results from the
+    # multicall which was invoked for them
+
+    for key, info in zip(key_chunk, results):
+        if info:
+            if "faultCode" in info:
+                if err:
+                    raise convertFault(Fault(**info))  # type: ignore
+                else:
+                    yield key, None
+            else:
+                yield key, info[0]  # type: ignore
+        else:
+            yield key, None
+
+
+def _record_chunks(
+        session: ClientSession,
+        loadfn: Callable[[Any], Any],
+        keys: Iterable[KT],
+        size: int,
+        adaptive: bool) -> Iterator[Tuple[List[KT], List[dict],
+                                          Optional[AdaptiveChunker]]]:
+
+    # Invokes loadfn in multicall mode on the session for each key,
+    # but rather than sending the multicall we collect the recorded
+    # calls. Yields a tuple of (key_chunk, calls, chunker) for each
+    # chunk. When adaptive, the first call recorded tells us which
+    # hub method is being used, and therefore which chunker governs
+    # the size of the chunks.
+
+    keys = iter(keys)
+    chunker = None
+
+    while True:
+        key_chunk = []
+
+        session.multicall = True
+        try:
+            for key in islice(keys, 1):
+                key_chunk.append(key)
+                loadfn(key)
+
+            if not key_chunk:
+                return
+
+            if adaptive and chunker is None:
+                calls = session._calls
+                method = calls[0]["methodName"] if calls else None
+                chunker = get_bulk_chunker(session, method, size)
+
+            count = chunker.size if chunker else size
+            for key in islice(keys, count - 1):
+                key_chunk.append(key)
+                loadfn(key)
+
+            calls = session._calls
+
+        finally:
+            session._calls = []
+            session.multicall = False
+
+        yield key_chunk, calls, chunker
+
+
+def _send_calls(
+        session: ClientSession,
+        calls: List[dict],
+        err: bool) -> Tuple[List[Any], float, int]:
+
+    # sends the previously recorded calls as a multicall from the
+    # given session. Returns the results along with the elapsed time
+    # and the size of the response body, if the hub reported it.
+
+    received = []
+
+    def measure(response, *args, **kwargs):
+        received.append(int(response.headers.get("Content-Length") or 0))
+
+    rsession = session.rsession
+    hooks = rsession.hooks["response"] if rsession else []
+    hooks.append(measure)
+
+    try:
+        start = perf_counter()
+        session.multicall = True
+        session._calls = calls
+        results = session.multiCall(strict=err)
+        elapsed = perf_counter() - start
+
+    finally:
+        if measure in hooks:
+            hooks.remove(measure)
+
+    return results, elapsed, sum(received)
+
+
+def _iter_bulk_load_dispatch(
+        session: ClientSession,
+        loadfn: Callable[[Any], Any],
+        keys: Iterable[KT],
+        err: bool,
+        size: int,
+        concurrency: int,
+        adaptive: bool) -> Generator[Tuple[KT, Any], None, None]:
+
+    # The loadfn is usually bound to the original session, so we
+    # continue to invoke it there in order to record the calls for
+    # each chunk. When concurrency is greater than 1, rather than
+    # send the calls from the original session we hand them off to a
+    # clone to be sent from a worker thread. At most concurrency
+    # chunks are in flight, and they are collected in the order they
+    # were dispatched.
+
+    chunks = _record_chunks(session, loadfn, keys, size, adaptive)
+
+    if concurrency < 2:
+        for key_chunk, calls, chunker in chunks:
+            results, elapsed, nbytes = _send_calls(session, calls, err)
+            if chunker:
+                chunker.record(len(key_chunk), elapsed, nbytes)
+            yield from _bulk_results(key_chunk, results, err)
+        return
+
+    idle: List[ClientSession] = []
+    clones: List[ClientSession] = []
+    pending: deque = deque()
+
+    def collect():
+        key_chunk, chunker, clone, future = pending.popleft()
+        try:
+            results, elapsed, nbytes = future.result()
+        finally:
+            idle.append(clone)
+        if chunker:
+            chunker.record(len(key_chunk), elapsed, nbytes)
+        return _bulk_results(key_chunk, results, err)
+
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            try:
+                for key_chunk, calls, chunker in chunks:
+                    if idle:
+                        clone = idle.pop()
+                    else:
+                        clone = clone_session(session)
+                        clones.append(clone)
+
+                    future = pool.submit(_send_calls, clone, calls, err)
+                    pending.append((key_chunk, chunker, clone, future))
+
+                    # collect before recording the next chunk, so
+                    # that no more than concurrency chunks are held
+                    if len(pending) >= concurrency:
+                        yield from collect()
+
+                while pending:
+                    yield from collect()
+
+            finally:
+                # if we're leaving early due to a fault or because our
+                # caller stopped iterating, then there's no point in
+                # sending any of the chunks which haven't started yet
+                for _key_chunk, _chunker, _clone, future in pending:
+                    future.cancel()
+
+    finally:
+        for clone in clones:
+            try:
+                clone.logout()
+            except Exception:
+                # same as in SmokyDingo.deactivate, all we want to
+                # do is logout -- we don't care if it fails
+                pass  # nosec
+            if clone.rsession:
+                clone.rsession.close()
+                clone.rsession = None
+
+
 def iter_bulk_load(
         session: ClientSession,
         loadfn: Callable[[Any], Any],
         keys: Iterable[KT],
         err: bool = True,
-        size: int = 100) -> Iterator[Tuple[KT, Any]]:
+        size: int = 100,
+        concurrency: Optional[int] = None) -> Iterator[Tuple[KT, Any]]:
     """
     Generic bulk loading generator. Invokes the given loadfn on each
     key in keys using chunking multicalls limited to the specified
@@ -400,10 +948,25 @@ def iter_bulk_load(
 
     Yields (key, result) pairs in order.
 
+    Each distinct key is only loaded once. If a key occurs more than
+    once in keys, its result is yielded for every occurrence. The
+    count of calls saved this way is accumulated on the session, and
+    is available via `get_bulk_saved`.
+
     If err is True (default) then any faults will raise an exception.
     If err is False, then a None will be substituted as the result for
     the failing key.
 
+    If concurrency is greater than 1, then up to that many chunks
+    will be in flight at once, each sent via its own session cloned
+    from the given session. The results are still yielded in the
+    order of keys.
+
+    If adaptive chunking has been enabled for the session via
+    `set_bulk_chunking`, then size is only used as the initial chunk
+    size for hub methods which have no configured default, and the
+    chunk sizes are tuned as the multicalls complete.
+
     :param session: The koji session
 
     :param loadfn: The loading function, to be invoked in a multicall
@@ -417,29 +980,317 @@ def iter_bulk_load(
     :param size: How many calls to loadfn to chunk up for each
       multicall. Default, 100
 
+    :param concurrency: How many multicalls to keep in flight at
+      once. Default, use the value from `get_bulk_concurrency`
+
     :raises koji.GenericError: if err is True and an issue
       occurrs while invoking the loadfn
 
     :since: 1.0
     """
 
+    if concurrency is None:
+        concurrency = get_bulk_concurrency(session)
+
+    keys = list(keys)
+    distinct, remaining = _dedup_keys(keys)
+
+    saved = len(keys) - len(distinct)
+    if saved:
+        session_vars = vars(session)
+        session_vars["__ksd_bulk_saved"] = \
+            session_vars.get("__ksd_bulk_saved", 0) + saved
+
+    adaptive = "__ksd_bulk_chunking" in vars(session)
+
+    if concurrency > 1 or adaptive:
+        loaded = _iter_bulk_load_dispatch(session, loadfn, distinct, err,
+                                          size, concurrency, adaptive)
+    else:
+        loaded = _iter_bulk_load_simple(session, loadfn, distinct,
+                                        err, size)
+
+    if not saved:
+        yield from loaded
+        return
+
+    # fan the results for the distinct keys back out to every
+    # occurrence of those keys. We only need to hold on to the
+    # results of keys which occur more than once, and only until
+    # their last occurrence.
+    held: Dict[Any, Any] = {}
+
+    try:
+        for key in keys:
+            try:
+                count = remaining.get(key)
+            except TypeError:
+                count = None
+
+            if count is None:
+                # unhashable, so it was never deduplicated
+                yield next(loaded)
+
+            elif key in held:
+                info = held[key]
+                if count == 1:
+                    del held[key]
+                    del remaining[key]
+                else:
+                    remaining[key] = count - 1
+                yield key, info
+
+            else:
+                found = next(loaded)
+                if count > 1:
+                    held[key] = found[1]
+                    remaining[key] = count - 1
+                yield found
+
+    finally:
+        # make sure the underlying loader has a chance to clean up,
+        # even if our caller stopped iterating early
+        loaded.close()
+
+
+def _dedup_keys(
+        keys: List[KT]) -> Tuple[List[KT], Dict[Any, int]]:
+
+    # produces the list of distinct keys, in order, and a dict of
+    # occurrence counts for each hashable key. Unhashable keys are
+    # always considered distinct.
+
+    distinct = []
+    counts: Dict[Any, int] = {}
+
+    for key in keys:
+        try:
+            count = counts.get(key, 0)
+        except TypeError:
+            distinct.append(key)
+            continue
+
+        if not count:
+            distinct.append(key)
+        counts[key] = count + 1
+
+    return distinct, counts
+
+
+def _iter_bulk_load_simple(
+        session: ClientSession,
+        loadfn: Callable[[Any], Any],
+        keys: List[KT],
+        err: bool,
+        size: int) -> Generator[Tuple[KT, Any], None, None]:
+
     for key_chunk in chunkseq(keys, size):
         session.multicall = True
 
         for key in key_chunk:
             loadfn(key)
 
-        for key, info in zip(key_chunk, session.multiCall(strict=err)):
-            if info:
-                if "faultCode" in info:
-                    if err:
-                        raise convertFault(Fault(**info))  # type: ignore
-                    else:
-                        yield key, None
-                else:
-                    yield key, info[0]  # type: ignore
-            else:
-                yield key, None
+        results = session.multiCall(strict=err)
+        yield from _bulk_results(key_chunk, results, err)
+
+
+def iter_bulk_load_stream(
+        session: ClientSession,
+        loadfn: Callable[[Any], Any],
+        keys: Iterable[KT],
+        err: bool = True,
+        size: int = 100,
+        buffered: Optional[int] = None) -> Iterator[Tuple[KT, Any]]:
+    """
+    Streaming variant of `iter_bulk_load`. Keys are read lazily, only
+    as each chunk is prepared, and the results for each chunk are
+    yielded as soon as its multicall completes. At most buffered
+    chunks are held at any one time, so the whole load runs in
+    memory bounded by buffered times size, regardless of how many
+    keys there are.
+
+    Yields (key, result) pairs in order.
+
+    Because no more than a few chunks are ever held, keys are not
+    deduplicated. Callers wanting to avoid repeat loads may filter
+    their keys with `kojismokydingo.common.iunique` first.
+
+    If buffered is greater than 1, then that many chunks may be in
+    flight at once, each sent via its own session cloned from the
+    given session, as with the concurrency option to
+    `iter_bulk_load`. Adaptive chunking is honored as it is for
+    `iter_bulk_load`.
+
+    :param session: The koji session
+
+    :param loadfn: The loading function, to be invoked in a multicall
+      arrangement. Will be called once with each given key from keys
+
+    :param keys: The sequence of keys to be used to invoke loadfn.
+      May be a lazy iterator, which will only be consumed as needed
+
+    :param err: Whether to raise any underlying fault returns as
+      exceptions. Default, True
+
+    :param size: How many calls to loadfn to chunk up for each
+      multicall. Default, 100
+
+    :param buffered: How many chunks to hold at once. Default, use
+      the value from `get_bulk_concurrency`
+
+    :raises koji.GenericError: if err is True and an issue
+      occurrs while invoking the loadfn
+
+    :since: 2.3
+    """
+
+    if buffered is None:
+        buffered = get_bulk_concurrency(session)
+
+    adaptive = "__ksd_bulk_chunking" in vars(session)
+
+    if buffered > 1 or adaptive:
+        yield from _iter_bulk_load_dispatch(session, loadfn, keys, err,
+                                            size, buffered, adaptive)
+        return
+
+    for chunk in ichunkseq(keys, size):
+        key_chunk = []
+
+        session.multicall = True
+        for key in chunk:
+            key_chunk.append(key)
+            loadfn(key)
+
+        results = session.multiCall(strict=err)
+        yield from _bulk_results(key_chunk, results, err)
+
+
+def get_bulk_saved(
+        session: ClientSession) -> int:
+    """
+    The count of hub calls which `iter_bulk_load` has avoided on this
+    session by sending only one call for each distinct key.
+
+    :param session: an active koji client session
+
+    :since: 2.3
+    """
+
+    return vars(session).get("__ksd_bulk_saved", 0)
+
+
+def get_object_cache(
+        session: ClientSession) -> Optional[ObjectCache]:
+    """
+    The persistent object cache associated with the given session via
+    `set_object_cache`, or None if there is no such cache.
+
+    :param session: an active koji client session
+
+    :since: 2.3
+    """
+
+    return vars(session).get("__ksd_object_cache")
+
+
+def set_object_cache(
+        session: ClientSession,
+        cache: Optional[ObjectCache]) -> None:
+    """
+    Associate a persistent object cache with the given session. While
+    associated, the following functions will consult the cache before
+    making any hub calls, and will store any newly loaded data which
+    will never change once it exists.
+
+    * `bulk_load_builds` stores builds in the COMPLETE state
+    * `bulk_load_buildroots` stores buildroots which are EXPIRED or
+      are EXTERNAL (from a content generator import)
+    * `bulk_load_build_rpms` and `bulk_load_build_archives` store the
+      artifacts of builds which are already in the cache
+    * `bulk_load_buildroot_rpms` and `bulk_load_buildroot_archives`
+      store the components of buildroots which are already in the
+      cache
+
+    The cached data is namespaced by the session's hub URL.
+
+    :param session: an active koji client session
+
+    :param cache: the object cache to use, or None to stop using a
+      cache
+
+    :since: 2.3
+    """
+
+    if cache is None:
+        vars(session).pop("__ksd_object_cache", None)
+    else:
+        vars(session)["__ksd_object_cache"] = cache
+
+
+def _cached_bulk_load(
+        session: ClientSession,
+        kind: str,
+        loadfn: Callable[[Any], Any],
+        keys: Iterable[KT],
+        err: bool,
+        size: int,
+        aliases: Optional[Callable[[KT, Any], Iterable[Any]]] = None,
+        requires: Optional[str] = None) -> Iterator[Tuple[KT, Any]]:
+
+    # Works like iter_bulk_load, but consults the session's object
+    # cache first. Only the keys which weren't cached are loaded from
+    # the hub. Loaded results are stored in the cache under the keys
+    # produced by the aliases function, which should produce nothing
+    # for results which are not safe to cache. If requires is
+    # specified, then only results whose key is already cached as
+    # that kind will be stored (eg. the RPMs of a build that is
+    # already known to be complete).
+
+    cache = get_object_cache(session)
+    if cache is None:
+        yield from iter_bulk_load(session, loadfn, keys, err, size)
+        return
+
+    hub = session.baseurl
+    keys = list(keys)
+
+    found = cache.load(hub, kind, keys)
+    missing = [key for key in keys if key not in found]
+
+    loaded = dict(iter_bulk_load(session, loadfn, missing, err, size))
+
+    if requires:
+        known = cache.contains(hub, requires, loaded)
+        aliases = lambda key, info: (key, ) if key in known else ()
+    elif aliases is None:
+        aliases = lambda key, info: (key, )
+
+    cache.store(hub, kind, ((alias, info) for key, info in loaded.items()
+                            if info is not None
+                            for alias in aliases(key, info)))
+
+    for key in keys:
+        yield key, (found[key] if key in found else loaded.get(key))
+
+
+def _build_aliases(key, info):
+    if info["state"] == BuildState.COMPLETE:
+        return (key, info["id"], info["nvr"])
+    else:
+        return ()
+
+
+def _buildroot_aliases(key, info):
+    if info["state"] == BuildrootState.EXPIRED or \
+       info["br_type"] == BuildrootType.EXTERNAL:
+        return (key, info["id"])
+    else:
+        return ()
+
+
+def _kind(kind: str, btype: Optional[str]) -> str:
+    return kind if btype is None else f"{kind}:{btype}"
 
 
 def bulk_load(
@@ -448,7 +1299,8 @@ def bulk_load(
         keys: Iterable[Any],
         err: bool = True,
         size: int = 100,
-        results: Optional[dict] = None) -> Dict[Any, Any]:
+        results: Optional[dict] = None,
+        concurrency: Optional[int] = None) -> Dict[Any, Any]:
     """
     Generic bulk loading function. Invokes the given `loadfn` on each
     key in `keys` using chunking multicalls limited to the specified
@@ -480,6 +1332,9 @@ def bulk_load(
       it will be populated and then used as the return value for this
       function. Default, a new dict will be allocated.
 
+    :param concurrency: How many multicalls to keep in flight at
+      once. Default, use the value from `get_bulk_concurrency`
+
     :raises koji.GenericError: if `err` is `True` and an issue
       occurrs while invoking the `loadfn`
 
@@ -487,7 +1342,8 @@ def bulk_load(
     """
 
     results = {} if results is None else results
-    results.update(iter_bulk_load(session, loadfn, keys, err, size))
+    results.update(iter_bulk_load(session, loadfn, keys, err, size,
+                                  concurrency))
     return results
 
 
@@ -532,8 +1388,9 @@ def bulk_load_builds(
 
     results = {} if results is None else results
 
-    for key, info in iter_bulk_load(session, session.getBuild, nvrs,
-                                    False, size):
+    for key, info in _cached_bulk_load(session, "build", session.getBuild,
+                                       nvrs, False, size,
+                                       aliases=_build_aliases):
         if err and not info:
             raise NoSuchBuild(key)
         else:
@@ -580,8 +1437,22 @@ def bulk_load_tasks(
     results = {} if results is None else results
     fn = partial(session.getTaskInfo, request=request, strict=False)
 
-    for key_chunk in chunkseq(task_ids, size):
-        for key, info in zip(key_chunk, fn(key_chunk)):
+    chunks: Iterator[Sequence[int]]
+
+    chunker = get_bulk_chunker(session, "getTaskInfo", size)
+    if chunker:
+        chunks = chunker.chunks(task_ids)
+    else:
+        # chunkseq always produces slices of a list or tuple
+        chunks = cast(Iterator[Sequence[int]], chunkseq(task_ids, size))
+
+    for key_chunk in chunks:
+        start = perf_counter()
+        loaded = fn(key_chunk)
+        if chunker:
+            chunker.record(len(key_chunk), perf_counter() - start)
+
+        for key, info in zip(key_chunk, loaded):
             if err and not info:
                 raise NoSuchTask(key)
             else:
@@ -625,7 +1496,22 @@ def bulk_load_tags(
     else:
         fn = session.getTag  # type: ignore
 
-    for key, info in iter_bulk_load(session, fn, tags, False, size):
+    known = _identity_known(session, "tag")
+    if known is None:
+        loaded = iter_bulk_load(session, fn, tags, False, size)
+
+    else:
+        tags = list(tags)
+        fetched = dict(iter_bulk_load(session, fn,
+                                      [t for t in tags if t not in known],
+                                      False, size))
+        for key, info in fetched.items():
+            if info:
+                _identity_remember(session, known, "tag", key, info)
+
+        loaded = ((t, known.get(t) or fetched.get(t)) for t in tags)
+
+    for key, info in loaded:
         if err and not info:
             raise NoSuchTag(key)
         else:
@@ -681,7 +1567,10 @@ def bulk_load_buildroot_archives(
 
     results = {} if results is None else results
     fn = lambda i: session.listArchives(componentBuildrootID=i, type=btype)
-    results.update(iter_bulk_load(session, fn, buildroot_ids, True, size))
+    results.update(_cached_bulk_load(session,
+                                     _kind("buildroot_archives", btype),
+                                     fn, buildroot_ids, True, size,
+                                     requires="buildroot"))
     return results
 
 
@@ -706,7 +1595,9 @@ def bulk_load_buildroot_rpms(
 
     results = {} if results is None else results
     fn = lambda i: session.listRPMs(componentBuildrootID=i)
-    results.update(iter_bulk_load(session, fn, buildroot_ids, True, size))
+    results.update(_cached_bulk_load(session, "buildroot_rpms",
+                                     fn, buildroot_ids, True, size,
+                                     requires="buildroot"))
     return results
 
 
@@ -732,7 +1623,10 @@ def bulk_load_build_archives(
 
     results = {} if results is None else results
     fn = lambda i: session.listArchives(buildID=i, type=btype)
-    results.update(iter_bulk_load(session, fn, build_ids, True, size))
+    results.update(_cached_bulk_load(session,
+                                     _kind("build_archives", btype),
+                                     fn, build_ids, True, size,
+                                     requires="build"))
     return results
 
 
@@ -756,8 +1650,9 @@ def bulk_load_build_rpms(
     """
 
     results = {} if results is None else results
-    results.update(iter_bulk_load(session, session.listRPMs,
-                                  build_ids, True, size))
+    results.update(_cached_bulk_load(session, "build_rpms",
+                                     session.listRPMs, build_ids,
+                                     True, size, requires="build"))
     return results
 
 
@@ -781,8 +1676,10 @@ def bulk_load_buildroots(
     """
 
     results = {} if results is None else results
-    results.update(iter_bulk_load(session, session.getBuildroot,
-                                  broot_ids, True, size))
+    results.update(_cached_bulk_load(session, "buildroot",
+                                     session.getBuildroot, broot_ids,
+                                     True, size,
+                                     aliases=_buildroot_aliases))
     return results
 
 
@@ -879,6 +1776,172 @@ def bulk_load_users(
     return results
 
 
+_IDENTITY_ALIASES = {
+    "build": "nvr",
+    "channel": "name",
+    "host": "name",
+    "package": "name",
+    "tag": "name",
+    "target": "name",
+    "user": "name",
+}
+
+
+def enable_identity_map(
+        session: ClientSession,
+        enabled: bool = True) -> None:
+    """
+    Enable or disable the identity map for the given session. While
+    enabled, the ``as_*info`` functions (and `bulk_load_tags`) will
+    remember each info dict they load, under both its ID and its name,
+    and will return that same dict for subsequent lookups of either,
+    rather than calling the hub again.
+
+    Task and repo lookups are never remembered, as those are expected
+    to change frequently.
+
+    Callers which modify data on the hub should use
+    `invalidate_identity_map` to drop any entries which may have
+    become stale.
+
+    Disabling the identity map discards all remembered entries.
+
+    :param session: an active koji client session
+
+    :param enabled: whether to enable the identity map. Default, True
+
+    :since: 2.3
+    """
+
+    session_vars = vars(session)
+    if enabled:
+        session_vars.setdefault("__ksd_identity_map", {})
+        session_vars.setdefault("__ksd_identity_keys", {})
+    else:
+        session_vars.pop("__ksd_identity_map", None)
+        session_vars.pop("__ksd_identity_keys", None)
+
+
+def invalidate_identity_map(
+        session: ClientSession,
+        kind: Optional[str] = None,
+        keys: Optional[Iterable[Any]] = None) -> None:
+    """
+    Drop remembered entries from the session's identity map. Dropping
+    an entry by either its ID or its name drops it under both.
+
+    :param session: an active koji client session
+
+    :param kind: the kind of entry to drop, eg. ``"tag"`` or
+      ``"build"``. If None then all entries are dropped.
+
+    :param keys: the IDs, names, or info dicts of the entries to
+      drop. If None then all entries of the given kind are dropped.
+
+    :since: 2.3
+    """
+
+    session_vars = vars(session)
+    imap = session_vars.get("__ksd_identity_map")
+    if not imap:
+        return
+
+    ikeys = session_vars["__ksd_identity_keys"]
+
+    if kind is None:
+        imap.clear()
+        ikeys.clear()
+        return
+
+    known = imap.get(kind)
+    if not known:
+        return
+
+    extra = ikeys.get(kind, {})
+
+    if keys is None:
+        known.clear()
+        extra.clear()
+        return
+
+    alias = _IDENTITY_ALIASES.get(kind)
+
+    for key in keys:
+        if isinstance(key, dict):
+            key = key.get("id")
+
+        info = known.pop(key, None)
+        if info is None:
+            continue
+
+        # drop the entry under every key it was remembered by
+        known.pop(info["id"], None)
+        if alias:
+            known.pop(info.get(alias), None)
+        for other in extra.pop(info["id"], ()):
+            known.pop(other, None)
+
+
+def _identity_known(
+        session: ClientSession,
+        kind: str) -> Optional[Dict[Any, Any]]:
+
+    # the remembered entries of the given kind, or None if the
+    # identity map is not enabled
+
+    imap = vars(session).get("__ksd_identity_map")
+    if imap is None:
+        return None
+    else:
+        return imap.setdefault(kind, {})
+
+
+def _identity_remember(
+        session: ClientSession,
+        known: Dict[Any, Any],
+        kind: str,
+        key: Any,
+        info: Any) -> None:
+
+    # remembers info under its ID, its alias if the kind has one, and
+    # the key it was looked up by. That key is also noted against the
+    # ID, so that invalidation needn't search for it
+
+    ident = info["id"]
+    known[ident] = info
+
+    alias = _IDENTITY_ALIASES.get(kind)
+    if alias and info.get(alias):
+        known[info[alias]] = info
+
+    if key not in known:
+        known[key] = info
+        ikeys = vars(session)["__ksd_identity_keys"]
+        ikeys.setdefault(kind, {}).setdefault(ident, []).append(key)
+
+
+def _identity_lookup(
+        session: ClientSession,
+        kind: str,
+        key: Any,
+        loadfn: Callable[[Any], Any]) -> Any:
+
+    # invokes loadfn with key, unless there's an existing entry in
+    # the session's identity map for the key
+
+    known = _identity_known(session, kind)
+    if known is None:
+        return loadfn(key)
+
+    info = known.get(key)
+    if info is None:
+        info = loadfn(key)
+        if info:
+            _identity_remember(session, known, kind, key, info)
+
+    return info
+
+
 def as_buildinfo(
         session: ClientSession,
         build: BuildSpec) -> BuildInfo:
@@ -901,7 +1964,7 @@ def as_buildinfo(
     """
 
     if isinstance(build, (str, int)):
-        info = session.getBuild(build)
+        info = _identity_lookup(session, "build", build, session.getBuild)
     elif isinstance(build, dict):
         info = build
     else:
@@ -935,7 +1998,8 @@ def as_channelinfo(
     """
 
     if isinstance(channel, (str, int)):
-        info = session.getChannel(channel)
+        info = _identity_lookup(session, "channel", channel,
+                                session.getChannel)
     elif isinstance(channel, dict):
         info = channel
     else:
@@ -970,9 +2034,10 @@ def as_taginfo(
 
     if isinstance(tag, (str, int)):
         if version_check(session, (1, 23)):
-            info = session.getTag(tag, blocked=True)
+            fn = partial(session.getTag, blocked=True)
         else:
-            info = session.getTag(tag)
+            fn = session.getTag  # type: ignore
+        info = _identity_lookup(session, "tag", tag, fn)
 
     elif isinstance(tag, dict):
         info = tag
@@ -1044,7 +2109,8 @@ def as_targetinfo(
     """
 
     if isinstance(target, (str, int)):
-        info = session.getBuildTarget(target)
+        info = _identity_lookup(session, "target", target,
+                                session.getBuildTarget)
     elif isinstance(target, dict):
         info = target
     else:
@@ -1078,7 +2144,7 @@ def as_hostinfo(
     """
 
     if isinstance(host, (str, int)):
-        info = session.getHost(host)
+        info = _identity_lookup(session, "host", host, session.getHost)
     elif isinstance(host, dict):
         info = host
     else:
@@ -1112,7 +2178,7 @@ def as_packageinfo(
     """
 
     if isinstance(pkg, (str, int)):
-        info = session.getPackage(pkg)
+        info = _identity_lookup(session, "package", pkg, session.getPackage)
     elif isinstance(pkg, dict):
         info = pkg
     else:
@@ -1147,11 +2213,15 @@ def as_archiveinfo(
     """
 
     if isinstance(archive, int):
-        info = session.getArchive(archive)
+        info = _identity_lookup(session, "archive", archive,
+                                session.getArchive)
 
     elif isinstance(archive, str):
-        found = session.listArchives(filename=archive)
-        info = found[0] if found else None
+        def by_filename(filename):
+            found = session.listArchives(filename=filename)
+            return found[0] if found else None
+
+        info = _identity_lookup(session, "archive", archive, by_filename)
 
     elif isinstance(archive, dict):
         info = archive
@@ -1236,7 +2306,7 @@ def as_rpminfo(
     info: RPMInfo
 
     if isinstance(rpm, (str, int)):
-        info = session.getRPM(rpm)  # type: ignore
+        info = _identity_lookup(session, "rpm", rpm, session.getRPM)
     elif isinstance(rpm, dict):
         info = rpm
     else:
@@ -1248,6 +2318,38 @@ def as_rpminfo(
     return info
 
 
+def _get_user(
+        session: ClientSession,
+        user: Union[int, str]) -> UserInfo:
+
+    session_vars = vars(session)
+    new_get_user = session_vars.get("__ksd_new_get_user")
+
+    if new_get_user:
+        # we've tried the new way and it worked, so keep doing it.
+        info = session.getUser(user, False, True)
+
+    elif new_get_user is None:
+        # an API incompatibility emerged at some point in Koji's
+        # past, so we need to try the new way first and fall back to
+        # the older signature if that fails. This happened before Koji
+        # hub started reporting its version, so we cannot use the
+        # version_check function to gate this.
+        try:
+            info = session.getUser(user, False, True)
+            session_vars["__ksd_new_get_user"] = True
+
+        except ParameterError:
+            info = session.getUser(user)
+            session_vars["__ksd_new_get_user"] = False
+
+    else:
+        # we've already tried the new way once and it didn't work.
+        info = session.getUser(user)
+
+    return info
+
+
 def as_userinfo(
         session: ClientSession,
         user: UserSpec) -> UserInfo:
@@ -1268,30 +2370,8 @@ def as_userinfo(
     """
 
     if isinstance(user, (str, int)):
-        session_vars = vars(session)
-        new_get_user = session_vars.get("__ksd_new_get_user")
-
-        if new_get_user:
-            # we've tried the new way and it worked, so keep doing it.
-            info = session.getUser(user, False, True)
-
-        elif new_get_user is None:
-            # an API incompatibility emerged at some point in Koji's
-            # past, so we need to try the new way first and fall back
-            # to the older signature if that fails. This happened
-            # before Koji hub started reporting its version, so we
-            # cannot use the version_check function to gate this.
-            try:
-                info = session.getUser(user, False, True)
-                session_vars["__ksd_new_get_user"] = True
-
-            except ParameterError:
-                info = session.getUser(user)
-                session_vars["__ksd_new_get_user"] = False
-
-        else:
-            # we've already tried the new way once and it didn't work.
-            info = session.getUser(user)
+        info = _identity_lookup(session, "user", user,
+                                partial(_get_user, session))
 
     elif isinstance(user, dict):
         info = user
@@ -0,0 +1,638 @@
+# This library is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this library; if not, see <http://www.gnu.org/licenses/>.
+
+
+"""
+Koji Smoky Dingo - asyncio Bulk Loading
+
+Coroutine counterparts to the bulk loading functions, which send
+their chunked multicalls to the hub over an asyncio transport rather
+than blocking a thread on each one.
+
+As the multicalls are encoded and sent by the transport itself,
+rather than through the session's ``_callMethod``, any wrappers
+installed on that method are bypassed. Calls loaded this way are
+still logged to any recording made via
+`kojismokydingo.replay.enable_recording`, and are pinned to the event
+of a session pinned via `kojismokydingo.pinning.pin_event`. However,
+they cannot be answered by a `kojismokydingo.ReplayClientSession`.
+
+:author: Christopher O'Brien <obriencj@gmail.com>
+:license: GPL v3
+"""
+
+
+import asyncio
+import ssl
+
+from collections import deque
+from functools import partial
+from koji import ClientSession, Fault, GenericError, convertFault, getparser
+from time import perf_counter
+from typing import (
+    Any, AsyncIterator, Callable, Dict, Iterable, List, Optional,
+    Tuple, TypeVar, Union, )
+from urllib.parse import urlsplit
+
+from . import (
+    NoSuchBuild, NoSuchTag,
+    _bulk_results, _record_chunks, clone_session, get_bulk_concurrency,
+    version_check, )
+from .metrics import get_metrics
+from .pinning import _pin_call, get_pinned_event
+from .replay import get_recording
+from .unmarshal import FastUnmarshaller
+from .types import ArchiveInfo, BuildInfo, RPMInfo, TagInfo
+
+
+__all__ = (
+    "AsyncHubTransport",
+
+    "async_bulk_load",
+    "async_bulk_load_build_archives",
+    "async_bulk_load_build_rpms",
+    "async_bulk_load_buildroots",
+    "async_bulk_load_builds",
+    "async_bulk_load_tags",
+    "async_iter_bulk_load",
+)
+
+
+KT = TypeVar('KT')
+
+
+class AsyncHubTransport():
+    """
+    Sends XML-RPC multicalls to a koji hub using asyncio streams. The
+    hub URL, SSL options, and any session authentication are taken
+    from the given session, which is also used to encode the requests.
+
+    A single HTTP connection is kept open and reused, so calls on one
+    transport are sent one at a time. Use several transports to have
+    more than one multicall in flight.
+
+    Only session-based authentication is supported. The session must
+    already be logged in (or be anonymous), as the transport cannot
+    perform a login itself.
+
+    :since: 2.3
+    """
+
+    def __init__(self, session: ClientSession):
+        """
+        :param session: the koji session whose hub, options, and
+          authentication will be used
+        """
+
+        self.session = session
+
+        url = urlsplit(session.baseurl)
+        self._netloc = url.netloc
+        self._host = url.hostname
+        self._secure = (url.scheme == "https")
+        self._port = url.port or (443 if self._secure else 80)
+
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+
+
+    def _ssl_context(self) -> Optional[ssl.SSLContext]:
+        if not self._secure:
+            return None
+
+        opts = self.session.opts
+        serverca = opts.get("serverca")
+
+        ctx = ssl.create_default_context(cafile=serverca)
+        if opts.get("no_ssl_verify") and not serverca:
+            # same as the requests-based transport in koji itself
+            ctx.check_hostname = False
+            ctx.verify_mode = ssl.CERT_NONE  # nosec
+
+        cert = opts.get("cert")
+        if cert:
+            ctx.load_cert_chain(cert)
+
+        return ctx
+
+
+    async def _connect(self) -> None:
+        self._reader, self._writer = await asyncio.open_connection(
+            self._host, self._port, ssl=self._ssl_context())
+
+
+    async def close(self) -> None:
+        """
+        Close the underlying connection, if it is open. The transport
+        may still be used afterwards, and will reconnect as needed.
+        """
+
+        writer = self._writer
+        self._reader = self._writer = None
+
+        if writer is not None:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except Exception:
+                # we're discarding this connection, so we don't care
+                # how it goes out
+                pass  # nosec
+
+
+    async def _read_response(self) -> Tuple[int, Dict[str, str], bytes]:
+        reader = self._reader
+
+        line = await reader.readline()
+        if not line:
+            raise ConnectionResetError("connection closed by hub")
+
+        status = int(line.split(None, 2)[1])
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        body: bytes
+
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            buf = bytearray()
+            while True:
+                line = await reader.readline()
+                size = int(line.split(b";", 1)[0], 16)
+                if not size:
+                    break
+                buf += await reader.readexactly(size)
+                await reader.readline()
+
+            # discard any trailers
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass
+
+            body = bytes(buf)
+
+        elif "content-length" in headers:
+            body = await reader.readexactly(int(headers["content-length"]))
+
+        else:
+            body = await reader.read()
+            headers["connection"] = "close"
+
+        return status, headers, body
+
+
+    async def _post(
+            self,
+            handler: str,
+            headers: List[Tuple[str, str]],
+            request: bytes) -> bytes:
+
+        url = urlsplit(handler)
+        path = url.path or "/"
+        if url.query:
+            path = f"{path}?{url.query}"
+
+        head = [f"POST {path} HTTP/1.1", f"Host: {self._netloc}"]
+        head.extend(f"{name}: {value}" for name, value in headers)
+        head.extend(("Connection: keep-alive", "", ""))
+        data = "\r\n".join(head).encode("latin-1") + request
+
+        # a kept-alive connection may have been dropped by the hub
+        # while it sat idle, in which case we reconnect and try once
+        # more
+        for attempt in (0, 1):
+            if self._writer is None:
+                await self._connect()
+            try:
+                self._writer.write(data)
+                await self._writer.drain()
+                status, rheaders, body = await self._read_response()
+            except (ConnectionError, asyncio.IncompleteReadError):
+                await self.close()
+                if attempt:
+                    raise
+            else:
+                break
+
+        if rheaders.get("connection", "").lower() == "close":
+            await self.close()
+
+        if status != 200:
+            raise GenericError(f"Hub responded with HTTP status {status}")
+
+        return body
+
+
+    async def multicall(
+            self,
+            calls: List[dict]) -> Tuple[List[Any], int]:
+        """
+        Send the given calls, as recorded by a session in multicall
+        mode, to the hub as a single multicall.
+
+        :param calls: the recorded calls
+
+        :returns: the multicall results, and the size in bytes of the
+          hub's response
+
+        :raises koji.GenericError: if the hub responds with a fault
+          or an error status
+        """
+
+        event = get_pinned_event(self.session)
+        if event is not None:
+            calls = [_pin_call(call, event) for call in calls]
+
+        handler, headers, request = \
+            self.session._prepCall("multiCall", (calls, ), {})
+
+        send = self._post(handler, headers, request)
+        start = perf_counter()
+
+        timeout = self.session.opts.get("timeout")
+        if timeout:
+            body = await asyncio.wait_for(send, timeout)
+        else:
+            body = await send
+
+        metrics = get_metrics(self.session)
+        if metrics is not None:
+            metrics.record_call("multiCall", perf_counter() - start,
+                                len(body), calls)
+
+        # either a FastUnmarshaller or a stock one, both of which
+        # produce the decoded params when closed
+        unmarshaller: Any
+
+        if "__ksd_read_response" in vars(self.session):
+            # the session has opted in to the faster unmarshaller
+            unmarshaller = FastUnmarshaller()
+            unmarshaller.feed(body)
+        else:
+            parser, unmarshaller = getparser()
+            parser.feed(body)
+            parser.close()
+
+        try:
+            params = unmarshaller.close()
+        except Fault as fault:
+            raise convertFault(fault)
+
+        # as with koji, a response of a single param is unwrapped
+        result = params[0] if len(params) == 1 else list(params)
+
+        recording = get_recording(self.session)
+        if recording is not None:
+            recording.record_multicall(calls, result)
+
+        return result, len(body)
+
+
+async def async_iter_bulk_load(
+        session: ClientSession,
+        loadfn: Callable[[Any], Any],
+        keys: Iterable[KT],
+        err: bool = True,
+        size: int = 100,
+        concurrency: Optional[int] = None) -> AsyncIterator[Tuple[KT, Any]]:
+    """
+    Asynchronous counterpart to `kojismokydingo.iter_bulk_load`.
+    Invokes the given loadfn on each key in keys using chunking
+    multicalls limited to the specified size, which are sent to the
+    hub via `AsyncHubTransport`.
+
+    Yields (key, result) pairs in order, as they become available.
+
+    Keys are read lazily and are not deduplicated, as with
+    `kojismokydingo.iter_bulk_load_stream`. Adaptive chunking is
+    honored if it has been enabled for the session.
+
+    Up to concurrency multicalls are in flight at once. For an
+    anonymous session these share the session's authentication. For
+    a logged in session, each additional multicall in flight is sent
+    from its own session cloned from the original, as the hub
+    requires the calls within a session to arrive in sequence.
+
+    :param session: The koji session
+
+    :param loadfn: The loading function, to be invoked in a multicall
+      arrangement. Will be called once with each given key from keys
+
+    :param keys: The sequence of keys to be used to invoke loadfn.
+
+    :param err: Whether to raise any underlying fault returns as
+      exceptions. Default, True
+
+    :param size: How many calls to loadfn to chunk up for each
+      multicall. Default, 100
+
+    :param concurrency: How many multicalls to keep in flight at
+      once. Default, use the value from
+      `kojismokydingo.get_bulk_concurrency`
+
+    :raises koji.GenericError: if err is True and an issue
+      occurrs while invoking the loadfn
+
+    :since: 2.3
+    """
+
+    if concurrency is None:
+        concurrency = get_bulk_concurrency(session)
+    concurrency = max(1, concurrency)
+
+    adaptive = "__ksd_bulk_chunking" in vars(session)
+    chunks = _record_chunks(session, loadfn, keys, size, adaptive)
+
+    loop = asyncio.get_running_loop()
+
+    idle: List[AsyncHubTransport] = []
+    transports: List[AsyncHubTransport] = []
+    clones: List[ClientSession] = []
+    pending: deque = deque()
+
+    async def send(transport, calls):
+        start = perf_counter()
+        results, nbytes = await transport.multicall(calls)
+        return results, perf_counter() - start, nbytes
+
+    async def collect():
+        key_chunk, chunker, transport, task = pending.popleft()
+        try:
+            results, elapsed, nbytes = await task
+        finally:
+            idle.append(transport)
+        if chunker:
+            chunker.record(len(key_chunk), elapsed, nbytes)
+        return _bulk_results(key_chunk, results, err)
+
+    try:
+        for key_chunk, calls, chunker in chunks:
+            if idle:
+                transport = idle.pop()
+            else:
+                if transports and session.logged_in:
+                    # cloning needs a blocking call to the hub, so we
+                    # shuffle it off to the default executor
+                    clone = await loop.run_in_executor(
+                        None, clone_session, session)
+                    clones.append(clone)
+                    transport = AsyncHubTransport(clone)
+                else:
+                    transport = AsyncHubTransport(session)
+                transports.append(transport)
+
+            task = loop.create_task(send(transport, calls))
+            pending.append((key_chunk, chunker, transport, task))
+
+            if len(pending) >= concurrency:
+                for found in await collect():
+                    yield found
+
+        while pending:
+            for found in await collect():
+                yield found
+
+    finally:
+        cancelled = [task for _key_chunk, _chunker, _transport, task
+                     in pending]
+        for task in cancelled:
+            task.cancel()
+
+        # let the cancelled tasks unwind before their transports are
+        # closed out from under them
+        await asyncio.gather(*cancelled, return_exceptions=True)
+
+        for transport in transports:
+            await transport.close()
+
+        for clone in clones:
+            try:
+                await loop.run_in_executor(None, clone.logout)
+            except Exception:
+                # same as in SmokyDingo.deactivate, all we want to
+                # do is logout -- we don't care if it fails
+                pass  # nosec
+
+
+async def async_bulk_load(
+        session: ClientSession,
+        loadfn: Callable[[Any], Any],
+        keys: Iterable[Any],
+        err: bool = True,
+        size: int = 100,
+        results: Optional[dict] = None,
+        concurrency: Optional[int] = None) -> Dict[Any, Any]:
+    """
+    Asynchronous counterpart to `kojismokydingo.bulk_load`. Loads the
+    results of invoking loadfn on each of keys via
+    `async_iter_bulk_load`, and returns them as a dict.
+
+    Each distinct key is only loaded once.
+
+    :param session: The koji session
+
+    :param loadfn: The loading function, to be invoked in a multicall
+      arrangement. Will be called once with each distinct key from
+      keys
+
+    :param keys: The sequence of keys to be used to invoke loadfn.
+
+    :param err: Whether to raise any underlying fault returns as
+      exceptions. Default, True
+
+    :param size: How many calls to loadfn to chunk up for each
+      multicall. Default, 100
+
+    :param results: storage for the results. Default, produce a new
+      dict
+
+    :param concurrency: How many multicalls to keep in flight at
+      once. Default, use the value from
+      `kojismokydingo.get_bulk_concurrency`
+
+    :raises koji.GenericError: if err is True and an issue
+      occurrs while invoking the loadfn
+
+    :since: 2.3
+    """
+
+    results = {} if results is None else results
+
+    keys = dict.fromkeys(keys)
+    loaded = async_iter_bulk_load(session, loadfn, keys, err, size,
+                                  concurrency)
+
+    async for key, info in loaded:
+        results[key] = info
+
+    return results
+
+
+async def async_bulk_load_builds(
+        session: ClientSession,
+        nvrs: Iterable[Union[str, int]],
+        err: bool = True,
+        size: int = 100,
+        results: Optional[dict] = None,
+        concurrency: Optional[int] = None) -> Dict[Union[int, str],
+                                                   BuildInfo]:
+    """
+    Asynchronous counterpart to `kojismokydingo.bulk_load_builds`.
+
+    :param session: an active koji client session
+
+    :param nvrs: Sequence of build NVRs or build IDs to load
+
+    :param err: Raise an exception if an NVR fails to load. Default,
+      True.
+
+    :param size: Count of NVRs to load in a single multicall. Default,
+      100
+
+    :param results: mapping to store the results in. Default, produce
+      a new dict
+
+    :param concurrency: How many multicalls to keep in flight at
+      once. Default, use the value from
+      `kojismokydingo.get_bulk_concurrency`
+
+    :raises NoSuchBuild: if err is True and any of the given builds
+      could not be loaded
+
+    :since: 2.3
+    """
+
+    results = {} if results is None else results
+    loaded = await async_bulk_load(session, session.getBuild, nvrs,
+                                   False, size, None, concurrency)
+
+    for key, info in loaded.items():
+        if err and not info:
+            raise NoSuchBuild(key)
+        results[key] = info
+
+    return results
+
+
+async def async_bulk_load_tags(
+        session: ClientSession,
+        tags: Iterable[Union[str, int]],
+        err: bool = True,
+        size: int = 100,
+        results: Optional[dict] = None,
+        concurrency: Optional[int] = None) -> Dict[Union[int, str],
+                                                   TagInfo]:
+    """
+    Asynchronous counterpart to `kojismokydingo.bulk_load_tags`.
+
+    :param session: an active koji client session
+
+    :param tags: tag IDs or names to load
+
+    :param err: Raise an exception if a tag fails to load. Default,
+      True.
+
+    :param size: Count of tags to load in a single multicall. Default,
+      100
+
+    :param results: mapping to store the results in. Default, produce
+      a new dict
+
+    :param concurrency: How many multicalls to keep in flight at
+      once. Default, use the value from
+      `kojismokydingo.get_bulk_concurrency`
+
+    :raises NoSuchTag: if err is True and a tag couldn't be loaded
+
+    :since: 2.3
+    """
+
+    results = {} if results is None else results
+
+    if version_check(session, (1, 23)):
+        fn = partial(session.getTag, blocked=True)
+    else:
+        fn = session.getTag  # type: ignore
+
+    loaded = await async_bulk_load(session, fn, tags, False, size,
+                                   None, concurrency)
+
+    for key, info in loaded.items():
+        if err and not info:
+            raise NoSuchTag(key)
+        results[key] = info
+
+    return results
+
+
+async def async_bulk_load_buildroots(
+        session: ClientSession,
+        broot_ids: Iterable[int],
+        size: int = 100,
+        results: Optional[dict] = None,
+        concurrency: Optional[int] = None) -> Dict[int, dict]:
+    """
+    Asynchronous counterpart to
+    `kojismokydingo.bulk_load_buildroots`.
+
+    :since: 2.3
+    """
+
+    return await async_bulk_load(session, session.getBuildroot,
+                                 broot_ids, True, size, results,
+                                 concurrency)
+
+
+async def async_bulk_load_build_rpms(
+        session: ClientSession,
+        build_ids: Iterable[int],
+        size: int = 100,
+        results: Optional[dict] = None,
+        concurrency: Optional[int] = None) -> Dict[int, List[RPMInfo]]:
+    """
+    Asynchronous counterpart to
+    `kojismokydingo.bulk_load_build_rpms`.
+
+    :since: 2.3
+    """
+
+    return await async_bulk_load(session, session.listRPMs,
+                                 build_ids, True, size, results,
+                                 concurrency)
+
+
+async def async_bulk_load_build_archives(
+        session: ClientSession,
+        build_ids: Iterable[int],
+        btype: Optional[str] = None,
+        size: int = 100,
+        results: Optional[dict] = None,
+        concurrency: Optional[int] = None) -> Dict[int, List[ArchiveInfo]]:
+    """
+    Asynchronous counterpart to
+    `kojismokydingo.bulk_load_build_archives`.
+
+    :since: 2.3
+    """
+
+    fn = lambda i: session.listArchives(buildID=i, type=btype)
+    return await async_bulk_load(session, fn, build_ids, True, size,
+                                 results, concurrency)
+
+
+#
+# The end.
@@ -39,7 +39,7 @@ from . import (
     bulk_load_rpm_sigs, bulk_load_tasks, iter_bulk_load, )
 from .common import (
     chunkseq, merge_extend, unique, update_extend, )
-from .rpm import evr_compare
+from .rpm import EVRKey, evr_compare, nevr_key
 from .types import (
     BuildInfo, BuildInfos, BuildState, DecoratedBuildInfo,
     DecoratedBuildInfos, TagBuildInfo, TagSpec, )
@@ -52,6 +52,7 @@ __all__ = (
 
     "build_dedup",
     "build_id_sort",
+    "build_nvr_key",
     "build_nvr_sort",
     "bulk_move_builds",
     "bulk_move_nvrs",
@@ -151,6 +152,22 @@ class BuildNEVRCompare(NEVRCompare):
                          binfo["epoch"], binfo["version"], binfo["release"])
 
 
+def build_nvr_key(binfo: BuildInfo) -> Tuple[str, EVRKey]:
+    """
+    A sort key for a build info dictionary, ordering by Name, Epoch,
+    Version, and Release using RPM's variation of comparison. Keys
+    compare the same as `BuildNEVRCompare` instances would, but are
+    plain tuples and so are much cheaper to sort with.
+
+    :param binfo: build info to produce a key for
+
+    :since: 2.3
+    """
+
+    return nevr_key(binfo["name"], binfo["epoch"],
+                    binfo["version"], binfo["release"])
+
+
 def build_nvr_sort(
         build_infos: BuildInfos,
         dedup: bool = True,
@@ -176,7 +193,7 @@ def build_nvr_sort(
     if dedup:
         build_infos = unique(build_infos, key="id")
 
-    return sorted(build_infos, key=BuildNEVRCompare, reverse=reverse)
+    return sorted(build_infos, key=build_nvr_key, reverse=reverse)
 
 
 def build_id_sort(
@@ -855,7 +872,8 @@ def decorate_builds_btypes(
 
 def decorate_builds_cg_list(
         session: ClientSession,
-        build_infos: BuildInfos) -> List[DecoratedBuildInfo]:
+        build_infos: BuildInfos,
+        build_rpms: Optional[dict] = None) -> List[DecoratedBuildInfo]:
     """
     Augments a list of build_info dicts with two or four new keys:
 
@@ -872,6 +890,11 @@ def decorate_builds_cg_list(
     :param session: an active koji client session
 
     :param build_infos: list of build infos to decorate and return
+
+    :param build_rpms: mapping of build IDs to their RPMs as from
+      `kojismokydingo.bulk_load_build_rpms`, which must contain every
+      build needing decoration. Default, load the RPMs via a
+      multicall. Since 2.3
     """
 
     # some of the facets we might consider as a property of the build
@@ -898,7 +921,10 @@ def decorate_builds_cg_list(
     # multicall to fetch the artifacts and rpms for all build IDs that
     # need decorating
     archives = bulk_load_build_archives(session, wanted)
-    rpms = bulk_load_build_rpms(session, wanted)
+    if build_rpms is None:
+        rpms = bulk_load_build_rpms(session, wanted)
+    else:
+        rpms = {bid: build_rpms[bid] for bid in wanted}
 
     # gather all the buildroot IDs, based on both the archives and
     # RPMs of the build.
@@ -1171,7 +1197,8 @@ def gather_buildroots(
 
 def gather_rpm_sigkeys(
         session: ClientSession,
-        build_ids: Iterable[int]) -> Dict[int, Set[str]]:
+        build_ids: Iterable[int],
+        build_rpms: Optional[dict] = None) -> Dict[int, Set[str]]:
     """
     Given a sequence of build IDs, collect the available sigkeys for
     each rpm in each build.
@@ -1182,10 +1209,18 @@ def gather_rpm_sigkeys(
     :param session: an active koji session
 
     :param build_ids: IDs of builds to gather keys from
+
+    :param build_rpms: mapping of build IDs to their RPMs as from
+      `kojismokydingo.bulk_load_build_rpms`, which must contain every
+      one of build_ids. Default, load the RPMs via a multicall. Since
+      2.3
     """
 
     # first load a mapping of build_id: [RPMS]
-    loaded = bulk_load_build_rpms(session, build_ids)
+    if build_rpms is None:
+        loaded = bulk_load_build_rpms(session, build_ids)
+    else:
+        loaded = {bid: build_rpms[bid] for bid in build_ids}
 
     # now load a mapping of rpm_id: [SIGS]
     rpmids = (rpm["id"] for rpm in chain(*loaded.values()))
@@ -0,0 +1,356 @@
+# This library is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this library; if not, see <http://www.gnu.org/licenses/>.
+
+
+"""
+Koji Smoky Dingo - Persistent Object Cache
+
+A size-bounded on-disk store for hub data which will never change
+once it exists, such as completed builds and expired buildroots.
+
+:author: Christopher O'Brien <obriencj@gmail.com>
+:license: GPL v3
+"""
+
+
+# Note: like the common module, nothing in here should require a
+# session object. Deciding what is safe to cache is the job of the
+# callers.
+
+
+import sqlite3
+
+from json import dumps, loads
+from os import makedirs
+from os.path import dirname, join
+from threading import RLock
+from time import time
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from .common import find_cache_dir
+
+
+__all__ = (
+    "DEFAULT_MAX_BYTES",
+    "ObjectCache",
+
+    "default_cache_path",
+)
+
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+"""
+Default upper bound on the total size of the values stored in an
+`ObjectCache`, in bytes
+
+:since: 2.3
+"""
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS objects (
+  namespace TEXT NOT NULL,
+  kind TEXT NOT NULL,
+  key TEXT NOT NULL,
+  value TEXT NOT NULL,
+  size INTEGER NOT NULL,
+  atime REAL NOT NULL,
+  PRIMARY KEY (namespace, kind, key)
+);
+CREATE INDEX IF NOT EXISTS objects_atime ON objects (atime);
+"""
+
+
+def default_cache_path() -> str:
+    """
+    The default location of the object cache database, within the
+    koji-smoky-dingo user cache dir.
+
+    :since: 2.3
+    """
+
+    return join(find_cache_dir("objects"), "objects.sqlite")
+
+
+class ObjectCache():
+    """
+    A persistent cache of JSON-compatible values, stored in an sqlite
+    database. Values are grouped by a namespace (typically the hub
+    URL) and a kind (eg. ``"build"``), and are identified by a
+    JSON-compatible key within those.
+
+    When the total size of the stored values grows beyond max_bytes,
+    the least recently used values are evicted until the total is
+    back under 90% of that bound.
+
+    The cache makes no decisions regarding what is safe to store, it
+    is up to the caller to only store values which will never change.
+
+    :since: 2.3
+    """
+
+    def __init__(
+            self,
+            path: Optional[str] = None,
+            max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        :param path: filename of the cache database. Default, the
+          result of `default_cache_path`. The special value
+          ``":memory:"`` will create a non-persistent cache
+
+        :param max_bytes: upper bound on the total size of stored
+          values. Default, `DEFAULT_MAX_BYTES`
+        """
+
+        if path is None:
+            path = default_cache_path()
+
+        if path != ":memory:":
+            makedirs(dirname(path) or ".", exist_ok=True)
+
+        self.path = path
+        self.max_bytes = max_bytes
+
+        self._lock = RLock()
+        self._conn = sqlite3.connect(path, timeout=30,
+                                     check_same_thread=False)
+        self._conn.executescript(_SCHEMA)
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, exc_type, _exc_val, _exc_tb):
+        self.close()
+        return (exc_type is None)
+
+
+    def close(self) -> None:
+        """
+        Close the underlying database connection. The cache cannot be
+        used afterwards.
+        """
+
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+    def load(
+            self,
+            namespace: str,
+            kind: str,
+            keys: Iterable[Any]) -> Dict[Any, Any]:
+        """
+        Fetch the cached values for any of the given keys. Keys which
+        are not present in the cache are omitted from the result.
+
+        :param namespace: cache namespace, eg. the hub URL
+
+        :param kind: the kind of value being loaded
+
+        :param keys: keys to look up
+
+        :returns: dict mapping the found keys to their values
+        """
+
+        wanted = {dumps(key): key for key in keys}
+        found: Dict[Any, Any] = {}
+
+        if not wanted:
+            return found
+
+        now = time()
+        touched = []
+
+        with self._lock, self._conn as conn:
+            # each key is a primary key lookup via the same statement,
+            # which sqlite3 prepares only once
+            for skey, key in wanted.items():
+                row = conn.execute(
+                    "SELECT value FROM objects"
+                    " WHERE namespace = ? AND kind = ? AND key = ?",
+                    (namespace, kind, skey)).fetchone()
+
+                if row is not None:
+                    found[key] = loads(row[0])
+                    touched.append((now, namespace, kind, skey))
+
+            conn.executemany(
+                "UPDATE objects SET atime = ?"
+                " WHERE namespace = ? AND kind = ? AND key = ?",
+                touched)
+
+        return found
+
+
+    def contains(
+            self,
+            namespace: str,
+            kind: str,
+            keys: Iterable[Any]) -> Set[Any]:
+        """
+        Check which of the given keys are present in the cache, without
+        loading their values.
+
+        :param namespace: cache namespace, eg. the hub URL
+
+        :param kind: the kind of value being checked
+
+        :param keys: keys to look up
+
+        :returns: the set of keys which are present
+        """
+
+        wanted = {dumps(key): key for key in keys}
+        found: Set[Any] = set()
+
+        if not wanted:
+            return found
+
+        with self._lock:
+            for skey, key in wanted.items():
+                row = self._conn.execute(
+                    "SELECT 1 FROM objects"
+                    " WHERE namespace = ? AND kind = ? AND key = ?",
+                    (namespace, kind, skey)).fetchone()
+
+                if row is not None:
+                    found.add(key)
+
+        return found
+
+
+    def store(
+            self,
+            namespace: str,
+            kind: str,
+            items: Iterable[Tuple[Any, Any]]) -> int:
+        """
+        Store the given key, value pairs. Pairs whose key or value
+        cannot be represented as JSON are silently skipped.
+
+        :param namespace: cache namespace, eg. the hub URL
+
+        :param kind: the kind of value being stored
+
+        :param items: key, value pairs to store
+
+        :returns: count of values stored
+        """
+
+        now = time()
+        rows = []
+
+        for key, value in items:
+            try:
+                data = dumps(value)
+                rows.append((namespace, kind, dumps(key),
+                             data, len(data), now))
+            except (TypeError, ValueError):
+                pass
+
+        if not rows:
+            return 0
+
+        with self._lock:
+            with self._conn as conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO objects"
+                    " (namespace, kind, key, value, size, atime)"
+                    " VALUES (?, ?, ?, ?, ?, ?)", rows)
+            self.evict()
+
+        return len(rows)
+
+
+    def size(self) -> int:
+        """
+        The total size in bytes of all values in the cache
+        """
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM objects").fetchone()
+        return row[0]
+
+
+    def evict(self) -> int:
+        """
+        If the total size of the values in the cache exceeds max_bytes,
+        remove the least recently used values until the total is
+        under 90% of max_bytes.
+
+        :returns: count of values evicted
+        """
+
+        with self._lock:
+            total = self.size()
+            if total <= self.max_bytes:
+                return 0
+
+            excess = total - int(self.max_bytes * 0.9)
+            doomed = []
+
+            rows = self._conn.execute(
+                "SELECT rowid, size FROM objects ORDER BY atime")
+            for rowid, size in rows:
+                if excess <= 0:
+                    break
+                doomed.append((rowid, ))
+                excess -= size
+
+            with self._conn as conn:
+                conn.executemany("DELETE FROM objects WHERE rowid = ?",
+                                 doomed)
+
+        return len(doomed)
+
+
+    def clear(
+            self,
+            namespace: Optional[str] = None,
+            kind: Optional[str] = None) -> None:
+        """
+        Remove values from the cache. If namespace and/or kind are
+        specified, then only matching values are removed. Otherwise
+        the entire cache is emptied.
+
+        :param namespace: only remove values in this namespace
+
+        :param kind: only remove values of this kind
+        """
+
+        where = []
+        params = []
+
+        if namespace is not None:
+            where.append("namespace = ?")
+            params.append(namespace)
+
+        if kind is not None:
+            where.append("kind = ?")
+            params.append(kind)
+
+        query = "DELETE FROM objects"
+        if where:
+            query = f"{query} WHERE {' AND '.join(where)}"
+
+        with self._lock, self._conn as conn:
+            conn.execute(query, params)
+
+
+#
+# The end.
@@ -38,14 +38,20 @@ from koji import ClientSession, GenericError
 from koji_cli.commands import _print_histline, _table_keys
 from koji_cli.lib import activate_session, ensure_connection
 from operator import itemgetter
-from os import devnull
+from os import devnull, environ
 from os.path import basename
 from typing import (
-    Any, Callable, Dict, Iterable, List, Optional, Sequence,
+    Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence,
     TextIO, Tuple, Union, )
 
-from .. import BadDingo, NotPermitted
+from .. import (
+    BadDingo, NotPermitted, enable_identity_map, get_object_cache,
+    set_bulk_chunking, set_bulk_concurrency, set_object_cache, )
+from ..cache import DEFAULT_MAX_BYTES, ObjectCache
 from ..common import itemsgetter, load_plugin_config
+from ..metrics import enable_metrics
+from ..replay import enable_recording
+from ..unmarshal import enable_fast_unmarshal
 from ..types import CLIProtocol, GOptions, HistoryEntry
 
 
@@ -62,7 +68,9 @@ __all__ = (
     "convert_history",
     "find_action",
     "remove_action",
+    "iclean_lines",
     "int_or_str",
+    "iread_clean_lines",
     "open_output",
     "pretty_json",
     "print_history",
@@ -267,12 +275,30 @@ def clean_lines(
     :since: 1.0
     """
 
+    return list(iclean_lines(lines, skip_comments))
+
+
+def iclean_lines(
+        lines: Iterable[str],
+        skip_comments: bool = True) -> Iterator[str]:
+    """
+    Similar to `clean_lines`, but lazy. Lines are only read from the
+    sequence as the results are iterated over.
+
+    :param lines: Sequence of lines to process
+
+    :param skip_comments: Skip over lines with leading # characters.
+      Default, True
+
+    :since: 2.3
+    """
+
     if skip_comments:
         lines = (l.split('#', 1)[0].strip() for l in lines)
     else:
         lines = map(str.strip, lines)
 
-    return list(filter(None, lines))
+    return filter(None, lines)
 
 
 def read_clean_lines(
@@ -311,6 +337,37 @@ def read_clean_lines(
             return clean_lines(fin)
 
 
+def iread_clean_lines(
+        filename: str = "-",
+        skip_comments: bool = True) -> Iterator[str]:
+    """
+    Similar to `read_clean_lines`, but lazy. Lines are only read from
+    the file as the results are iterated over, so that arbitrarily
+    large inputs may be processed in bounded memory.
+
+    The file (if not stdin) is opened when iteration begins, and is
+    closed once the lines are exhausted or the iterator is closed.
+
+    :param filename: File name to read lines from, or ``-`` to indicate
+      stdin. Default, read from `sys.stdin`
+
+    :param skip_comments: Skip over lines with leading # characters.
+      Default, True
+
+    :since: 2.3
+    """
+
+    if not filename:
+        return
+
+    elif filename == "-":
+        yield from iclean_lines(sys.stdin, skip_comments)
+
+    else:
+        with open(filename, "rt") as fin:
+            yield from iclean_lines(fin, skip_comments)
+
+
 def printerr(
         *values: Any,
         sep: str = ' ',
@@ -592,6 +649,9 @@ class SmokyDingo(CLIProtocol, metaclass=ABCMeta):
 
       * the `SmokyDingo.activate` method authenticates with the hub
 
+      * the `SmokyDingo.configure_session` method applies any plugin
+        configuration settings to the session
+
       * the `SmokyDingo.pre_handle` method verifies that any required
         permissions are present for the user
 
@@ -765,6 +825,72 @@ class SmokyDingo(CLIProtocol, metaclass=ABCMeta):
             return activate_session(self.session, self.goptions)
 
 
+    def configure_session(self) -> None:
+        """
+        Apply plugin configuration settings to our session. This is
+        triggered after activate, before pre_handle and handle
+
+        The session's identity map is enabled, so that repeated
+        lookups of the same tag, build, user, etc. will only call the
+        hub once per command invocation.
+
+        This also honors the ``bulk_concurrency`` setting, which is the
+        count of multicalls that may be in flight at once during bulk
+        loading operations, and the ``fast_unmarshal`` setting, which
+        decodes hub responses with
+        `kojismokydingo.unmarshal.FastUnmarshaller`.
+
+        Adaptive chunk sizing for bulk loading operations is configured
+        from the ``bulk-load`` plugin config section, and the
+        persistent object cache from the ``object-cache`` section.
+        These apply to all commands.
+
+        :since: 2.3
+        """
+
+        if not self.session:
+            return
+
+        enable_identity_map(self.session)
+
+        concurrency = self.get_plugin_config("bulk_concurrency")
+        if concurrency:
+            set_bulk_concurrency(self.session, int(concurrency))
+
+        fast = self.get_plugin_config("fast_unmarshal", "0")
+        if fast.lower() in ("1", "yes", "true"):
+            enable_fast_unmarshal(self.session)
+
+        profile = self.goptions.profile if self.goptions else None
+
+        conf = load_plugin_config("object-cache", profile)
+        enabled = conf.get("enabled", "0")
+        if enabled.lower() in ("1", "yes", "true"):
+            cache = ObjectCache(conf.get("path") or None,
+                                int(conf.get("max_bytes",
+                                             DEFAULT_MAX_BYTES)))
+            set_object_cache(self.session, cache)
+
+        conf = load_plugin_config("bulk-load", profile)
+
+        adaptive = conf.get("adaptive", "0")
+        if adaptive.lower() not in ("1", "yes", "true"):
+            return
+
+        # configparser will have lower-cased the method names, but
+        # set_bulk_chunking doesn't care
+        prefix = "chunk_size."
+        sizes = {key[len(prefix):]: int(val) for key, val in conf.items()
+                 if key.startswith(prefix)}
+
+        set_bulk_chunking(self.session,
+                          target=float(conf.get("target_latency", 2.0)),
+                          sizes=sizes,
+                          min_size=int(conf.get("min_size", 1)),
+                          max_size=int(conf.get("max_size", 1000)),
+                          max_bytes=int(conf.get("max_bytes", 0)))
+
+
     def deactivate(self) -> None:
         """
         Deactivate our session. This is triggered after handle has
@@ -775,6 +901,11 @@ class SmokyDingo(CLIProtocol, metaclass=ABCMeta):
         """
 
         if self.session:
+            cache = get_object_cache(self.session)
+            if cache is not None:
+                set_object_cache(self.session, None)
+                cache.close()
+
             try:
                 self.session.logout()
             except Exception:
@@ -801,8 +932,24 @@ class SmokyDingo(CLIProtocol, metaclass=ABCMeta):
 
         self.validate(parser, options)
 
+        # KSD_METRICS=1 in the environment will record every call we
+        # make to the hub, and print a summary once we're done
+        if environ.get("KSD_METRICS", "0") not in ("", "0"):
+            metrics = enable_metrics(session)
+        else:
+            metrics = None
+
+        # KSD_RECORD=filename in the environment will save every call
+        # we make to the hub and its outcome, for later replay
+        record = environ.get("KSD_RECORD")
+        if record:
+            recording = enable_recording(session)
+        else:
+            recording = None
+
         try:
             self.activate()
+            self.configure_session()
             self.pre_handle(options)
             return self.handle(options) or 0
 
@@ -830,6 +977,12 @@ class SmokyDingo(CLIProtocol, metaclass=ABCMeta):
             self.goptions = None
             self.session = None
 
+            if metrics is not None:
+                metrics.report()
+
+            if recording is not None:
+                recording.save(record)
+
 
 class AnonSmokyDingo(SmokyDingo, metaclass=ABCMeta):
     """
@@ -30,17 +30,19 @@ from operator import itemgetter
 from os import system
 from shlex import quote
 from typing import (
-    Any, Callable, Dict, Iterable, List, Optional, Sequence, Union, )
+    Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence,
+    Union, )
 
 from . import (
     AnonSmokyDingo, BadDingo, TagSmokyDingo,
     int_or_str, pretty_json, open_output,
-    printerr, read_clean_lines, resplit, )
-from .sift import BuildSifting, Sifter, output_sifted
+    iread_clean_lines, printerr, read_clean_lines, resplit, )
+from .sift import (
+    BuildSifting, Sifter, output_sifted, output_sifted_stream, )
 from .. import (
     NoSuchBuild, as_buildinfo, as_taginfo, as_userinfo,
     bulk_load, bulk_load_builds, bulk_load_tags, iter_bulk_load,
-    version_check, )
+    iter_bulk_load_stream, version_check, )
 from ..builds import (
     BuildFilter,
     build_dedup, build_id_sort, build_nvr_sort,
@@ -48,7 +50,8 @@ from ..builds import (
     gather_component_build_ids, gather_wrapped_builds,
     iter_bulk_move_builds, iter_bulk_tag_builds,
     iter_bulk_untag_builds, )
-from ..common import chunkseq, unique
+from ..common import chunkseq, ichunkseq, iunique, unique
+from ..pinning import pin_event
 from ..tags import ensure_tag, gather_tag_ids
 from ..types import (
     BTypeInfo, BuildInfo, BuildInfos, BuildSpec,
@@ -880,14 +883,40 @@ class ListComponents(AnonSmokyDingo, BuildFiltering):
         sorting = options.sorting
         outputs = self.get_outputs(options)
 
-        return cli_list_components(self.session, nvrs,
-                                   tags=tags,
-                                   inherit=options.inherit,
-                                   latest=options.latest,
-                                   build_filter=bf,
-                                   build_sifter=bs,
-                                   sorting=sorting,
-                                   outputs=outputs)
+        try:
+            return cli_list_components(self.session, nvrs,
+                                       tags=tags,
+                                       inherit=options.inherit,
+                                       latest=options.latest,
+                                       build_filter=bf,
+                                       build_sifter=bs,
+                                       sorting=sorting,
+                                       outputs=outputs)
+        finally:
+            self.report_profile(bs)
+
+
+def _stream_filter_builds(
+        session: ClientSession,
+        nvr_list: Iterable[Union[int, str]],
+        build_filter: Optional[BuildFilter],
+        size: int = 100) -> Iterator[BuildInfo]:
+
+    # lazily loads and filters builds a chunk at a time. Only the IDs
+    # of the builds already produced are retained between chunks, so
+    # memory grows with the count of distinct builds rather than with
+    # the input. Builds which cannot be found are skipped.
+
+    nvrs = map(int_or_str, nvr_list)
+    loaded = iter_bulk_load_stream(session, session.getBuild, nvrs,
+                                   err=False, size=size)
+
+    builds: Iterable[BuildInfo] = (info for _key, info in loaded if info)
+    if build_filter:
+        builds = chain.from_iterable(map(build_filter,
+                                         ichunkseq(builds, size)))
+
+    return iunique(builds, key="id")
 
 
 def cli_filter_builds(
@@ -906,6 +935,26 @@ def cli_filter_builds(
     Implements the ``koji filter-builds`` command
     """
 
+    # when strict, every build is loaded before any output is written,
+    # so that a missing build fails the command without partial output
+    if not (tags or sorting or strict):
+        if not build_sifter:
+            # nothing needs the complete set of builds at once, so we
+            # can stream them from the input through to the output
+            streamed = _stream_filter_builds(session, nvr_list,
+                                             build_filter)
+            output_sifted({"default": streamed}, "nvr", outputs)
+            return
+
+        elif not build_sifter.needs_full_pass():
+            # the sifter can work on a chunk of builds at a time,
+            # writing the results of each as it goes
+            streamed = _stream_filter_builds(session, nvr_list,
+                                             build_filter)
+            sifted = build_sifter.run_stream(session, streamed)
+            output_sifted_stream(sifted, "nvr", outputs)
+            return
+
     nvr_list = unique(map(int_or_str, nvr_list))
 
     builds: Iterable[BuildInfo]
@@ -976,6 +1025,11 @@ class FilterBuilds(AnonSmokyDingo, BuildFiltering):
                help="Error if any of the NVRs do not resolve into a"
                " real build. Otherwise, bad NVRs are ignored.")
 
+        addarg("--event", action="store", type=int, default=None,
+               metavar="EVENT#",
+               help="Query tags as they were at the given event,"
+               " rather than as they are now")
+
         group = parser.add_argument_group("Working from tagged builds")
         addarg = group.add_argument
 
@@ -1005,10 +1059,24 @@ class FilterBuilds(AnonSmokyDingo, BuildFiltering):
         parser = self.filtering_arguments(parser)
         parser = self.sifter_arguments(parser)
 
+        addarg = parser.add_argument
+        addarg("--explain", action="store_true", default=False,
+               help="Show the order in which the sifty filter"
+               " predicates would be evaluated, and exit")
+
         return parser
 
 
     def handle(self, options):
+        if options.explain:
+            bs = self.get_sifter(options)
+            if bs:
+                print(bs.explain())
+            return
+
+        if options.event is not None:
+            pin_event(self.session, options.event)
+
         nvrs = list(options.nvr)
         tags = resplit(options.tags)
 
@@ -1017,22 +1085,25 @@ class FilterBuilds(AnonSmokyDingo, BuildFiltering):
                 options.nvr_file = "-"
 
         if options.nvr_file:
-            nvrs.extend(read_clean_lines(options.nvr_file))
+            nvrs = chain(nvrs, iread_clean_lines(options.nvr_file))
 
         bf = self.get_filter(self.session, options)
         bs = self.get_sifter(options)
         sorting = options.sorting
         outputs = self.get_outputs(options)
 
-        return cli_filter_builds(self.session, nvrs,
-                                 tags=tags,
-                                 inherit=options.inherit,
-                                 latest=options.latest,
-                                 build_filter=bf,
-                                 build_sifter=bs,
-                                 sorting=sorting,
-                                 outputs=outputs,
-                                 strict=options.strict)
+        try:
+            return cli_filter_builds(self.session, nvrs,
+                                     tags=tags,
+                                     inherit=options.inherit,
+                                     latest=options.latest,
+                                     build_filter=bf,
+                                     build_sifter=bs,
+                                     sorting=sorting,
+                                     outputs=outputs,
+                                     strict=options.strict)
+        finally:
+            self.report_profile(bs)
 
 
 def cli_list_btypes(
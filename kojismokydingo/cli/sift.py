@@ -24,17 +24,24 @@ import os
 
 from argparse import ArgumentParser, Namespace
 from collections import defaultdict
+from contextlib import ExitStack
 from functools import partial
 from operator import attrgetter, itemgetter
 from os.path import basename
 from sys import version_info
 from typing import (
-    TYPE_CHECKING, Callable, Dict, Iterable, List, Optional, Type, )
+    TYPE_CHECKING, Any, Callable, Dict, Iterable, List, Mapping,
+    Optional, Tuple, Type, )
 
 from . import open_output, printerr, resplit
-from ..common import escapable_replace
+from .. import get_object_cache
+from ..cache import DEFAULT_MAX_BYTES, ObjectCache
+from ..common import escapable_replace, load_plugin_config
+from ..metrics import enable_metrics
 from ..sift import DEFAULT_SIEVES, Sieve, Sifter, SifterError
+from ..sift.cache import SieveCache, TagDataCache
 from ..sift.builds import build_info_sieves
+from ..sift.profile import enable_profile, get_profile
 from ..sift.tags import tag_info_sieves
 from ..types import KeySpec
 
@@ -55,6 +62,7 @@ __all__ = (
     "TagSifting",
 
     "output_sifted",
+    "output_sifted_stream",
 )
 
 
@@ -155,6 +163,7 @@ class Sifting():
          * ``--output/-o FLAG:FILENAME[,...]``
          * ``--filter FILTER``
          * ``--filter-file FILTER_FILE``
+         * ``--profile-sieve``
         """
 
         grp = parser.add_argument_group("Filtering with Sifty sieves")
@@ -181,6 +190,11 @@ class Sifting():
                help="Disable loading of additional sieves from"
                " entry_points")
 
+        addarg("--profile-sieve", action="store_true", default=False,
+               help="Print the time spent, items checked, cache use,"
+               " and hub calls of each sifty filter predicate to"
+               " stderr once complete")
+
         grp = grp.add_mutually_exclusive_group()
         addarg = grp.add_argument
 
@@ -288,6 +302,24 @@ class Sifting():
         Produces a Sifter instances constructed from values in options.
         These options should have been generated from a parser that
         has had the `Sifting.sifter_arguments` invoked on it.
+
+        If the ``sieve-cache`` plugin configuration section is
+        enabled, the compiled sieves are loaded from and stored to a
+        `kojismokydingo.sift.cache.SieveCache`
+
+        If the ``tag-cache`` plugin configuration section is enabled,
+        the data loaded about tags by the sieves is kept in a
+        `kojismokydingo.sift.cache.TagDataCache`, backed by the
+        session's object cache unless a path is given
+
+        The ``sieve_concurrency`` plugin configuration setting for the
+        command is used as the sifter's concurrency, permitting the
+        prep stages of independent expressions to run at once
+
+        If the ``--profile-sieve`` option was given, the sifter will
+        be profiled via `kojismokydingo.sift.profile.enable_profile`,
+        and hub calls counted via
+        `kojismokydingo.metrics.enable_metrics`. See `report_profile`
         """
 
         if options.filter:
@@ -300,7 +332,58 @@ class Sifting():
 
         params = self.get_params(options)
         sieves = self.get_sieves(options.entry_points)
-        return Sifter(sieves, filter_src, params=params)
+
+        cache = None
+        goptions = getattr(self, "goptions", None)
+        profile = goptions.profile if goptions else None
+
+        conf = load_plugin_config("sieve-cache", profile)
+        enabled = conf.get("enabled", "0")
+        if enabled.lower() in ("1", "yes", "true"):
+            cache = SieveCache(conf.get("path") or None)
+
+        tag_cache = None
+        conf = load_plugin_config("tag-cache", profile)
+        enabled = conf.get("enabled", "0")
+        if enabled.lower() in ("1", "yes", "true"):
+            session = getattr(self, "session", None)
+            objects = get_object_cache(session) if session else None
+            if objects is None or conf.get("path"):
+                objects = ObjectCache(conf.get("path") or None,
+                                      int(conf.get("max_bytes",
+                                                   DEFAULT_MAX_BYTES)))
+            tag_cache = TagDataCache(objects)
+
+        concurrency = 1
+        getconf = getattr(self, "get_plugin_config", None)
+        if getconf:
+            concurrency = int(getconf("sieve_concurrency") or 1)
+
+        sifter = Sifter(sieves, filter_src, params=params, cache=cache,
+                        concurrency=concurrency, tag_cache=tag_cache)
+
+        if getattr(options, "profile_sieve", False):
+            session = getattr(self, "session", None)
+            if session is not None:
+                enable_metrics(session)
+            enable_profile(sifter)
+
+        return sifter
+
+
+    def report_profile(
+            self,
+            sifter: Optional[Sifter]) -> None:
+        """
+        Prints the profile of the sifter to stderr, if it was
+        profiled. See `get_sifter`
+
+        :since: 2.3
+        """
+
+        profile = get_profile(sifter) if sifter else None
+        if profile is not None:
+            profile.report()
 
 
 def _report_problem(msg, entry_point, exc):
@@ -335,8 +418,21 @@ class TagSifting(Sifting):
         return sieves
 
 
+def _output_dest(flag: str, dest: str) -> Tuple[str, bool]:
+    # the filename for the given flag, and whether to append to it
+
+    if "%" in dest:
+        safe_flag = flag.translate(str.maketrans("/\\ ", "___"))
+        dest = escapable_replace(dest, "%", safe_flag)
+
+    if dest.startswith("@"):
+        return dest[1:], True
+    else:
+        return dest, False
+
+
 def output_sifted(
-        results: Dict[str, List[dict]],
+        results: Mapping[str, Iterable[Mapping[str, Any]]],
         key: KeySpec = "id",
         outputs: Optional[Dict[str, str]] = None,
         sort: Optional[KeySpec] = None):
@@ -381,15 +477,7 @@ def output_sifted(
             dest = outputs[flag]
 
     for flag, dest in outputs.items():
-        if "%" in dest:
-            safe_flag = flag.translate(str.maketrans("/\\ ", "___"))
-            dest = escapable_replace(dest, "%", safe_flag)
-
-        if dest.startswith("@"):
-            dest = dest[1:]
-            append = True
-        else:
-            append = False
+        dest, append = _output_dest(flag, dest)
 
         flagged = results.get(flag, ())
         if sort:
@@ -400,5 +488,71 @@ def output_sifted(
                 print(res, file=dout)
 
 
+def output_sifted_stream(
+        results: Iterable[Mapping[str, Iterable[Mapping[str, Any]]]],
+        key: KeySpec = "id",
+        outputs: Optional[Dict[str, str]] = None):
+    """
+    Similar to `output_sifted`, but records a series of results as
+    they are produced, such as by `kojismokydingo.sift.Sifter.run_stream`.
+    Every output is opened before the first results are read, and
+    remains open until the last have been written. Flags which share
+    an output filename share the opened file.
+
+    :param results: series of results of invoking a Sifter on chunks
+      of data
+
+    :param key: transformation to apply to the individual data
+      elements prior to recording. Default, lookup the ``"id"`` index
+      from the element.
+
+    :param outputs: mapping of flags to destination filenames. If
+      unspecified, the default flag will be written to stdout and the
+      rest will be discarded.
+
+    :since: 2.3
+    """
+
+    if not callable(key):
+        key = itemgetter(key)
+
+    if outputs is None:
+        outputs = {"default": "-"}
+
+    # as in output_sifted, a defaultdict of outputs will produce a
+    # destination for any flag we encounter
+    discover = isinstance(outputs, defaultdict)
+
+    with ExitStack() as stack:
+        opened: Dict[str, Any] = {}
+        streams: Dict[str, Any] = {}
+
+        def stream_for(flag):
+            if flag in streams:
+                return streams[flag]
+
+            dout = None
+            if discover or flag in outputs:
+                dest, append = _output_dest(flag, outputs[flag])
+                dout = opened.get(dest)
+                if dout is None:
+                    dout = stack.enter_context(open_output(dest, append))
+                    opened[dest] = dout
+
+            streams[flag] = dout
+            return dout
+
+        for flag in list(outputs):
+            stream_for(flag)
+
+        for found in results:
+            for flag, flagged in found.items():
+                dout = stream_for(flag)
+                if dout is not None:
+                    for res in map(key, flagged):
+                        print(res, file=dout)
+                    dout.flush()
+
+
 #
 # The end.
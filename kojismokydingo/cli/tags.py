@@ -36,12 +36,14 @@ from .clients import _get_tag_latest_dir_url
 from .sift import TagSifting, output_sifted
 from .. import (
     BadDingo, FeatureUnavailable, NoSuchTag,
-    as_taginfo, bulk_load_tags, iter_bulk_load, version_require, )
+    as_taginfo, bulk_load_tags, invalidate_identity_map, iter_bulk_load,
+    version_require, )
 from ..builds import correlate_build_repo_tags
 from ..common import find_cache_dir, unique
 from ..dnf import (
     DNFUQ_FILTER_TERMS, DNFuqFilterTerms,
     correlate_query_builds, dnf_available, dnfuq, dnfuq_formatter, )
+from ..pinning import get_pinned_event, pin_event
 from ..tags import (
     collect_tag_extras, find_inheritance_parent, gather_affected_targets,
     renum_inheritance, resolve_tag, tag_dedup, )
@@ -546,6 +548,8 @@ def cli_set_rpm_macro(
 
         session.editTag2(taginfo["id"], extra={key: value})
 
+    invalidate_identity_map(session, "tag", [taginfo])
+
 
 class SetRPMMacro(TagSmokyDingo):
 
@@ -692,6 +696,8 @@ def cli_set_env_var(
     else:
         session.editTag2(taginfo["id"], extra={key: value})
 
+    invalidate_identity_map(session, "tag", [taginfo])
+
 
 class SetEnvVar(TagSmokyDingo):
 
@@ -1024,6 +1030,11 @@ class FilterTags(AnonSmokyDingo, TagSifting):
                help="Erorr if any of the tag names to not resolve into a"
                " real tag. Otherwise, missing tags are ignored.")
 
+        addarg("--event", action="store", type=int, default=None,
+               metavar="EVENT#",
+               help="Query tags as they were at the given event,"
+               " rather than as they are now")
+
         grp = parser.add_argument_group("Searching for tags")
         grp = grp.add_mutually_exclusive_group()
         addarg = grp.add_argument
@@ -1048,10 +1059,26 @@ class FilterTags(AnonSmokyDingo, TagSifting):
                dest="sorting", const=SORT_BY_ID, default=None,
                help="Sort output by Tag ID in ascending order")
 
-        return self.sifter_arguments(parser)
+        parser = self.sifter_arguments(parser)
+
+        addarg = parser.add_argument
+        addarg("--explain", action="store_true", default=False,
+               help="Show the order in which the sifty filter"
+               " predicates would be evaluated, and exit")
+
+        return parser
 
 
     def handle(self, options):
+        if options.explain:
+            ts = self.get_sifter(options)
+            if ts:
+                print(ts.explain())
+            return
+
+        if options.event is not None:
+            pin_event(self.session, options.event)
+
         tags = list(options.tags)
 
         if not (tags or sys.stdin.isatty()):
@@ -1064,13 +1091,16 @@ class FilterTags(AnonSmokyDingo, TagSifting):
         ts = self.get_sifter(options)
         outputs = self.get_outputs(options)
 
-        return cli_filter_tags(self.session, tags,
-                               search=options.search,
-                               regex=options.regex,
-                               tag_sifter=ts,
-                               sorting=options.sorting,
-                               outputs=outputs,
-                               strict=options.strict)
+        try:
+            return cli_filter_tags(self.session, tags,
+                                   search=options.search,
+                                   regex=options.regex,
+                                   tag_sifter=ts,
+                                   sorting=options.sorting,
+                                   outputs=outputs,
+                                   strict=options.strict)
+        finally:
+            self.report_profile(ts)
 
 
 REPO_CHECK_TABLES = (
@@ -1092,6 +1122,10 @@ def cli_check_repo(
     """
     Implements the ``koji check-repo`` command
 
+    If the session is pinned to an event via
+    `kojismokydingo.pinning.pin_event`, then the freshness of the repo
+    is checked as of that event rather than now.
+
     :since: 2.0
     """
 
@@ -1115,7 +1149,48 @@ def cli_check_repo(
     tag_ids = [tagid]
     tag_ids.extend(t['parent_id'] for t in inher)
 
-    changed = session.tagChangedSinceEvent(create_event, tag_ids)
+    pinned = get_pinned_event(session)
+
+    def history() -> List[HistoryEntry]:
+        # create a timeline from the history of all the tags,
+        # searching for events that happened after the creation event
+        timeline: List[HistoryEntry] = []
+
+        def query(tag_id):
+            return session.queryHistory(tables=REPO_CHECK_TABLES,
+                                        tag=tag_id,
+                                        afterEvent=create_event)
+
+        # merge and linearize the events of tag and its parents
+        updates: Dict[str, List[Dict[str, Any]]]
+        for tid, updates in iter_bulk_load(session, query, tag_ids):
+            # filter out cases where our tags become parents, as
+            # those are immaterial to the inheritance we're
+            # checking. We only want to see events wherein the
+            # parents of our tags changes.
+            inhers = updates["tag_inheritance"]
+            if inhers:
+                inhers = [i for i in inhers if i["tag_id"] == tid]
+                updates["tag_inheritance"] = inhers
+
+            timeline.extend(convert_history(updates))
+
+        # nothing after a pinned event is relevant
+        if pinned is not None:
+            timeline = [h for h in timeline if h[0] <= pinned]
+
+        timeline.sort(key=itemgetter(0, 1, 2))
+        return timeline
+
+    if pinned is None:
+        changed = session.tagChangedSinceEvent(create_event, tag_ids)
+        timeline = None
+    else:
+        # tagChangedSinceEvent has no upper bound, so we have to look
+        # through the history for changes up to the pinned event
+        timeline = history()
+        changed = any(h[0] > create_event for h in timeline)
+
     if changed:
         if not quiet:
             print(f"Tag {tagname} has a stale repo")
@@ -1130,30 +1205,10 @@ def cli_check_repo(
 
     # if we got this far then there's been tag changes since the
     # repo's creation event, and we've been asked to display those
-    # changes. So let's create a timeline from the history of all
-    # the tags, searching for events that happened after the
-    # creation event
-    timeline: List[HistoryEntry] = []
-
-    def query(tag_id):
-        return session.queryHistory(tables=REPO_CHECK_TABLES,
-                                    tag=tag_id,
-                                    afterEvent=create_event)
-
-    # merge and linearize the events of tag and its parents
-    updates: Dict[str, List[Dict[str, Any]]]
-    for tid, updates in iter_bulk_load(session, query, tag_ids):
-        # filter out cases where our tags become parents, as those are
-        # immaterial to the inheritance we're checking. We only want
-        # to see events wherein the parents of our tags changes.
-        inhers = updates["tag_inheritance"]
-        if inhers:
-            inhers = [i for i in inhers if i["tag_id"] == tid]
-            updates["tag_inheritance"] = inhers
-
-        timeline.extend(convert_history(updates))
-
-    timeline.sort(key=itemgetter(0, 1, 2))
+    # changes.
+    if timeline is None:
+        timeline = history()
+
     print_history(timeline, utc=utc, show_events=show_events)
 
     return 1
@@ -1173,6 +1228,11 @@ class CheckRepo(AnonSmokyDingo):
         addarg("--target", action="store_true", default=False,
                help="Specify by target rather than a tag")
 
+        addarg("--event", action="store", type=int, default=None,
+               metavar="EVENT#",
+               help="Check the repo as it was at the given event,"
+               " rather than as it is now")
+
         group = parser.add_mutually_exclusive_group()
         addarg = group.add_argument
 
@@ -1196,6 +1256,9 @@ class CheckRepo(AnonSmokyDingo):
 
 
     def handle(self, options):
+        if options.event is not None:
+            pin_event(self.session, options.event)
+
         return cli_check_repo(self.session, options.tag,
                               target=options.target,
                               verbose=options.verbose,
@@ -51,6 +51,8 @@ except ImportError:  # pragma: no cover
 
 
 __all__ = (
+    "AdaptiveChunker",
+
     "chunkseq",
     "escapable_replace",
     "fnmatches",
@@ -61,6 +63,7 @@ __all__ = (
     "globfilter",
     "ichunkseq",
     "itemsgetter",
+    "iunique",
     "load_full_config",
     "load_plugin_config",
     "merge_extend",
@@ -148,6 +151,110 @@ def ichunkseq(
             yield chunk(primer)
 
 
+class AdaptiveChunker():
+    """
+    Tracks a chunk size which is adjusted after each chunk based on
+    how long that chunk took to process, and optionally how many bytes
+    it produced. The size is steered toward the count of items that
+    could be expected to complete in the target amount of time, and
+    whose results would fit in max_bytes.
+
+    The size will at most double or halve with each recorded chunk,
+    and is always kept between min_size and max_size inclusive.
+
+    :since: 2.3
+    """
+
+    def __init__(
+            self,
+            size: int = 100,
+            target: float = 2.0,
+            min_size: int = 1,
+            max_size: int = 1000,
+            max_bytes: int = 0):
+        """
+        :param size: initial chunk size
+
+        :param target: desired time in seconds for processing a single
+          chunk
+
+        :param min_size: smallest permitted chunk size
+
+        :param max_size: largest permitted chunk size
+
+        :param max_bytes: desired upper bound on the bytes produced by
+          a single chunk. Default, 0 for no bound
+        """
+
+        self.target = target
+        self.min_size = max(1, min_size)
+        self.max_size = max(self.min_size, max_size)
+        self.max_bytes = max_bytes
+        self.size = self._clamp(size)
+
+
+    def _clamp(self, size: int) -> int:
+        return max(self.min_size, min(self.max_size, int(size)))
+
+
+    def record(
+            self,
+            count: int,
+            elapsed: float,
+            nbytes: int = 0) -> int:
+        """
+        Record the cost of a completed chunk, and adjust the size for
+        the next chunk accordingly.
+
+        :param count: the number of items in the completed chunk
+
+        :param elapsed: seconds taken to process the chunk
+
+        :param nbytes: bytes produced by the chunk. Default, 0 for
+          unknown
+
+        :returns: the adjusted chunk size
+        """
+
+        if count < 1:
+            return self.size
+
+        if elapsed > 0:
+            ideal = count * self.target / elapsed
+        else:
+            ideal = self.max_size
+
+        if self.max_bytes and nbytes > 0:
+            ideal = min(ideal, count * self.max_bytes / nbytes)
+
+        # don't let a single outlier swing us too far
+        size = self.size
+        ideal = max(size // 2, min(size * 2, int(ideal)))
+
+        self.size = self._clamp(ideal)
+        return self.size
+
+
+    def chunks(
+            self,
+            seq: Iterable) -> Iterator[List]:
+        """
+        Chop up a sequence into lists using the current size at the
+        time each chunk is produced. Callers should `record` the cost
+        of each chunk before requesting the next.
+
+        :param seq: a sequence to chunk up
+        """
+
+        it = iter(seq)
+        while True:
+            chunk = list(islice(it, self.size))
+            if chunk:
+                yield chunk
+            else:
+                break
+
+
 def escapable_replace(
         orig: str,
         character: str,
@@ -379,6 +486,38 @@ def unique(
         return list(dict.fromkeys(sequence))
 
 
+def iunique(
+        sequence: Iterable[UT],
+        key: Optional[KeySpec] = None) -> Iterator[UT]:
+    """
+    Similar to unique, but lazy. Items are yielded as they are read
+    from the sequence, skipping any whose identifier has already been
+    seen. Note that unlike `unique`, it is the first occurrence of
+    each identifier which is kept rather than the last.
+
+    Only the identifiers are retained, so memory use grows with the
+    count of distinct identifiers rather than the size of the items.
+
+    :param sequence: series of hashable objects
+
+    :param key: unary callable that produces a hashable identifying
+      value. Default, use each object in sequence as its own
+      identifier.
+
+    :since: 2.3
+    """
+
+    if key and not callable(key):
+        key = itemgetter(key)
+
+    seen = set()
+    for v in sequence:
+        ident = key(v) if key else v
+        if ident not in seen:
+            seen.add(ident)
+            yield v
+
+
 DATETIME_FORMATS = (
     (re.compile(r"\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}\.\d{6} .{3}$"),
      lambda d: datetime.strptime(d, "%Y-%m-%d %H:%M:%S.%f %Z")),
@@ -0,0 +1,309 @@
+# This library is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this library; if not, see <http://www.gnu.org/licenses/>.
+
+
+"""
+Koji Smoky Dingo - Hub Call Metrics
+
+Per-method accounting of the calls a session makes to the koji hub,
+including the calls bundled inside of multicalls.
+
+:author: Christopher O'Brien <obriencj@gmail.com>
+:license: GPL v3
+"""
+
+
+# Note: nothing in here should import from the top-level package, as
+# the session classes there rely on this module.
+
+
+import sys
+
+from bisect import bisect_left
+from koji import ClientSession
+from threading import Lock
+from time import perf_counter
+from typing import Dict, List, Optional, Sequence, TextIO
+
+
+__all__ = (
+    "BATCH_BUCKETS",
+    "LATENCY_BUCKETS",
+
+    "HubMetrics",
+    "MethodMetrics",
+
+    "enable_metrics",
+    "get_metrics",
+)
+
+
+LATENCY_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+"""
+Upper bounds in seconds of the latency histogram buckets. A final
+bucket catches anything slower.
+
+:since: 2.3
+"""
+
+
+BATCH_BUCKETS = (1, 10, 25, 50, 100, 250, 500, 1000)
+"""
+Upper bounds of the multicall batch size histogram buckets. A final
+bucket catches anything larger.
+
+:since: 2.3
+"""
+
+
+class MethodMetrics():
+    """
+    Accumulated measurements for a single hub method
+
+    :since: 2.3
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+
+        self.calls = 0
+        """ count of direct invocations """
+
+        self.multicalled = 0
+        """ count of invocations made from inside a multicall """
+
+        self.elapsed = 0.0
+        """ total seconds spent in direct invocations """
+
+        self.nbytes = 0
+        """ total size of the responses to direct invocations """
+
+        self.latency = [0] * (len(LATENCY_BUCKETS) + 1)
+        """ histogram of direct invocation latency """
+
+
+    def record(self, elapsed: float, nbytes: int) -> None:
+        self.calls += 1
+        self.elapsed += elapsed
+        self.nbytes += nbytes
+        self.latency[bisect_left(LATENCY_BUCKETS, elapsed)] += 1
+
+
+class HubMetrics():
+    """
+    Collects per-method call counts, latency histograms, response
+    sizes, and multicall batch sizes for one or more sessions.
+
+    Instances are safe to share between sessions used from different
+    threads. Use `enable_metrics` to attach an instance to a session.
+
+    :since: 2.3
+    """
+
+    def __init__(self):
+        self.methods: Dict[str, MethodMetrics] = {}
+        self.batches = [0] * (len(BATCH_BUCKETS) + 1)
+        self._lock = Lock()
+
+
+    def _method(self, name: str) -> MethodMetrics:
+        found = self.methods.get(name)
+        if found is None:
+            found = self.methods[name] = MethodMetrics(name)
+        return found
+
+
+    def record_call(
+            self,
+            name: str,
+            elapsed: float,
+            nbytes: int = 0,
+            calls: Sequence[dict] = ()) -> None:
+        """
+        Record a single call to the hub. If the call was a multicall,
+        then the calls bundled within it are also counted.
+
+        :param name: the hub method name
+
+        :param elapsed: seconds taken by the call
+
+        :param nbytes: size of the response body
+
+        :param calls: the calls bundled in a multicall
+        """
+
+        with self._lock:
+            self._method(name).record(elapsed, nbytes)
+
+            if name == "multiCall":
+                self.batches[bisect_left(BATCH_BUCKETS, len(calls))] += 1
+                for call in calls:
+                    self._method(call["methodName"]).multicalled += 1
+
+
+    def total_calls(self) -> int:
+        """
+        The count of requests made to the hub, with each multicall
+        counting once
+        """
+
+        return sum(m.calls for m in self.methods.values())
+
+
+    def report(
+            self,
+            out: Optional[TextIO] = None) -> None:
+        """
+        Print a summary of the collected metrics, with the methods
+        ordered by the total time spent in them.
+
+        :param out: stream to write to. Default, `sys.stderr`
+        """
+
+        if out is None:
+            out = sys.stderr
+
+        with self._lock:
+            methods = sorted(self.methods.values(),
+                             key=lambda m: (-m.elapsed, m.name))
+            batches = list(self.batches)
+
+        total = sum(m.calls for m in methods)
+        elapsed = sum(m.elapsed for m in methods)
+        nbytes = sum(m.nbytes for m in methods)
+
+        print(f"Hub calls: {total} requests, {elapsed:.3f}s,"
+              f" {nbytes} bytes received", file=out)
+
+        if not methods:
+            return
+
+        fmt = "  {:<32} {:>7} {:>7} {:>9} {:>9} {:>11}"
+        print(fmt.format("Method", "Calls", "In MC", "Total s",
+                         "Mean s", "Bytes"), file=out)
+
+        for m in methods:
+            mean = (m.elapsed / m.calls) if m.calls else 0.0
+            print(fmt.format(m.name, m.calls, m.multicalled,
+                             f"{m.elapsed:.3f}", f"{mean:.3f}",
+                             m.nbytes), file=out)
+
+        print("Latency:", file=out)
+        for m in methods:
+            if m.calls:
+                hist = _histogram(LATENCY_BUCKETS, m.latency, "s")
+                print(f"  {m.name}: {hist}", file=out)
+
+        if any(batches):
+            hist = _histogram(BATCH_BUCKETS, batches, "")
+            print(f"Multicall batch sizes: {hist}", file=out)
+
+
+def _histogram(bounds, counts, unit) -> str:
+    # renders the non-empty buckets of a histogram as a compact
+    # series of "<=bound:count" entries
+
+    labels: List[str] = [f"<={b}{unit}" for b in bounds]
+    labels.append(f">{bounds[-1]}{unit}")
+    return " ".join(f"{label}:{count}"
+                    for label, count in zip(labels, counts) if count)
+
+
+def get_metrics(
+        session: ClientSession) -> Optional[HubMetrics]:
+    """
+    The metrics collector attached to the session by
+    `enable_metrics`, or None if there isn't one
+
+    :param session: a koji client session
+
+    :since: 2.3
+    """
+
+    return vars(session).get("__ksd_metrics")
+
+
+def enable_metrics(
+        session: ClientSession,
+        metrics: Optional[HubMetrics] = None) -> HubMetrics:
+    """
+    Begin recording metrics for every call the session makes to the
+    hub. If the session already has a metrics collector, it is
+    returned unchanged.
+
+    This works with any `koji.ClientSession` instance, by wrapping
+    the methods responsible for sending calls and reading responses.
+
+    :param session: a koji client session
+
+    :param metrics: collector to record into, which may be shared
+      between sessions. Default, allocate a new collector
+
+    :since: 2.3
+    """
+
+    session_vars = vars(session)
+
+    found = session_vars.get("__ksd_metrics")
+    if found is not None:
+        return found
+
+    if metrics is None:
+        metrics = HubMetrics()
+
+    session_vars["__ksd_metrics"] = metrics
+
+    # these are the bound methods from the class, which we'll shadow
+    # with wrappers set on the instance itself
+    call_method = session._callMethod
+    read_response = session._read_xmlrpc_response
+
+    received = [0]
+
+    def _callMethod(name, args, kwargs=None, retry=True):
+        if session.multicall:
+            # only being recorded for later, not sent
+            return call_method(name, args, kwargs, retry)
+
+        received[0] = 0
+        start = perf_counter()
+        try:
+            return call_method(name, args, kwargs, retry)
+        finally:
+            calls = args[0] if name == "multiCall" and args else ()
+            metrics.record_call(name, perf_counter() - start,
+                                received[0], calls)
+
+    def _read_xmlrpc_response(response):
+        iter_content = response.iter_content
+
+        def counting(*args, **kwargs):
+            for chunk in iter_content(*args, **kwargs):
+                received[0] += len(chunk)
+                yield chunk
+
+        response.iter_content = counting
+
+        # honor any replacement reader, such as from
+        # kojismokydingo.unmarshal.enable_fast_unmarshal
+        reader = session_vars.get("__ksd_read_response", read_response)
+        return reader(response)
+
+    session_vars["_callMethod"] = _callMethod
+    session_vars["_read_xmlrpc_response"] = _read_xmlrpc_response
+
+    return metrics
+
+
+#
+# The end.
@@ -0,0 +1,162 @@
+# This library is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this library; if not, see <http://www.gnu.org/licenses/>.
+
+
+"""
+Koji Smoky Dingo - Event Pinning
+
+Pins the tag-related queries of a session to a single koji event, so
+that every answer describes the hub as it was at that moment. As the
+past cannot change, such answers can be cached indefinitely.
+
+:author: Christopher O'Brien <obriencj@gmail.com>
+:license: GPL v3
+"""
+
+
+# Note: nothing in here should import from the top-level package, as
+# the session functions there rely on this module.
+
+
+from koji import ClientSession
+from typing import Any, Dict, Optional
+
+
+__all__ = (
+    "PINNED_CALLS",
+
+    "get_pinned_event",
+    "pin_event",
+)
+
+
+PINNED_CALLS = frozenset((
+    "getBuildConfig",
+    "getFullInheritance",
+    "getInheritanceData",
+    "getLatestBuilds",
+    "getLatestRPMS",
+    "getRepo",
+    "getTag",
+    "getTagExternalRepos",
+    "getTagGroups",
+    "listPackages",
+    "listTagged",
+    "listTaggedArchives",
+    "listTaggedRPMS",
+    "readTaggedBuilds",
+    "readTaggedRPMS",
+))
+"""
+Names of the hub calls which accept an ``event`` keyword argument, and
+which a pinned session will supply it to.
+
+:since: 2.3
+"""
+
+
+def _pin_call(call: Dict[str, Any], event: int) -> Dict[str, Any]:
+    # a single call within a multicall, with its params already
+    # encoded via koji.encode_args
+
+    if call.get("methodName") not in PINNED_CALLS:
+        return call
+
+    params = list(call.get("params", ()))
+    if params and isinstance(params[-1], dict) and \
+       params[-1].get("__starstar"):
+        opts = dict(params[-1])
+        opts.setdefault("event", event)
+        params[-1] = opts
+    else:
+        params.append({"event": event, "__starstar": True})
+
+    return dict(call, params=tuple(params))
+
+
+def get_pinned_event(
+        session: ClientSession) -> Optional[int]:
+    """
+    The event ID the session was pinned to by `pin_event`, or None if
+    the session is not pinned
+
+    :param session: a koji client session
+
+    :since: 2.3
+    """
+
+    return vars(session).get("__ksd_pinned_event")
+
+
+def pin_event(
+        session: ClientSession,
+        event: Optional[int] = None) -> int:
+    """
+    Pin the session's queries to a single koji event. Every call the
+    session makes to any of the methods named in `PINNED_CALLS`,
+    whether directly or within a multicall (including those sent via
+    `kojismokydingo.aio`), will be given the ``event`` keyword
+    argument unless the caller already supplied one. If the session
+    is already pinned, its existing event ID is returned unchanged.
+
+    This works with any `koji.ClientSession` instance, by wrapping
+    the method responsible for sending calls. A pinned session is
+    meant for reading; calls which modify the hub are sent as-is, but
+    their effects will not be visible to the pinned queries.
+
+    :param session: a koji client session
+
+    :param event: the event ID to pin to. Default, the most recent
+      event on the hub
+
+    :since: 2.3
+    """
+
+    session_vars = vars(session)
+
+    found = session_vars.get("__ksd_pinned_event")
+    if found is not None:
+        return found
+
+    if event is None:
+        event = session.getLastEvent()["id"]
+
+    session_vars["__ksd_pinned_event"] = event
+
+    # the bound method from the class (or from another wrapper such
+    # as the metrics), which we'll shadow on the instance itself
+    call_method = session._callMethod
+
+    def _callMethod(name, args, kwargs=None, retry=True):
+        if session.multicall:
+            # only being recorded for later, and will be pinned when
+            # the multicall is sent
+            return call_method(name, args, kwargs, retry)
+
+        if name in PINNED_CALLS:
+            kwargs = dict(kwargs or {})
+            kwargs.setdefault("event", event)
+
+        elif name == "multiCall" and args:
+            calls = [_pin_call(call, event) for call in args[0]]
+            args = (calls, *args[1:])
+
+        return call_method(name, args, kwargs, retry)
+
+    session_vars["_callMethod"] = _callMethod
+
+    return event
+
+
+#
+# The end.
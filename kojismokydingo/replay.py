@@ -0,0 +1,323 @@
+# This library is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this library; if not, see <http://www.gnu.org/licenses/>.
+
+
+"""
+Koji Smoky Dingo - Hub Traffic Recording
+
+Captures the calls a session makes to the koji hub along with their
+responses, so that they may be saved to a file and later served back
+by a `kojismokydingo.ReplayClientSession` without any hub at all.
+
+:author: Christopher O'Brien <obriencj@gmail.com>
+:license: GPL v3
+"""
+
+
+# Note: nothing in here should import from the top-level package, as
+# the session classes there rely on this module.
+
+
+import gzip
+
+from collections import deque
+from koji import ClientSession, GenericError, encode_args
+from koji.xmlrpcplus import dumps
+from threading import Lock
+from typing import Any, Deque, Dict, Hashable, List, Optional, Tuple
+
+# only the value types are used from here, to convert them for the
+# recording. Responses are decoded by our own unmarshaller.
+from xmlrpc.client import Binary, DateTime  # nosec B411
+
+from .unmarshal import loads_response
+
+
+__all__ = (
+    "HubPlayback",
+    "HubRecording",
+
+    "enable_recording",
+    "get_recording",
+)
+
+
+# session management calls, which either carry credentials or which
+# would be meaningless to replay
+_UNRECORDED = frozenset((
+    "login",
+    "logout",
+    "logoutChild",
+    "sslLogin",
+    "subsession",
+))
+
+
+def _freeze(value: Any) -> Hashable:
+    # produces a hashable equivalent of a call's params. Lists and
+    # tuples are equivalent, as they are indistinguishable once they
+    # have been through XML-RPC
+
+    if isinstance(value, (list, tuple)):
+        return tuple(map(_freeze, value))
+    elif isinstance(value, dict):
+        return ("{}", tuple(sorted((str(k), _freeze(v))
+                                   for k, v in value.items())))
+    elif isinstance(value, DateTime):
+        return ("DateTime", value.value)
+    elif isinstance(value, Binary):
+        return ("Binary", value.data)
+    else:
+        return value
+
+
+class HubRecording():
+    """
+    An ordered log of hub calls and their outcomes. Calls which were
+    bundled into a multicall are logged individually, so that they
+    may be replayed regardless of how they are later batched.
+
+    Each entry is a dict with the keys ``method`` and ``params``, and
+    either a ``result`` or a ``fault`` key. The params are as encoded
+    by `koji.encode_args`, and a fault is a dict with ``faultCode``
+    and ``faultString`` keys.
+
+    :since: 2.3
+    """
+
+    def __init__(self, entries: Optional[List[dict]] = None):
+        self.entries: List[dict] = entries or []
+        self._lock = Lock()
+
+
+    def record_result(
+            self,
+            method: str,
+            params: Tuple,
+            result: Any) -> None:
+        """
+        Log a call which completed successfully
+
+        :param method: the hub method name
+
+        :param params: the encoded call arguments
+
+        :param result: the value returned from the hub
+        """
+
+        entry = {"method": method, "params": params, "result": result}
+        with self._lock:
+            self.entries.append(entry)
+
+
+    def record_fault(
+            self,
+            method: str,
+            params: Tuple,
+            fault: dict) -> None:
+        """
+        Log a call which resulted in a fault
+
+        :param method: the hub method name
+
+        :param params: the encoded call arguments
+
+        :param fault: dict with ``faultCode`` and ``faultString`` keys
+        """
+
+        fault = {"faultCode": fault["faultCode"],
+                 "faultString": fault["faultString"]}
+
+        entry = {"method": method, "params": params, "fault": fault}
+        with self._lock:
+            self.entries.append(entry)
+
+
+    def record_multicall(
+            self,
+            calls: List[dict],
+            results: List[Any]) -> None:
+        """
+        Log each of the calls bundled into a multicall, along with its
+        own outcome
+
+        :param calls: the calls as recorded by a session in multicall
+          mode, each a dict with ``methodName`` and ``params`` keys
+
+        :param results: the multicall results from the hub, one per
+          call
+        """
+
+        for call, res in zip(calls, results):
+            if isinstance(res, dict):
+                self.record_fault(call["methodName"], call["params"], res)
+            else:
+                self.record_result(call["methodName"], call["params"],
+                                   res[0])
+
+
+    def save(self, filename: str) -> None:
+        """
+        Write the recording to a gzip compressed XML-RPC document
+
+        :param filename: path to write to
+        """
+
+        with self._lock:
+            entries = list(self.entries)
+
+        data = dumps((entries, ), methodresponse=True, allow_none=True)
+        with gzip.open(filename, "wb") as fout:
+            fout.write(data.encode())
+
+
+    @classmethod
+    def load(cls, filename: str) -> "HubRecording":
+        """
+        Read a recording which was written by `save`
+
+        :param filename: path to read from
+        """
+
+        with gzip.open(filename, "rb") as fin:
+            entries = loads_response(fin.read())[0]
+
+        return cls(entries)
+
+
+class HubPlayback():
+    """
+    Serves the outcomes from a `HubRecording` in response to calls.
+
+    Calls with identical methods and params receive the recorded
+    outcomes in the order they were recorded. Once only the last
+    outcome remains, it is repeated for any further identical calls.
+    This means that the same sequence of calls will always receive the
+    same responses.
+
+    :since: 2.3
+    """
+
+    def __init__(self, recording: HubRecording):
+        self.recording = recording
+        self._lock = Lock()
+
+        outcomes: Dict[Hashable, Deque[dict]] = {}
+        for entry in recording.entries:
+            key = (entry["method"], _freeze(entry["params"]))
+            found = outcomes.get(key)
+            if found is None:
+                found = outcomes[key] = deque()
+            found.append(entry)
+
+        self._outcomes = outcomes
+
+
+    def respond(
+            self,
+            method: str,
+            params: Tuple) -> Optional[dict]:
+        """
+        The next recorded entry for the given call, or None if no
+        such call was recorded
+
+        :param method: the hub method name
+
+        :param params: the encoded call arguments, as from
+          `koji.encode_args`
+        """
+
+        found = self._outcomes.get((method, _freeze(params)))
+        if not found:
+            return None
+
+        with self._lock:
+            return found.popleft() if len(found) > 1 else found[0]
+
+
+def get_recording(
+        session: ClientSession) -> Optional[HubRecording]:
+    """
+    The recording attached to the session by `enable_recording`, or
+    None if there isn't one
+
+    :param session: a koji client session
+
+    :since: 2.3
+    """
+
+    return vars(session).get("__ksd_recording")
+
+
+def enable_recording(
+        session: ClientSession,
+        recording: Optional[HubRecording] = None) -> HubRecording:
+    """
+    Begin logging every call the session makes to the hub, along with
+    its outcome. If the session is already recording, its existing
+    recording is returned unchanged.
+
+    Calls related to logging in and out are never recorded.
+
+    :param session: a koji client session
+
+    :param recording: recording to log into, which may be shared
+      between sessions. Default, allocate a new recording
+
+    :since: 2.3
+    """
+
+    session_vars = vars(session)
+
+    found = session_vars.get("__ksd_recording")
+    if found is not None:
+        return found
+
+    if recording is None:
+        recording = HubRecording()
+
+    session_vars["__ksd_recording"] = recording
+
+    # the bound method from the class (or from another wrapper such
+    # as the metrics), which we'll shadow on the instance itself
+    call_method = session._callMethod
+
+    def _callMethod(name, args, kwargs=None, retry=True):
+        if session.multicall or name in _UNRECORDED:
+            return call_method(name, args, kwargs, retry)
+
+        params = encode_args(*args, **(kwargs or {}))
+
+        try:
+            result = call_method(name, args, kwargs, retry)
+
+        except GenericError as gerr:
+            fault = {"faultCode": gerr.faultCode,
+                     "faultString": str(gerr)}
+            recording.record_fault(name, params, fault)
+            raise
+
+        if name == "multiCall":
+            recording.record_multicall(params[0], result)
+        else:
+            recording.record_result(name, params, result)
+
+        return result
+
+    session_vars["_callMethod"] = _callMethod
+
+    return recording
+
+
+#
+# The end.
@@ -22,21 +22,50 @@ Koji Smoky Dingo - RPM NEVRA Utils
 
 import re
 
+from bisect import bisect_left, bisect_right
+from functools import lru_cache
 from itertools import zip_longest
-from typing import Tuple, cast
+from sys import intern
+from typing import (
+    Any, Dict, Iterable, List, NamedTuple, Optional, Tuple, cast, )
 
 
 __all__ = (
+    "EVRIndex",
+    "NEVRA",
+
+    "bulk_nevra_split",
     "evr_compare",
+    "evr_key",
     "evr_split",
+    "nevr_key",
     "nevr_split",
     "nevra_split",
 )
 
 
+EVRKey = Tuple[Tuple[Any, ...], ...]
+
+
 _rpm_str_split_re = re.compile(r"([~^]?(?:\d+|[a-zA-Z]+))").split
 
 
+# the ordering of segment kinds in a sort key, lowest first. A tilde
+# segment sorts before the end of the string, and a caret segment
+# after it but before any other segment.
+_SEG_TILDE = 0
+_SEG_END = (1, )
+_SEG_CARET = 2
+_SEG_ALPHA = 3
+_SEG_NUMERIC = 4
+
+# greater than the key of any E, V, or R string
+_KEY_MAX = ((_SEG_NUMERIC + 1, ), )
+
+_EVR_OPS = ("==", "!=", ">", ">=", "<", "<=")
+
+
+@lru_cache(maxsize=2 ** 16)
 def _rpm_str_split(s: str) -> Tuple[str]:
     """
     Split an E, V, or R string for comparison by its segments
@@ -133,6 +162,33 @@ def _rpm_str_compare(leftstr: str, rightstr: str) -> int:
         return 0
 
 
+def _rpm_seg_key(seg: str) -> Tuple[Any, ...]:
+    if seg.isdigit():
+        return (_SEG_NUMERIC, int(seg))
+    else:
+        return (_SEG_ALPHA, seg)
+
+
+@lru_cache(maxsize=2 ** 16)
+def _rpm_str_key(s: str) -> Tuple[Any, ...]:
+    """
+    A sort key for an E, V, or R string, ordered the same as
+    `_rpm_str_compare`
+    """
+
+    key: List[Tuple[Any, ...]] = []
+    for seg in _rpm_str_split(s):
+        if seg[0] == "~":
+            key.append((_SEG_TILDE, _rpm_seg_key(seg[1:])))
+        elif seg[0] == "^":
+            key.append((_SEG_CARET, _rpm_seg_key(seg[1:])))
+        else:
+            key.append(_rpm_seg_key(seg))
+
+    key.append(_SEG_END)
+    return tuple(key)
+
+
 def evr_compare(
         left_evr: Tuple[str, str, str],
         right_evr: Tuple[str, str, str]) -> int:
@@ -170,6 +226,237 @@ def evr_compare(
         return 0
 
 
+def evr_key(
+        evr: Tuple[Optional[str], Optional[str], Optional[str]]) -> EVRKey:
+    """
+    A sort key for an (Epoch, Version, Release) tuple. The keys of two
+    EVRs compare the same way as `evr_compare` would compare the EVRs
+    themselves, so they may be used directly with `sorted` and the
+    comparison operators. An epoch, version, or release of None is
+    presumed to be ``"0"``
+
+    The segments of each distinct string are only split once, and
+    then remembered.
+
+    :param evr: The Epoch, Version, Release to produce a key for
+
+    :since: 2.3
+    """
+
+    epoch, version, release = evr
+
+    return (_rpm_str_key("0" if epoch is None else str(epoch)),
+            _rpm_str_key("0" if version is None else str(version)),
+            _rpm_str_key("0" if release is None else str(release)))
+
+
+def nevr_key(
+        name: str,
+        epoch: Optional[str],
+        version: Optional[str],
+        release: Optional[str]) -> Tuple[str, EVRKey]:
+    """
+    A sort key for a Name, Epoch, Version, Release. Orders by name,
+    and then by `evr_key`
+
+    :since: 2.3
+    """
+
+    return (name, evr_key((epoch, version, release)))
+
+
+class EVRIndex():
+    """
+    An index of info dicts, such as build infos or RPM infos, grouped
+    by their ``"name"`` and kept in order of their ``"epoch"``,
+    ``"version"``, and ``"release"`` per `evr_key`. Once built, the
+    highest or lowest entries for a name, or those which compare in a
+    particular way to some EVR, are found in O(log n) rather than by
+    checking every entry.
+
+    Entries with equal EVRs retain the order they were given in.
+
+    :since: 2.3
+    """
+
+    def __init__(self, infos: Iterable[Dict[str, Any]] = ()):
+        """
+        :param infos: the info dicts to index
+        """
+
+        keys: Dict[str, List[EVRKey]] = {}
+        infos_by_name: Dict[str, List[Dict[str, Any]]] = {}
+
+        for info in infos:
+            name = info["name"]
+            key = evr_key((info["epoch"], info["version"], info["release"]))
+
+            found = keys.get(name)
+            if found is None:
+                found = keys[name] = []
+                infos_by_name[name] = []
+
+            found.append(key)
+            infos_by_name[name].append(info)
+
+        for name, unsorted in keys.items():
+            # sorted is stable, so equal EVRs keep their given order
+            order = sorted(range(len(unsorted)), key=unsorted.__getitem__)
+            given = infos_by_name[name]
+
+            keys[name] = [unsorted[i] for i in order]
+            infos_by_name[name] = [given[i] for i in order]
+
+        self._keys = keys
+        self._infos = infos_by_name
+
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._infos
+
+
+    def names(self) -> List[str]:
+        """
+        The names in the index, in the order they were first seen
+        """
+
+        return list(self._infos)
+
+
+    def latest(self, name: str) -> Optional[Dict[str, Any]]:
+        """
+        The entry with the highest EVR for the given name, or None if
+        there are no entries by that name. If several entries share the
+        highest EVR, the first given of them is the result.
+
+        :param name: the name to look up
+        """
+
+        found = self.highest(name, 1)
+        return found[0] if found else None
+
+
+    def highest(self, name: str, count: int = 1) -> List[Dict[str, Any]]:
+        """
+        Up to count entries for the given name, from the highest EVR
+        downwards
+
+        :param name: the name to look up
+
+        :param count: maximum number of entries to return
+        """
+
+        keys = self._keys.get(name)
+        if not keys:
+            return []
+
+        infos = self._infos[name]
+        found: List[Dict[str, Any]] = []
+
+        # collect each run of equal EVRs in its given order, so that
+        # the result agrees with a stable descending sort
+        stop = len(keys)
+        while stop and len(found) < count:
+            start = bisect_left(keys, keys[stop - 1], 0, stop)
+            found.extend(infos[start:stop])
+            stop = start
+
+        return found[:count]
+
+
+    def lowest(self, name: str, count: int = 1) -> List[Dict[str, Any]]:
+        """
+        Up to count entries for the given name, from the lowest EVR
+        upwards
+
+        :param name: the name to look up
+
+        :param count: maximum number of entries to return
+        """
+
+        return self._infos.get(name, [])[:count]
+
+
+    def compare(
+            self,
+            name: str,
+            op: str,
+            evr: Tuple[Optional[str], Optional[str], Optional[str]]) \
+            -> List[Dict[str, Any]]:
+        """
+        The entries for the given name whose EVR compares to the given
+        EVR via op, in ascending order. If the release of the given EVR
+        is None, then only the epoch and version of the entries are
+        compared.
+
+        :param name: the name to look up
+
+        :param op: one of ``==``, ``!=``, ``>``, ``>=``, ``<``, ``<=``
+
+        :param evr: the Epoch, Version, Release to compare against. An
+          epoch of None is presumed to be ``"0"``
+
+        :raises ValueError: if op is not a valid comparison
+        """
+
+        if op not in _EVR_OPS:
+            raise ValueError(f"Invalid comparison operator: {op!r}")
+
+        infos = self._infos.get(name)
+        if not infos:
+            return []
+
+        keys = self._keys[name]
+        epoch, version, release = evr
+
+        if release is None:
+            ekey, vkey, _rkey = evr_key((epoch, version, "0"))
+            low = bisect_left(keys, (ekey, vkey))
+            high = bisect_right(keys, (ekey, vkey, _KEY_MAX))
+        else:
+            key = evr_key(evr)
+            low = bisect_left(keys, key)
+            high = bisect_right(keys, key)
+
+        if op == "==":
+            return infos[low:high]
+        elif op == "!=":
+            return infos[:low] + infos[high:]
+        elif op == ">":
+            return infos[high:]
+        elif op == ">=":
+            return infos[low:]
+        elif op == "<":
+            return infos[:low]
+        else:
+            return infos[:high]
+
+
+    def select(
+            self,
+            op: str,
+            evr: Tuple[Optional[str], Optional[str], Optional[str]]) \
+            -> List[Dict[str, Any]]:
+        """
+        As `compare`, but across every name in the index, in the order
+        the names were first seen
+
+        :param op: one of ``==``, ``!=``, ``>``, ``>=``, ``<``, ``<=``
+
+        :param evr: the Epoch, Version, Release to compare against
+
+        :raises ValueError: if op is not a valid comparison
+        """
+
+        if op not in _EVR_OPS:
+            raise ValueError(f"Invalid comparison operator: {op!r}")
+
+        found: List[Dict[str, Any]] = []
+        for name in self._infos:
+            found.extend(self.compare(name, op, evr))
+        return found
+
+
 def nevra_split(nevra: str) -> Tuple[str, str, str, str, str]:
     """
     Splits an NEVRA into a five-tuple representing the name, epoch,
@@ -285,5 +572,52 @@ def evr_split(evr: str) -> Tuple[str, str, str]:
     return epoch, version, release
 
 
+class NEVRA(NamedTuple):
+    """
+    A parsed NEVRA, as produced by `bulk_nevra_split`. Absent
+    components are represented as ``None``, as with `nevra_split`.
+
+    :since: 2.3
+    """
+
+    name: Optional[str]
+    epoch: Optional[str]
+    version: Optional[str]
+    release: Optional[str]
+    arch: Optional[str]
+
+
+def _intern(s: Optional[str]) -> Optional[str]:
+    return None if s is None else intern(s)
+
+
+@lru_cache(maxsize=2 ** 16)
+def _nevra_record(nevra: str) -> NEVRA:
+    name, epoch, version, release, arch = nevra_split(nevra)
+    return NEVRA(_intern(name), _intern(epoch), _intern(version),
+                 _intern(release), _intern(arch))
+
+
+def bulk_nevra_split(nevras: Iterable[str]) -> List[NEVRA]:
+    """
+    Splits each of the given NEVRA strings in the same manner as
+    `nevra_split`, returning a list of `NEVRA` records in the same
+    order.
+
+    Intended for large lists of RPMs, such as the contents of a repo,
+    in which the same names, epochs, versions, releases, and arches
+    recur many times. Each component is interned, so that every
+    occurrence shares a single string, and the records for recently
+    seen NEVRA strings are memoized, so that a repeated entry is
+    neither parsed nor stored twice.
+
+    :param nevras: NEVRA strings to be split
+
+    :since: 2.3
+    """
+
+    return list(map(_nevra_record, nevras))
+
+
 #
 # The end.
@@ -32,22 +32,31 @@ Sifter and Sieve were good names for something that filters stuff.
 
 from abc import ABCMeta, abstractproperty
 from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from functools import partial
 from io import TextIOBase
+from itertools import compress, filterfalse
 from koji import ClientSession
-from operator import itemgetter
+from operator import itemgetter, methodcaller
+from queue import SimpleQueue
+from threading import Lock, RLock
 from typing import (
-    Any, Iterable, Callable, Dict, List, Sequence, Set,
+    Any, Iterable, Iterator, Callable, Dict, List, Optional, Sequence, Set,
     Tuple, Type, TypeVar, Union, )
 
-from .. import BadDingo
+from .. import BadDingo, clone_session
+from ..common import ichunkseq, iunique
 from ..types import KeySpec
+from .cache import SieveCache, TagDataCache
 from .parse import (
-    Glob, ItemPath, Matcher, Number, Reader, Regex, Symbol, SymbolGroup,
-    convert_token, parse_exprs, )
+    Glob, ItemPath, Matcher, MatcherSet, Number, Reader, Regex, Symbol,
+    SymbolGroup, convert_token, parse_exprs, )
 
 
 __all__ = (
+    "COST_LOCAL",
+    "COST_PER_ITEM",
+    "COST_PER_TAG",
     "DEFAULT_SIEVES",
 
     "Flagged",
@@ -79,6 +88,33 @@ __all__ = (
 )
 
 
+COST_LOCAL = 0
+"""
+Sieve cost class for predicates which only inspect the info dicts
+themselves, and which never need to query the koji hub
+"""
+
+COST_PER_TAG = 1
+"""
+Sieve cost class for predicates which query the koji hub a fixed
+number of times based on their arguments, such as once per named tag,
+regardless of how many info dicts they are given
+"""
+
+COST_PER_ITEM = 2
+"""
+Sieve cost class for predicates which query the koji hub for every
+info dict they are given
+"""
+
+
+_COST_NAMES = {
+    COST_LOCAL: "local",
+    COST_PER_TAG: "per-tag",
+    COST_PER_ITEM: "per-item",
+}
+
+
 class SifterError(BadDingo):
     # Indicates an problem during the compilation of a Sifter, either
     # due to a syntactic problem or in the initialization of a Sieve
@@ -323,7 +359,11 @@ class Sifter():
                                Iterable[Type['Sieve']]],
                  source: Union[str, Reader],
                  key: KeySpec = "id",
-                 params: Dict[str, str] = None):
+                 params: Dict[str, str] = None,
+                 reorder: bool = True,
+                 cache: Optional[SieveCache] = None,
+                 concurrency: int = 1,
+                 tag_cache: Optional[TagDataCache] = None):
         """
         :param sieves: list of classes to use in compiling the source
           str. Each class should be a subclass of Sieve. The name
@@ -337,6 +377,25 @@ class Sifter():
           the incoming information. Default, use the "id" value.
 
         :param params: Map of text substitutions for quoted strings
+
+        :param reorder: Permit the sub expressions of ``(and ...)``
+          sieves to be evaluated in order of their cost class, rather
+          than in the order they were written. See `Sieve.cost` and
+          `Sieve.reorderable`. Default, True
+
+        :param cache: Load the compiled sieve expressions from this
+          cache if they are present, and otherwise store them there
+          once compiled. Default, always compile the source
+
+        :param concurrency: When greater than 1, the prep stages of
+          independent top-level expressions are run at the same time
+          on up to this many threads, each with its own session. See
+          `prep_branches`. Default, run every prep in sequence
+
+        :param tag_cache: Persistent store for the per-tag data loaded
+          by sieves via `kojismokydingo.sift.common.CacheMixin`, which
+          is revalidated rather than loaded again on later runs.
+          Default, only cache tag data in memory
         """
 
         if not callable(key):
@@ -345,12 +404,30 @@ class Sifter():
 
         self.params: Dict[str, str] = params or {}
 
+        self.concurrency: int = concurrency or 1
+
+        self.tag_cache: Optional[TagDataCache] = tag_cache
+
         # {flagname: {data_id: bool}}
         self._flags: Dict[str, Dict[Any, bool]] = {}
 
         # {(cachename, data_id): {}}
         self._cache: Dict[Tuple[str, Any], Any] = {}
 
+        # {(cachename, data_id): RLock}, and the lock guarding the
+        # creation of new caches and cache locks
+        self._cache_locks: Dict[Tuple[str, Any], RLock] = {}
+        self._cache_lock = Lock()
+
+        # the info dicts being sifted by run, and {data_id: index}
+        # into them
+        self._work: Sequence[Any] = ()
+        self._positions: Dict[Any, int] = {}
+
+        # the cloned sessions kept by run_stream for prep_branches to
+        # use across every chunk, or None when not streaming
+        self._clones: Optional[List[ClientSession]] = None
+
         sievedict: Dict[str, Type[Sieve]]
 
         if not isinstance(sieves, dict):
@@ -366,8 +443,27 @@ class Sifter():
 
         self._sieve_classes: Dict[str, Type[Sieve]] = sieves
 
-        exprs = self._compile(source) if source else []
-        self._exprs = ensure_all_sieve(exprs)
+        exprs = None
+
+        if source and cache is not None:
+            if isinstance(source, Reader):
+                text = source.getvalue()[source.tell():]
+            else:
+                text = str(source)
+            exprs = cache.load(self, text)
+
+            if exprs is None:
+                exprs = self._compile(text)
+                cache.store(self, text, exprs)
+
+        elif source:
+            exprs = self._compile(source)
+
+        self._exprs = ensure_all_sieve(exprs or ())
+
+        if reorder:
+            for expr in self._exprs:
+                expr.plan()
 
 
     def sieve_exprs(self) -> List['Sieve']:
@@ -378,6 +474,26 @@ class Sifter():
         return self._exprs
 
 
+    def explain(self) -> str:
+        """
+        Describes the order in which the sieve expressions will be
+        evaluated. Each expression is shown on its own line, indented
+        beneath its parent, and prefixed by the name of its cost
+        class. Logic expressions whose sub expressions have been
+        reordered by cost are marked as such.
+
+        :since: 2.3
+        """
+
+        lines = []
+        for expr in self._exprs:
+            for cost, line in expr.explain():
+                cost_name = _COST_NAMES.get(cost, str(cost))
+                lines.append(f"{cost_name:<10}{line}")
+
+        return "\n".join(lines)
+
+
     def _compile(self, source: Union[Reader, str]):
         """
         Turns a source string into a list of Sieve instances
@@ -497,6 +613,11 @@ class Sifter():
         """
         Clears existing flags and runs contained sieves on the given
         info_dicts.
+
+        Each of the info_dicts is assigned an index, and the sieves
+        select from those indexes via `Sieve.select`, so that logic
+        sieves may combine the results of their sub expressions without
+        handling the info dicts themselves.
         """
 
         self._flags.clear()
@@ -505,11 +626,27 @@ class Sifter():
         data = {key(b): b for b in info_dicts if b}
         work = tuple(data.values())
 
-        for expr in self._exprs:
-            autoflag = not isinstance(expr, Flagger)
-            for binfo in expr(session, work):
-                if autoflag:
-                    self.set_flag("default", binfo)
+        self._work = work
+        self._positions = {bid: index for index, bid in enumerate(data)}
+
+        try:
+            self.prefetch(session, work)
+
+            if self.concurrency > 1:
+                self.prep_branches(session, work)
+
+            everything = range(len(work))
+            binfo: ST
+
+            for expr in self._exprs:
+                found = expr.select(session, everything)
+                if not isinstance(expr, Flagger):
+                    for binfo in self.infos_at(found):
+                        self.set_flag("default", binfo)
+
+        finally:
+            self._work = ()
+            self._positions = {}
 
         results = {}
         for flag, bids in self._flags.items():
@@ -518,6 +655,228 @@ class Sifter():
         return results
 
 
+    def needs_full_pass(self) -> bool:
+        """
+        True if any of the sieve expressions must be given the entire
+        input at once. See `Sieve.full_pass`
+
+        :since: 2.3
+        """
+
+        return any(expr.needs_full_pass() for expr in self._exprs)
+
+
+    def run_stream(
+            self,
+            session: ClientSession,
+            info_dicts: Iterable[ST],
+            chunk: int = 1000) -> Iterator[Dict[str, List[ST]]]:
+        """
+        Similar to `run`, but reads the info_dicts lazily and runs the
+        sieves on up to chunk of them at a time, yielding the flagged
+        results of each chunk as soon as it has been sifted. Info
+        dicts which have already been seen in an earlier chunk are
+        skipped.
+
+        Every sieve expression is run on each chunk in turn, so
+        ``(flagged ...)`` sees the flags set on the info dicts of the
+        chunk by the expressions before it. Once the next chunk begins,
+        the flags of the previous chunk are cleared. The data caches
+        are retained between chunks, as are any sessions cloned by
+        `prep_branches`, which are logged out once the stream ends.
+
+        If the sieves need the entire input at once, as determined by
+        `needs_full_pass`, then the info_dicts are instead run as a
+        single chunk.
+
+        :param info_dicts: the info dicts to sift
+
+        :param chunk: the most info dicts to sift at once. Default,
+          1000
+
+        :since: 2.3
+        """
+
+        if self.needs_full_pass():
+            yield self(session, info_dicts)
+            return
+
+        work = iunique(filter(None, info_dicts), key=self.key)
+
+        # any sessions cloned by prep_branches are kept for the later
+        # chunks, rather than cloned anew for each
+        self._clones = []
+        try:
+            for infos in ichunkseq(work, chunk):
+                yield self.run(session, infos)
+
+        finally:
+            clones, self._clones = self._clones, None
+            _logout_clones(clones)
+
+
+    def infos_at(
+            self,
+            indexes: Iterable[int]) -> Tuple[ST, ...]:
+        """
+        The info dicts at the given indexes of those being sifted by
+        `run`, in the same order as the indexes
+
+        :param indexes: indexes as assigned by `run`
+
+        :since: 2.3
+        """
+
+        return tuple(map(self._work.__getitem__, indexes))
+
+
+    def indexes_of(
+            self,
+            info_dicts: Iterable[ST]) -> List[int]:
+        """
+        The indexes assigned by `run` to the given info dicts, in the
+        same order as the info dicts
+
+        :param info_dicts: info dicts from those being sifted
+
+        :since: 2.3
+        """
+
+        positions = self._positions
+        return [positions[bid] for bid in map(self.key, info_dicts)]
+
+
+    def prefetch(
+            self,
+            session: ClientSession,
+            info_dicts: Sequence[ST]):
+        """
+        Loads the shared data needed by those sieves which will be
+        given the entirety of info_dicts, before any of them are run.
+
+        Several sieves may need the same kind of data from koji, as
+        named by their `Sieve.needs` attribute. Rather than each
+        loading it separately during its prep, the keys wanted by each
+        are combined, and loaded via a single batch of multicalls per
+        kind into the caches that those sieves share.
+
+        Invoked by `run`
+
+        :since: 2.3
+        """
+
+        fused: Dict[str, Tuple[Sieve, Dict[Any, bool]]] = {}
+
+        for expr in self._exprs:
+            for sieve in expr.leading():
+                for need in sieve.needs:
+                    keys = sieve.need_keys(need, info_dicts)
+                    found = fused.get(need)
+                    if found is None:
+                        fused[need] = (sieve, dict.fromkeys(keys, True))
+                    else:
+                        found[1].update(dict.fromkeys(keys, True))
+
+        for need, (sieve, wanted) in fused.items():
+            if wanted:
+                sieve.prefetch(session, need, wanted)
+
+
+    def prep_branches(
+            self,
+            session: ClientSession,
+            info_dicts: Sequence[ST]):
+        """
+        Runs the prep stage of the leading sieves of each top-level
+        expression ahead of evaluation, with the expressions divided
+        between up to `concurrency` threads. Each thread uses its own
+        session cloned from the given one. The clones are logged out
+        once the preps complete, unless invoked from `run_stream`,
+        which keeps them for its later chunks.
+
+        Expressions which refer to a flag via ``(flagged ...)`` depend
+        upon the evaluation of the expressions before them, and so are
+        left to be prepared as they are evaluated. Sieves which are
+        only given the info dicts remaining after some other sieve
+        (such as the later branches of an ``(or ...)``) are also left
+        alone, as they would otherwise load data for info dicts they
+        will never be asked to check.
+
+        The sieves record what they load in the sifter's caches, so
+        when the expressions are subsequently evaluated in order their
+        prep stages find the work already done. The flags, and the
+        order of the results, are therefore the same as if this had
+        not been invoked. If any prep raises an exception, the first
+        such exception in source order is raised.
+
+        Each sieve instance belongs to a single expression, so any
+        state a sieve keeps on itself is only touched by one thread.
+        The caches kept on the sifter are shared, however. Sieves of
+        the same name share their info caches, so the preps of those
+        sieves are run one at a time, under a lock from
+        `get_cache_lock`. The mixin caches are shared by sieves of any
+        name, and `kojismokydingo.sift.common.CacheMixin` holds a lock
+        for each while checking and filling it. In either case, a
+        thread that arrives second waits, then finds the data already
+        loaded.
+
+        Invoked by `run` when concurrency is greater than 1
+
+        :since: 2.3
+        """
+
+        branches = []
+        for expr in self._exprs:
+            if _reads_flags(expr):
+                continue
+            preps = [sieve for sieve in expr.leading() if _has_prep(sieve)]
+            if preps:
+                branches.append(preps)
+
+        if len(branches) < 2:
+            # nothing to overlap, evaluation will prep them anyway
+            return
+
+        workers = min(self.concurrency, len(branches))
+
+        pooled = self._clones
+        if pooled is None:
+            clones = [clone_session(session) for _ in range(workers)]
+        else:
+            # run_stream is keeping the clones for its later chunks
+            while len(pooled) < workers:
+                pooled.append(clone_session(session))
+            clones = pooled[:workers]
+
+        idle: SimpleQueue = SimpleQueue()
+        for clone in clones:
+            idle.put(clone)
+
+        def prep_branch(preps):
+            clone = idle.get()
+            try:
+                for sieve in preps:
+                    with self.get_cache_lock(sieve.name, "*prep"):
+                        sieve.prep(clone, info_dicts)
+            finally:
+                idle.put(clone)
+
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                futures = [pool.submit(prep_branch, preps)
+                           for preps in branches]
+                try:
+                    for future in futures:
+                        future.result()
+                finally:
+                    for future in futures:
+                        future.cancel()
+
+        finally:
+            if pooled is None:
+                _logout_clones(clones)
+
+
     def __call__(self,
                  session: ClientSession,
                  info_dicts: Iterable[ST]) -> Dict[str, List[ST]]:
@@ -584,10 +943,37 @@ class Sifter():
         cachekey = (cachename, key)
         cch = self._cache.get(cachekey)
         if cch is None:
-            cch = self._cache[cachekey] = {}
+            # sieves may be prepared from several threads at once by
+            # prep_branches
+            with self._cache_lock:
+                cch = self._cache.setdefault(cachekey, {})
         return cch
 
 
+    def get_cache_lock(self, cachename, key) -> RLock:
+        """
+        A reentrant lock associated with the cache of the same name
+        and key as `get_cache`. Sieves which check a cache and then
+        fill it from the hub should hold this lock while doing so, as
+        their prep may run concurrently with that of other sieves
+        sharing the cache. See `prep_branches`
+
+        The same lock will be returned for this key for the life of
+        the sifter.
+
+        :since: 2.3
+        """
+
+        cachekey = (cachename, key)
+        lock = self._cache_locks.get(cachekey)
+        if lock is None:
+            with self._cache_lock:
+                lock = self._cache_locks.get(cachekey)
+                if lock is None:
+                    lock = self._cache_locks[cachekey] = RLock()
+        return lock
+
+
     def get_info_cache(self, cachename, data) -> dict:
         """
         Cache associated with a particular info dict.
@@ -598,6 +984,41 @@ class Sifter():
         return self.get_cache(cachename, self.key(data))
 
 
+def _logout_clones(clones: Iterable[ClientSession]) -> None:
+    # done with the sessions cloned for prep_branches
+
+    for clone in clones:
+        try:
+            clone.logout()
+        except Exception:
+            # we don't care if the logout fails
+            pass  # nosec
+        if clone.rsession:
+            clone.rsession.close()
+            clone.rsession = None
+
+
+def _has_prep(sieve: 'Sieve') -> bool:
+    # whether the sieve relies on the default run, with an overridden
+    # prep that we could invoke ahead of time
+
+    cls = type(sieve)
+    return (cls.prep is not Sieve.prep and
+            cls.run is Sieve.run and
+            cls.__call__ is Sieve.__call__ and
+            cls.select is Sieve.select)
+
+
+def _reads_flags(sieve: 'Sieve') -> bool:
+    # whether the sieve or any sieve nested within it checks flags
+
+    if isinstance(sieve, Flagged):
+        return True
+
+    return any(_reads_flags(tok) for tok in sieve.tokens
+               if isinstance(tok, Sieve))
+
+
 class Sieve(metaclass=ABCMeta):
     """
     The abstract base type for all Sieve expressions.
@@ -634,6 +1055,46 @@ class Sieve(metaclass=ABCMeta):
     aliases: Sequence[str] = ()
 
 
+    cost: int = COST_LOCAL
+    """
+    The cost class of this sieve, one of `COST_LOCAL`, `COST_PER_TAG`,
+    or `COST_PER_ITEM`. Sieves which query the koji hub should
+    override this so that cheaper sieves may be evaluated before them.
+
+    :since: 2.3
+    """
+
+
+    reorderable: bool = True
+    """
+    False if this sieve has side effects, or if its result for an info
+    dict depends on which other info dicts it is given. Such sieves are
+    always evaluated in the position they were written in.
+
+    :since: 2.3
+    """
+
+
+    full_pass: bool = False
+    """
+    True if the result of this sieve for an info dict depends on the
+    other info dicts it is given, such that it must be given the
+    entire input at once rather than a chunk at a time. See
+    `Sifter.run_stream`
+
+    :since: 2.3
+    """
+
+
+    needs: Sequence[str] = ()
+    """
+    Names of the kinds of data this sieve loads from koji during its
+    prep, which it shares with other sieves. See `Sifter.prefetch`
+
+    :since: 2.3
+    """
+
+
     def __init__(self,
                  sifter: Sifter,
                  *tokens, **options):
@@ -665,6 +1126,114 @@ class Sieve(metaclass=ABCMeta):
             return f"({self.name})"
 
 
+    def get_cost(self) -> int:
+        """
+        The cost class of evaluating this sieve expression.
+
+        :since: 2.3
+        """
+
+        return self.cost
+
+
+    def is_reorderable(self) -> bool:
+        """
+        Whether this sieve expression may be moved ahead of or behind
+        its sibling expressions.
+
+        :since: 2.3
+        """
+
+        return self.reorderable
+
+
+    def needs_full_pass(self) -> bool:
+        """
+        Whether this sieve expression must be given the entire input
+        at once.
+
+        :since: 2.3
+        """
+
+        return self.full_pass
+
+
+    def plan(self):
+        """
+        Override to arrange the evaluation of any nested sieve
+        expressions. Invoked by the Sifter once the source has been
+        compiled.
+
+        :since: 2.3
+        """
+
+        return
+
+
+    def leading(self) -> Iterator['Sieve']:
+        """
+        This sieve, and any nested sieves which will be given the same
+        info dicts as this sieve.
+
+        :since: 2.3
+        """
+
+        yield self
+
+
+    def need_keys(
+            self,
+            need: str,
+            info_dicts: Sequence[ST]) -> Iterable[Any]:
+        """
+        Override to produce the keys for which this sieve would need
+        to load the named kind of data, in order to check the given
+        info dicts. Only called for the needs listed in `needs`
+
+        :param need: one of the values from `needs`
+
+        :param info_dicts: the info dicts which are to be checked
+
+        :since: 2.3
+        """
+
+        return ()
+
+
+    def prefetch(
+            self,
+            session: ClientSession,
+            need: str,
+            keys: Iterable[Any]):
+        """
+        Override to load the named kind of data for the given keys,
+        storing it such that any sieve sharing that data will find it
+        during their prep. Invoked by `Sifter.prefetch` with the keys
+        combined from every sieve with that need.
+
+        :param need: one of the values from `needs`
+
+        :param keys: the keys to load data for
+
+        :since: 2.3
+        """
+
+        return
+
+
+    def explain(self, depth: int = 0) -> List[Tuple[int, str]]:
+        """
+        The evaluation plan for this sieve expression, as a list of
+        cost class and line pairs. Used by `Sifter.explain`
+
+        :param depth: indentation level of the expression
+
+        :since: 2.3
+        """
+
+        return [(self.get_cost(), "  " * depth + repr(self))]
+
+
     def check(self,
               session: ClientSession,
               info: ST) -> bool:
@@ -709,6 +1278,43 @@ class Sieve(metaclass=ABCMeta):
         return filter(partial(self.check, session), info_dicts)
 
 
+    def select(
+            self,
+            session: ClientSession,
+            indexes: Sequence[int]) -> Sequence[int]:
+        """
+        Use this Sieve instance to select a subset of the indexes of
+        the info dicts being sifted by `Sifter.run`, in the same way
+        that `run` would select a subset of the info dicts themselves.
+
+        The default implementation gathers the info dicts at those
+        indexes and invokes this sieve on them. Logic sieves override
+        this to combine the selections of their sub expressions
+        without needing the info dicts at all.
+
+        :param indexes: indexes as assigned by `Sifter.run`
+
+        :since: 2.3
+        """
+
+        if not indexes:
+            return ()
+
+        sifter = self.sifter
+        work: Tuple[Any, ...] = sifter.infos_at(indexes)
+
+        cls = type(self)
+        if cls.run is Sieve.run and cls.__call__ is Sieve.__call__:
+            # the results of check line up with the indexes, so there
+            # is no need to find the index of each result
+            self.prep(session, work)
+            checked = map(partial(self.check, session), work)
+            return tuple(compress(indexes, checked))
+
+        else:
+            return sifter.indexes_of(self(session, work))
+
+
     def get_cache(self, key: str) -> dict:
         """
         Gets a cache dict from the sifter using the name of this sieve
@@ -776,6 +1382,55 @@ class Logic(Sieve, metaclass=ABCMeta):
         exprs = ensure_all_sieve(exprs)
         super().__init__(sifter, *exprs)
 
+        # the order in which the sub expressions are evaluated, which
+        # may be changed by plan
+        self.order: Sequence[Sieve] = self.tokens
+
+
+    def get_cost(self):
+        return max((expr.get_cost() for expr in self.tokens),
+                   default=self.cost)
+
+
+    def is_reorderable(self):
+        return (self.reorderable and
+                all(expr.is_reorderable() for expr in self.tokens))
+
+
+    def needs_full_pass(self):
+        return (self.full_pass or
+                any(expr.needs_full_pass() for expr in self.tokens))
+
+
+    def plan(self):
+        for expr in self.tokens:
+            expr.plan()
+
+
+    def leading(self):
+        yield self
+        if self.order:
+            yield from self.order[0].leading()
+
+
+    def _explain_head(self):
+        return f"({self.name}"
+
+
+    def explain(self, depth=0):
+        head = "  " * depth + self._explain_head()
+        if self.order != self.tokens:
+            head += "  ; reordered"
+
+        lines = [(self.get_cost(), head)]
+        for expr in self.order:
+            lines.extend(expr.explain(depth + 1))
+
+        cost, last = lines[-1]
+        lines[-1] = (cost, last + ")")
+
+        return lines
+
 
 class LogicAnd(Logic):
     """
@@ -787,10 +1442,34 @@ class LogicAnd(Logic):
     name = "and"
 
 
+    def plan(self):
+        super().plan()
+
+        # sub expressions are stably sorted by cost, but only within
+        # each run of reorderable expressions. Moving anything across
+        # an expression that isn't reorderable could change what that
+        # expression sees or does.
+        bycost = methodcaller("get_cost")
+
+        order = []
+        run = []
+
+        for expr in self.tokens:
+            if expr.is_reorderable():
+                run.append(expr)
+            else:
+                order.extend(sorted(run, key=bycost))
+                order.append(expr)
+                run = []
+
+        order.extend(sorted(run, key=bycost))
+        self.order = tuple(order)
+
+
     def run(self, session, info_dicts):
         work = info_dicts
 
-        for expr in self.tokens:
+        for expr in self.order:
             if not work:
                 break
             work = expr(session, work)
@@ -798,6 +1477,15 @@ class LogicAnd(Logic):
         return work
 
 
+    def select(self, session, indexes):
+        for expr in self.order:
+            if not indexes:
+                break
+            indexes = expr.select(session, indexes)
+
+        return indexes
+
+
 class LogicOr(Logic):
     """
     Usage: ``(or EXPR [EXPR...])``
@@ -812,7 +1500,7 @@ class LogicOr(Logic):
         work = {self.key(b): b for b in info_dicts}
         results = {}
 
-        for expr in self.tokens:
+        for expr in self.order:
             if not work:
                 break
 
@@ -824,6 +1512,22 @@ class LogicOr(Logic):
         return results.values()
 
 
+    def select(self, session, indexes):
+        work = indexes
+        results: Dict[int, bool] = {}
+
+        for expr in self.order:
+            if not work:
+                break
+
+            found = expr.select(session, work)
+            if found:
+                results.update(dict.fromkeys(found, True))
+                work = tuple(filterfalse(results.__contains__, work))
+
+        return tuple(results)
+
+
 class LogicNot(Logic):
     """
     Usage: ``(not EXPR [EXPR...])``
@@ -838,7 +1542,7 @@ class LogicNot(Logic):
     def run(self, session, info_dicts):
         work = {self.key(b): b for b in info_dicts}
 
-        for expr in self.tokens:
+        for expr in self.order:
             if not work:
                 break
 
@@ -848,6 +1552,21 @@ class LogicNot(Logic):
         return work.values()
 
 
+    def select(self, session, indexes):
+        work = indexes
+
+        for expr in self.order:
+            if not work:
+                break
+
+            found = expr.select(session, work)
+            if found:
+                found = set(found)
+                work = tuple(filterfalse(found.__contains__, work))
+
+        return work
+
+
 class Flagger(LogicAnd):
     """
     Usage: ``(flag NAME EXPR [EXPR...])``
@@ -857,6 +1576,7 @@ class Flagger(LogicAnd):
     """
 
     name = "flag"
+    reorderable = False
 
 
     def __init__(self, sifter, flag, *exprs):
@@ -873,6 +1593,19 @@ class Flagger(LogicAnd):
         return results
 
 
+    def select(self, session, indexes):
+        indexes = super().select(session, indexes)
+
+        for info in self.sifter.infos_at(indexes):
+            self.sifter.set_flag(self.flag, info)
+
+        return indexes
+
+
+    def _explain_head(self):
+        return f"({self.name} {self.flag!r}"
+
+
     def __repr__(self):
         e = " ".join(map(repr, self.tokens))
         return f"({self.name} {self.flag!r} {e})"
@@ -889,8 +1622,21 @@ class VariadicSieve(Sieve, metaclass=ABCMeta):
     value.
     """
 
-    def __new__(cls, sifter, *exprs):
-        if len(exprs) > 1:
+    fusable: bool = False
+    """
+    If True then when presented with more than one argument, a single
+    instance is created with all of the arguments, rather than one
+    instance per argument wrapped in an ``(or ...)``. Such an instance
+    must match if any one of its arguments would have matched alone.
+
+    :since: 2.3
+    """
+
+
+    def __new__(cls, sifter=None, *exprs):
+        # sifter has a default only so that instances may be unpickled
+        # by the SieveCache, which doesn't call __new__ with arguments
+        if len(exprs) > 1 and not cls.fusable:
             wrapped = [cls(sifter, expr) for expr in exprs]
             return LogicOr(sifter, *wrapped)
         else:
@@ -936,17 +1682,40 @@ class ItemSieve(VariadicSieve, metaclass=ABCMeta):
 
     If a pattern is absent then this predicate will only check that
     given field key exists and is not None.
+
+    If more than one pattern is specified, then the predicate matches
+    if the value matches any of them. The patterns are combined into a
+    single `MatcherSet`, so that even a very long list of literal
+    values costs little more to check than one. A subclass which
+    overrides ``__init__`` may only expect a single value, so it is
+    instead wrapped in an ``(or ...)`` unless it also sets
+    `fusable` itself.
     """
 
+    fusable = True
+
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+
+        cls_vars = vars(cls)
+        if "__init__" in cls_vars and "fusable" not in cls_vars:
+            cls.fusable = False
+
+
     @abstractproperty
     def field(self):
         pass
 
 
-    def __init__(self, sifter, pattern=None):
-        if pattern is not None:
-            pattern = ensure_matcher(pattern)
-        super().__init__(sifter, pattern)
+    def __init__(self, sifter, *patterns):
+        patterns = ensure_all_matcher(patterns)
+
+        if len(patterns) > 1:
+            Sieve.__init__(self, sifter, *patterns)
+            self.token = MatcherSet(patterns)
+        else:
+            super().__init__(sifter, patterns[0] if patterns else None)
 
 
     def check(self, session, info):
@@ -961,7 +1730,8 @@ class ItemSieve(VariadicSieve, metaclass=ABCMeta):
         if self.token is None:
             return f"({self.name})"
         else:
-            return f"({self.name} {self.token!r})"
+            e = " ".join(map(repr, self.tokens))
+            return f"({self.name} {e})"
 
 
 class ItemPathSieve(Sieve):
@@ -24,28 +24,24 @@ dicts.
 
 
 from abc import abstractmethod
-from collections import defaultdict
-from itertools import islice
 from koji import BUILD_STATES, ClientSession
 from typing import Dict, Iterable, List, Type, Union
 from operator import itemgetter
 
 from . import (
-    DEFAULT_SIEVES,
+    COST_PER_ITEM, COST_PER_TAG, DEFAULT_SIEVES,
     IntStrSieve, ItemSieve, MatcherSieve, Number, Sieve,
     Sifter, SifterError, VariadicSieve,
     ensure_int, ensure_int_or_str, ensure_str, ensure_symbol, )
 from .common import ensure_comparison, CacheMixin
 from .. import (
-    as_taginfo, bulk_load_builds, bulk_load_tags, bulk_load_users,
-    iter_bulk_load, )
+    as_taginfo, bulk_load_builds, bulk_load_tags, bulk_load_users, )
 from ..builds import (
-    BuildNEVRCompare,
-    build_dedup, build_nvr_sort,
+    build_dedup, build_nvr_key,
     decorate_builds_btypes, decorate_builds_cg_list,
     decorate_builds_maven, gather_rpm_sigkeys, gavgetter, )
 from ..common import unique
-from ..rpm import evr_compare, evr_split
+from ..rpm import EVRIndex, evr_compare, evr_split
 from ..tags import gather_tag_ids
 from ..types import BuildInfo, BuildInfos
 
@@ -199,6 +195,7 @@ class OwnerSieve(IntStrSieve):
     """
 
     name = "owner"
+    cost = COST_PER_TAG
 
 
     def __init__(self, sifter, user, *users):
@@ -393,6 +390,8 @@ class EVRCompareLE(EVRCompare):
 
 class EVRSorted(Sieve):
 
+    reorderable = False
+    full_pass = True
 
     def __init__(self, sifter, count=1):
         count = ensure_int(count)
@@ -405,22 +404,24 @@ class EVRSorted(Sieve):
 
 
     def run(self, session, binfos):
-
-        collect = defaultdict(list)
-
-        for bld in binfos:
-            collect[bld["name"]].append(bld)
-
-        reverse = self._reverse
         count = self.count
 
         if count == 1:
-            for binfos in collect.values():
-                yield build_nvr_sort(binfos, reverse=reverse)[0]
+            # a single pass is cheaper than ordering every build
+            collect = {}
+            for bld in binfos:
+                collect.setdefault(bld["name"], []).append(bld)
+
+            pick = max if self._reverse else min
+            for blds in collect.values():
+                yield pick(blds, key=build_nvr_key)
+
         else:
-            for binfos in collect.values():
-                blds = build_nvr_sort(binfos, reverse=reverse)
-                yield from islice(blds, 0, count)
+            index = EVRIndex(binfos)
+            top = index.highest if self._reverse else index.lowest
+
+            for name in index.names():
+                yield from top(name, count)
 
 
 class EVRHigh(EVRSorted):
@@ -453,7 +454,7 @@ class EVRLow(EVRSorted):
     _reverse = False
 
 
-class TaggedSieve(MatcherSieve):
+class TaggedSieve(MatcherSieve, CacheMixin):
     """
     usage: (tagged [TAG...])
 
@@ -465,6 +466,13 @@ class TaggedSieve(MatcherSieve):
     """
 
     name = "tagged"
+    cost = COST_PER_ITEM
+    needs = ("build_tags", )
+
+
+    def need_keys(self, need, binfos):
+        return [binfo["id"] for binfo in binfos
+                if "tag_names" not in self.get_info_cache(binfo)]
 
 
     def prep(self, session, binfos):
@@ -475,8 +483,7 @@ class TaggedSieve(MatcherSieve):
             if "tag_names" not in cache:
                 needed[binfo["id"]] = cache
 
-        fn = lambda i: session.listTags(build=i)
-        for bid, tags in iter_bulk_load(session, fn, needed):
+        for bid, tags in self.bulk_build_tags(session, needed).items():
             cache = needed[bid]
             cache["tag_names"] = [t["name"] for t in tags]
             cache["tag_ids"] = [t["id"] for t in tags]
@@ -502,7 +509,7 @@ class TaggedSieve(MatcherSieve):
         return False
 
 
-class InheritedSieve(IntStrSieve):
+class InheritedSieve(IntStrSieve, CacheMixin):
     """
     usage: (inherited TAG [TAG...])
 
@@ -512,6 +519,8 @@ class InheritedSieve(IntStrSieve):
     """
 
     name = "inherited"
+    cost = COST_PER_ITEM
+    needs = ("build_tags", )
 
 
     def __init__(self, sifter, tagname, *tagnames):
@@ -524,6 +533,11 @@ class InheritedSieve(IntStrSieve):
         return self.sifter.get_info_cache("tagged", binfo)
 
 
+    def need_keys(self, need, binfos):
+        return [binfo["id"] for binfo in binfos
+                if "tag_names" not in self.get_info_cache(binfo)]
+
+
     def prep(self, session, binfos):
         if self.tag_ids is None:
             self.tag_ids = gather_tag_ids(session, deep=self.tokens)
@@ -535,8 +549,8 @@ class InheritedSieve(IntStrSieve):
                 needed[binfo["id"]] = cache
 
         if needed:
-            fn = lambda i: session.listTags(build=i)
-            for bid, tags in iter_bulk_load(session, fn, needed):
+            loaded = self.bulk_build_tags(session, needed)
+            for bid, tags in loaded.items():
                 cache = needed[bid]
                 cache["tag_names"] = [t["name"] for t in tags]
                 cache["tag_ids"] = [t["id"] for t in tags]
@@ -555,6 +569,9 @@ class InheritedSieve(IntStrSieve):
 
 class PkgListSieve(IntStrSieve, CacheMixin):
 
+    cost = COST_PER_TAG
+
+
     def __init__(self, sifter, tagname, *tagnames):
         super().__init__(sifter, tagname, *tagnames)
         self.tag_ids = None
@@ -647,6 +664,7 @@ class TypeSieve(MatcherSieve):
     """
 
     name = "type"
+    cost = COST_PER_ITEM
 
 
     def __init__(self, sifter, btype, *btypes):
@@ -667,7 +685,7 @@ class TypeSieve(MatcherSieve):
         return False
 
 
-class CGImportedSieve(MatcherSieve):
+class CGImportedSieve(MatcherSieve, CacheMixin):
     """
     usage: ``(cg-imported [CGNAME...])``
 
@@ -677,10 +695,20 @@ class CGImportedSieve(MatcherSieve):
     """
 
     name = "cg-imported"
+    cost = COST_PER_ITEM
+    needs = ("build_rpms", )
+
+
+    def need_keys(self, need, binfos):
+        return [binfo["id"] for binfo in binfos
+                if "archive_cg_names" not in binfo]
 
 
     def prep(self, session, binfos):
-        decorate_builds_cg_list(session, binfos)
+        needed = self.need_keys("build_rpms", binfos)
+        if needed:
+            rpms = self.bulk_build_rpms(session, needed)
+            decorate_builds_cg_list(session, binfos, build_rpms=rpms)
 
 
     def check(self, session, binfo):
@@ -707,6 +735,7 @@ class LatestSieve(IntStrSieve, CacheMixin):
     """
 
     name = "latest"
+    cost = COST_PER_TAG
 
 
     def __init__(self, sifter, tagname, *tagnames):
@@ -722,8 +751,10 @@ class LatestSieve(IntStrSieve, CacheMixin):
             tags = bulk_load_tags(session, self.tokens, err=True)
             tids = self.tag_ids = unique(t["id"] for t in tags.values())
 
+        # load the latest builds of every tag at once, then pre-fill
+        # the caches of build IDs
+        self.bulk_latest_builds(session, tids, inherit=True)
         for tid in tids:
-            # pre-fill the caches of build IDs
             self.latest_build_ids(session, tid, inherit=True)
 
 
@@ -745,6 +776,7 @@ class LatestMavenSieve(IntStrSieve, CacheMixin):
     """
 
     name = "latest-maven"
+    cost = COST_PER_ITEM
 
 
     def __init__(self, sifter, tagname, *tagnames):
@@ -782,7 +814,7 @@ class LatestMavenSieve(IntStrSieve, CacheMixin):
         return False
 
 
-class SignedSieve(MatcherSieve):
+class SignedSieve(MatcherSieve, CacheMixin):
     """
     usage: ``(signed [KEY...])``
 
@@ -792,6 +824,13 @@ class SignedSieve(MatcherSieve):
     """
 
     name = "signed"
+    cost = COST_PER_ITEM
+    needs = ("build_rpms", )
+
+
+    def need_keys(self, need, binfos):
+        return [binfo["id"] for binfo in binfos
+                if "rpmsigs" not in self.get_info_cache(binfo)]
 
 
     def prep(self, session, binfos):
@@ -804,7 +843,10 @@ class SignedSieve(MatcherSieve):
         if not needed:
             return
 
-        for bid, sigs in gather_rpm_sigkeys(session, needed).items():
+        rpms = self.bulk_build_rpms(session, needed)
+        sigkeys = gather_rpm_sigkeys(session, needed, build_rpms=rpms)
+
+        for bid, sigs in sigkeys.items():
             # we need to drop the unsigned key, which is an empty
             # string
             cache = needed[bid]
@@ -846,6 +888,9 @@ class CompareLatestSieve(CacheMixin):
     `comparison_key` method.
     """
 
+    cost = COST_PER_TAG
+
+
     def __init__(self, sifter, comparison, tag):
         op = ensure_comparison(comparison)
         tag = ensure_int_or_str(tag)
@@ -932,7 +977,7 @@ class CompareLatestNVRSieve(CompareLatestSieve):
 
     name = "compare-latest-nvr"
 
-    comparison_key = BuildNEVRCompare
+    comparison_key = staticmethod(build_nvr_key)
 
 
     def check(self, session, binfo):
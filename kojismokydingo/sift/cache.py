@@ -0,0 +1,417 @@
+# This library is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this library; if not, see <http://www.gnu.org/licenses/>.
+
+
+"""
+Koji Smoky Dingo - Sieve Caches
+
+Stores the sieve expressions compiled by a `kojismokydingo.sift.Sifter`
+on disk, so that large sieve sources need not be parsed and compiled
+again on every invocation. Also stores the per-tag data loaded by
+sieves, so that it need not be loaded again until the tag changes.
+
+:author: Christopher O'Brien <obriencj@gmail.com>
+:license: GPL v3
+"""
+
+
+# Note: nothing in here should import from the sift package itself,
+# as the Sifter relies on this module.
+
+
+# the compiled sieves are only ever loaded from the cache dir of the
+# user running the sifter, where they were stored by that same user
+import pickle  # nosec B403
+
+from functools import lru_cache
+from hashlib import sha256
+from os import makedirs, remove, replace
+from os.path import join
+from sys import modules
+from tempfile import NamedTemporaryFile
+from typing import Any, Dict, Iterable, List, Optional
+
+from .. import iter_bulk_load
+from ..cache import ObjectCache
+from ..common import find_cache_dir
+from ..pinning import get_pinned_event
+
+
+__all__ = (
+    "SieveCache",
+    "TagDataCache",
+)
+
+
+# bumped whenever the layout of the compiled sieves changes in a way
+# which would make older entries unusable
+_FORMAT = 1
+
+
+@lru_cache(maxsize=None)
+def _module_digest(name: str) -> str:
+
+    # a digest of the source of the named module. The compiled sieves
+    # are only good for the code which produced them, and the package
+    # version doesn't change between development builds, so instead
+    # it's the code itself which forms part of the cache key
+
+    filename = getattr(modules.get(name), "__file__", None)
+    if not filename:
+        return ""
+
+    try:
+        with open(filename, "rb") as fin:
+            return sha256(fin.read()).hexdigest()
+    except OSError:
+        return ""
+
+
+def _code_digests(sieve_classes: Iterable[type]) -> List[str]:
+
+    # the modules defining the sieve classes and their bases, and the
+    # parse module whose types the sieves hold
+
+    names = {"kojismokydingo.sift.parse"}
+    for cls in sieve_classes:
+        names.update(base.__module__ for base in cls.__mro__)
+
+    return [f"{name}:{_module_digest(name)}" for name in sorted(names)]
+
+
+class _SievePickler(pickle.Pickler):
+
+    # the sifter and its key function are not part of the compiled
+    # form of the sieves, and are provided anew when loading
+
+    def __init__(self, file, sifter):
+        super().__init__(file, pickle.HIGHEST_PROTOCOL)
+        self.sifter = sifter
+
+
+    def persistent_id(self, obj):
+        if obj is self.sifter:
+            return "sifter"
+        elif obj is self.sifter.key:
+            return "key"
+        else:
+            return None
+
+
+class _SieveUnpickler(pickle.Unpickler):
+
+    def __init__(self, file, sifter):
+        super().__init__(file)
+        self.sifter = sifter
+
+
+    def persistent_load(self, pid):
+        if pid == "sifter":
+            return self.sifter
+        elif pid == "key":
+            return self.sifter.key
+        else:
+            raise pickle.UnpicklingError(f"Unknown persistent ID {pid!r}")
+
+
+class SieveCache():
+    """
+    A directory of compiled sieve expressions. Each entry is keyed by
+    a hash of the sieve source, the sifter's params, the names and
+    classes of the sieves available to the sifter, and the code of
+    the modules defining those classes. Registering new sieves,
+    changing any param, or installing a different version of the
+    sieves will therefore cause the source to be compiled anew.
+
+    Entries which cannot be loaded, for example because they refer to
+    a sieve class which no longer exists, are treated as absent.
+
+    :since: 2.3
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        :param path: directory to store compiled sieves in. Default,
+          the ``sift`` directory of the KSD user cache dir
+        """
+
+        self.path = path or find_cache_dir("sift")
+
+
+    def cache_key(self, sifter, source: str) -> str:
+        """
+        The key under which the compiled form of source would be
+        stored for the given sifter
+
+        :param sifter: the sifter which is compiling the source
+
+        :param source: the sieve source text
+        """
+
+        digest = sha256()
+        digest.update(f"{_FORMAT}\0{source}\0".encode())
+
+        for key, val in sorted(sifter.params.items()):
+            digest.update(f"{key!r}={val!r}\0".encode())
+
+        classes = sifter._sieve_classes
+        for name, cls in sorted(classes.items()):
+            digest.update(f"{name}:{cls.__module__}:"
+                          f"{cls.__qualname__}\0".encode())
+
+        for code in _code_digests(classes.values()):
+            digest.update(f"{code}\0".encode())
+
+        return digest.hexdigest()
+
+
+    def _filename(self, sifter, source: str) -> str:
+        return join(self.path, self.cache_key(sifter, source) + ".pickle")
+
+
+    def load(self, sifter, source: str) -> Optional[List[Any]]:
+        """
+        The compiled sieve expressions for the source, bound to the
+        given sifter, or None if they have not been stored or could not
+        be loaded
+
+        :param sifter: the sifter which is compiling the source
+
+        :param source: the sieve source text
+        """
+
+        filename = self._filename(sifter, source)
+
+        try:
+            with open(filename, "rb") as fin:
+                exprs = _SieveUnpickler(fin, sifter).load()
+
+        except FileNotFoundError:
+            return None
+
+        except Exception:
+            # an incompatible or damaged entry, which will be replaced
+            # once the source has been compiled again
+            return None
+
+        return exprs if isinstance(exprs, list) else None
+
+
+    def store(self, sifter, source: str, exprs: List[Any]) -> bool:
+        """
+        Record the compiled sieve expressions for the source. Returns
+        False if the expressions could not be stored, either because
+        the cache dir is not writable or because a sieve could not be
+        pickled
+
+        :param sifter: the sifter which compiled the source
+
+        :param source: the sieve source text
+
+        :param exprs: the sieves compiled from the source
+        """
+
+        filename = self._filename(sifter, source)
+
+        try:
+            makedirs(self.path, exist_ok=True)
+            fout = NamedTemporaryFile("wb", dir=self.path,
+                                      suffix=".tmp", delete=False)
+        except OSError:
+            return False
+
+        try:
+            with fout:
+                _SievePickler(fout, sifter).dump(exprs)
+            replace(fout.name, filename)
+
+        except Exception:
+            remove(fout.name)
+            return False
+
+        return True
+
+
+class TagDataCache():
+    """
+    A persistent store for data loaded from the hub about a tag, such
+    as its latest builds or its package listings. Entries are kept in
+    an `kojismokydingo.cache.ObjectCache`, namespaced by the hub URL,
+    and are keyed by the name of the call which loaded them and the
+    tag ID.
+
+    Each entry records the koji event at which it was loaded, and the
+    IDs of the tags it was loaded from. When entries are loaded again,
+    they are revalidated via a single multicall of
+    ``tagChangedSinceEvent`` calls, and only those whose tags have not
+    changed since are returned.
+
+    If the session has been pinned to an event via
+    `kojismokydingo.pinning.pin_event`, then the data it loads can
+    never change. Such entries are kept apart from the others, keyed
+    additionally by the pinned event, and are returned without any
+    revalidation.
+
+    :since: 2.3
+    """
+
+    def __init__(self, cache: Optional[ObjectCache] = None):
+        """
+        :param cache: object cache to store entries in. Default, open
+          the default object cache
+        """
+
+        self.cache = cache if cache is not None else ObjectCache()
+
+        # {hub: event_id}
+        self._events: Dict[str, int] = {}
+
+        # {(hub, tag_id): [tag_id, parent_id, ...]}
+        self._chains: Dict[Any, List[int]] = {}
+
+
+    def event_id(self, session) -> int:
+        """
+        The ID of an event no later than any data loaded from the hub
+        after this is first invoked. Fetched once per hub. If the
+        session is pinned, this is the pinned event.
+
+        :param session: an active koji client session
+        """
+
+        pinned = get_pinned_event(session)
+        if pinned is not None:
+            return pinned
+
+        hub = session.baseurl
+        found = self._events.get(hub)
+        if found is None:
+            found = self._events[hub] = session.getLastEvent()["id"]
+        return found
+
+
+    def load(
+            self,
+            session,
+            call: str,
+            tag_ids: Iterable[int]) -> Dict[int, Any]:
+        """
+        The stored data for any of the given tags whose entries are
+        still valid.
+
+        :param session: an active koji client session
+
+        :param call: the name of the call the data was loaded by
+
+        :param tag_ids: the tags to find data for
+
+        :returns: dict mapping the tag IDs to their data
+        """
+
+        pinned = get_pinned_event(session)
+        if pinned is not None:
+            stored = self.cache.load(session.baseurl,
+                                     f"sift:{call}@{pinned}", tag_ids)
+            return {tid: entry["data"] for tid, entry in stored.items()}
+
+        stored = self.cache.load(session.baseurl, f"sift:{call}", tag_ids)
+        if not stored:
+            return {}
+
+        def changed(tid):
+            entry = stored[tid]
+            return session.tagChangedSinceEvent(entry["event"],
+                                                entry["tags"])
+
+        # a fault is treated the same as the tag having changed
+        return {tid: stored[tid]["data"] for tid, moved in
+                iter_bulk_load(session, changed, stored, err=False)
+                if moved is False}
+
+
+    def _inheritance(
+            self,
+            session,
+            tag_ids: Iterable[int]) -> Dict[int, List[int]]:
+
+        hub = session.baseurl
+        result = {}
+        needed = []
+
+        for tid in tag_ids:
+            chain = self._chains.get((hub, tid))
+            if chain is None:
+                needed.append(tid)
+            else:
+                result[tid] = chain
+
+        fn = session.getFullInheritance
+        for tid, parents in iter_bulk_load(session, fn, needed):
+            chain = [tid]
+            chain.extend(p["parent_id"] for p in parents)
+            result[tid] = self._chains[(hub, tid)] = chain
+
+        return result
+
+
+    def store(
+            self,
+            session,
+            call: str,
+            event: int,
+            items: Dict[int, Any],
+            inherit: bool = True) -> int:
+        """
+        Record the data loaded for the given tags.
+
+        :param session: an active koji client session
+
+        :param call: the name of the call the data was loaded by
+
+        :param event: an event ID from `event_id` which was obtained
+          before the data was loaded
+
+        :param items: mapping of tag IDs to their data
+
+        :param inherit: whether the data was inherited from the
+          parents of each tag, in which case a change to any of those
+          parents will invalidate the entry
+
+        :returns: count of entries stored
+        """
+
+        if not items:
+            return 0
+
+        pinned = get_pinned_event(session)
+        if pinned is not None:
+            entries = ((tid, {"event": pinned, "tags": [tid],
+                              "data": data})
+                       for tid, data in items.items())
+            return self.cache.store(session.baseurl,
+                                    f"sift:{call}@{pinned}", entries)
+
+        if inherit:
+            chains = self._inheritance(session, items)
+        else:
+            chains = {tid: [tid] for tid in items}
+
+        entries = ((tid, {"event": event, "tags": chains[tid],
+                          "data": data})
+                   for tid, data in items.items())
+
+        return self.cache.store(session.baseurl, f"sift:{call}", entries)
+
+
+#
+# The end.
@@ -25,13 +25,15 @@ import operator
 
 from koji import ClientSession
 from operator import itemgetter
-from typing import Any, Callable, Dict, Iterable, List, Set, Tuple, cast
+from threading import RLock
+from typing import (
+    Any, Callable, Dict, Iterable, List, Set, Tuple, cast, )
 
 from . import SifterError, Sieve
-from .. import iter_bulk_load
+from .. import bulk_load_build_rpms, iter_bulk_load
 from ..builds import GAV, latest_maven_builds
 from ..types import (
-    BuildInfo, TagGroupInfo, TagPackageInfo, )
+    BuildInfo, RPMInfo, TagGroupInfo, TagInfo, TagPackageInfo, )
 
 
 __all__ = ("CacheMixin", "ensure_comparison", )
@@ -64,17 +66,162 @@ def ensure_comparison(value: str) -> Callable[[Any, Any], bool]:
         raise SifterError(f"Invalid comparison operator: {value!r}")
 
 
+def _list_packages_call(inherited: bool) -> str:
+    return "list_packages" if inherited else "list_packages_direct"
+
+
 class CacheMixin(Sieve):
     """
     Mixin providing some caching interfaces to various koji calls.
     These will store cached results on the instance's sifter. The
     cache is cleared when the sifter's `reset` method is invoked.
+
+    If the sifter has a `kojismokydingo.sift.cache.TagDataCache`, then
+    the latest builds, package listings, and groups of tags are also
+    kept there between runs.
     """
 
     def _mixin_cache(self, name: str) -> dict:
         return self.sifter.get_cache("*mixin", name)
 
 
+    def _mixin_lock(self, name: str) -> RLock:
+        # held while checking and filling the mixin cache of the same
+        # name, as the prep of sieves may be run from several threads
+        # at once by Sifter.prep_branches. Whichever thread gets there
+        # first does the loading, and the others then find it cached.
+        return self.sifter.get_cache_lock("*mixin", name)
+
+
+    def _tag_data(
+            self,
+            session: ClientSession,
+            call: str,
+            tag_ids: Iterable[int],
+            loadfn: Callable[[int], Any],
+            inherit: bool = True,
+            bulk: bool = True) -> Dict[int, Any]:
+
+        # loads the data for the given tags via loadfn, but first
+        # consults the sifter's tag cache if it has one. The event is
+        # fetched before anything is loaded, so that any change made
+        # while loading will invalidate the stored entries.
+
+        store = self.sifter.tag_cache
+        tag_ids = list(tag_ids)
+
+        found: Dict[int, Any]
+        if store is None:
+            found = {}
+            missing = tag_ids
+        else:
+            found = store.load(session, call, tag_ids)
+            missing = [tid for tid in tag_ids if tid not in found]
+            if missing:
+                event = store.event_id(session)
+
+        if bulk:
+            loaded = dict(iter_bulk_load(session, loadfn, missing))
+        else:
+            loaded = {tid: loadfn(tid) for tid in missing}
+
+        if store is not None and loaded:
+            store.store(session, call, event, loaded, inherit)
+
+        found.update(loaded)
+        return found
+
+
+    def prefetch(
+            self,
+            session: ClientSession,
+            need: str,
+            keys: Iterable[Any]):
+        """
+        Loads the shared data named by need into the mixin caches, for
+        each of the given keys. The known needs are:
+
+        * ``"build_rpms"`` via `bulk_build_rpms`, keyed by build ID
+        * ``"build_tags"`` via `bulk_build_tags`, keyed by build ID
+        * ``"list_packages"`` via `bulk_list_packages`, keyed by tag ID
+        * ``"tag_groups"`` via `bulk_get_tag_groups`, keyed by tag ID
+
+        :since: 2.3
+        """
+
+        if need == "build_rpms":
+            self.bulk_build_rpms(session, keys)
+
+        elif need == "build_tags":
+            self.bulk_build_tags(session, keys)
+
+        elif need == "list_packages":
+            self.bulk_list_packages(session, keys, True)
+
+        elif need == "tag_groups":
+            self.bulk_get_tag_groups(session, keys)
+
+
+    def bulk_build_rpms(
+            self,
+            session: ClientSession,
+            build_ids: Iterable[int]) -> Dict[int, List[RPMInfo]]:
+        """
+        a multicall caching wrapper for
+        `kojismokydingo.bulk_load_build_rpms`
+
+        :since: 2.3
+        """
+
+        with self._mixin_lock("build_rpms"):
+            cache = self._mixin_cache("build_rpms")
+
+            result = {}
+            needed = []
+
+            for bid in build_ids:
+                if bid in cache:
+                    result[bid] = cache[bid]
+                else:
+                    needed.append(bid)
+
+            if needed:
+                for bid, rpms in bulk_load_build_rpms(session, needed).items():
+                    result[bid] = cache[bid] = rpms
+
+            return result
+
+
+    def bulk_build_tags(
+            self,
+            session: ClientSession,
+            build_ids: Iterable[int]) -> Dict[int, List[TagInfo]]:
+        """
+        a multicall caching wrapper for ``session.listTags`` by build
+
+        :since: 2.3
+        """
+
+        with self._mixin_lock("build_tags"):
+            cache = self._mixin_cache("build_tags")
+
+            result = {}
+            needed = []
+
+            for bid in build_ids:
+                if bid in cache:
+                    result[bid] = cache[bid]
+                else:
+                    needed.append(bid)
+
+            if needed:
+                fn = lambda i: session.listTags(build=i)
+                for bid, tags in iter_bulk_load(session, fn, needed):
+                    result[bid] = cache[bid] = tags
+
+            return result
+
+
     def latest_builds(
             self,
             session: ClientSession,
@@ -84,16 +231,53 @@ class CacheMixin(Sieve):
         a caching wrapper for ``session.getLatestBuilds``
         """
 
-        cache = self._mixin_cache("latest_builds")
+        with self._mixin_lock("latest_builds"):
+            cache = self._mixin_cache("latest_builds")
 
-        key = (tag_id, inherit)
-        found = cache.get(key)
+            key = (tag_id, inherit)
+            found = cache.get(key)
 
-        if found is None:
-            found = session.getLatestBuilds(tag_id)
-            cache[key] = found
+            if found is None:
+                # getLatestBuilds always follows inheritance
+                loaded = self._tag_data(session, "latest_builds", (tag_id, ),
+                                        session.getLatestBuilds, bulk=False)
+                found = cache[key] = loaded[tag_id]
 
-        return found
+            return found
+
+
+    def bulk_latest_builds(
+            self,
+            session: ClientSession,
+            tag_ids: Iterable[int],
+            inherit: bool = True) -> Dict[int, List[BuildInfo]]:
+        """
+        a multicall caching wrapper for ``session.getLatestBuilds``.
+        Shares a cache with `latest_builds`
+
+        :since: 2.3
+        """
+
+        with self._mixin_lock("latest_builds"):
+            cache = self._mixin_cache("latest_builds")
+
+            result = {}
+            needed = []
+
+            for tid in tag_ids:
+                found = cache.get((tid, inherit))
+                if found is None:
+                    needed.append(tid)
+                else:
+                    result[tid] = found
+
+            if needed:
+                loaded = self._tag_data(session, "latest_builds", needed,
+                                        session.getLatestBuilds)
+                for tid, found in loaded.items():
+                    result[tid] = cache[(tid, inherit)] = found
+
+            return result
 
 
     def latest_build_ids(
@@ -106,16 +290,17 @@ class CacheMixin(Sieve):
         set containing only the build IDs
         """
 
-        cache = self._mixin_cache("latest_build_ids")
+        with self._mixin_lock("latest_build_ids"):
+            cache = self._mixin_cache("latest_build_ids")
 
-        key = (tag_id, inherit)
-        found = cache.get(key)
+            key = (tag_id, inherit)
+            found = cache.get(key)
 
-        if found is None:
-            blds = self.latest_builds(session, tag_id, inherit)
-            found = cache[key] = set(map(itemgetter("id"), blds))
+            if found is None:
+                blds = self.latest_builds(session, tag_id, inherit)
+                found = cache[key] = set(map(itemgetter("id"), blds))
 
-        return found
+            return found
 
 
     def latest_builds_by_name(
@@ -128,16 +313,17 @@ class CacheMixin(Sieve):
         mapping the build names to the build info
         """
 
-        cache = self._mixin_cache("latest_builds_by_name")
+        with self._mixin_lock("latest_builds_by_name"):
+            cache = self._mixin_cache("latest_builds_by_name")
 
-        key = (tag_id, inherit)
-        found = cache.get(key)
+            key = (tag_id, inherit)
+            found = cache.get(key)
 
-        if found is None:
-            blds = self.latest_builds(session, tag_id, inherit)
-            found = cache[key] = {b["name"]: b for b in blds}
+            if found is None:
+                blds = self.latest_builds(session, tag_id, inherit)
+                found = cache[key] = {b["name"]: b for b in blds}
 
-        return found
+            return found
 
 
     def latest_maven_builds(
@@ -149,16 +335,17 @@ class CacheMixin(Sieve):
         a caching wrapper for `kojismokydingo.builds.latest_maven_builds`
         """
 
-        cache = self._mixin_cache("latest_maven_builds")
+        with self._mixin_lock("latest_maven_builds"):
+            cache = self._mixin_cache("latest_maven_builds")
 
-        key = (tag_id, inherit)
-        found = cache.get(key)
+            key = (tag_id, inherit)
+            found = cache.get(key)
 
-        if found is None:
-            found = latest_maven_builds(session, tag_id, inherit=inherit)
-            cache[key] = found
+            if found is None:
+                found = latest_maven_builds(session, tag_id, inherit=inherit)
+                cache[key] = found
 
-        return found
+            return found
 
 
     def latest_maven_build_ids(
@@ -171,16 +358,17 @@ class CacheMixin(Sieve):
         which returns a set containing only the build IDs
         """
 
-        cache = self._mixin_cache("latest_maven_build_ids")
+        with self._mixin_lock("latest_maven_build_ids"):
+            cache = self._mixin_cache("latest_maven_build_ids")
 
-        key = (tag_id, inherit)
-        found = cache.get(key)
+            key = (tag_id, inherit)
+            found = cache.get(key)
 
-        if found is None:
-            blds = self.latest_maven_builds(session, tag_id, inherit)
-            found = cache[key] = set(map(itemgetter("id"), blds))
+            if found is None:
+                blds = self.latest_maven_builds(session, tag_id, inherit)
+                found = cache[key] = set(map(itemgetter("id"), blds))
 
-        return found
+            return found
 
 
     def bulk_list_packages(
@@ -195,23 +383,28 @@ class CacheMixin(Sieve):
         `allowed_packages` and `blocked_packages`)
         """
 
-        cache = cast(Dict[Tuple[int, bool], List[TagPackageInfo]],
-                     self._mixin_cache("list_packages"))
+        with self._mixin_lock("list_packages"):
+            cache = cast(Dict[Tuple[int, bool], List[TagPackageInfo]],
+                         self._mixin_cache("list_packages"))
 
-        result: Dict[int, List[TagPackageInfo]] = {}
-        needed = []
+            result: Dict[int, List[TagPackageInfo]] = {}
+            needed = []
 
-        for tid in tag_ids:
-            if (tid, inherited) not in cache:
-                needed.append(tid)
-            else:
-                result[tid] = cache[(tid, inherited)]
+            for tid in tag_ids:
+                if (tid, inherited) not in cache:
+                    needed.append(tid)
+                else:
+                    result[tid] = cache[(tid, inherited)]
 
-        fn = lambda i: session.listPackages(i, inherited=inherited)
-        for tid, pkgs in iter_bulk_load(session, fn, needed):
-            result[tid] = cache[(tid, inherited)] = pkgs
+            if needed:
+                fn = lambda i: session.listPackages(i, inherited=inherited)
+                call = _list_packages_call(inherited)
+                loaded = self._tag_data(session, call, needed, fn,
+                                        inherit=inherited)
+                for tid, pkgs in loaded.items():
+                    result[tid] = cache[(tid, inherited)] = pkgs
 
-        return result
+            return result
 
 
     def list_packages(
@@ -223,16 +416,20 @@ class CacheMixin(Sieve):
         a caching wrapper for ``session.listPackages``
         """
 
-        cache = self._mixin_cache("list_packages")
+        with self._mixin_lock("list_packages"):
+            cache = self._mixin_cache("list_packages")
 
-        key = (tag_id, inherited)
-        found = cache.get(key)
+            key = (tag_id, inherited)
+            found = cache.get(key)
 
-        if found is None:
-            found = cache[key] = session.listPackages(tag_id,
-                                                      inherited=inherited)
+            if found is None:
+                fn = lambda i: session.listPackages(i, inherited=inherited)
+                call = _list_packages_call(inherited)
+                loaded = self._tag_data(session, call, (tag_id, ), fn,
+                                        inherit=inherited, bulk=False)
+                found = cache[key] = loaded[tag_id]
 
-        return found
+            return found
 
 
     def allowed_packages(
@@ -245,19 +442,20 @@ class CacheMixin(Sieve):
         containing only the package names which are not blocked.
         """
 
-        cache = self._mixin_cache("allowed_packages")
+        with self._mixin_lock("allowed_packages"):
+            cache = self._mixin_cache("allowed_packages")
 
-        key = (tag_id, inherited)
-        found = cache.get(key)
+            key = (tag_id, inherited)
+            found = cache.get(key)
 
-        if found is None:
-            found = cache[key] = set()
+            if found is None:
+                found = cache[key] = set()
 
-            for pkg in self.list_packages(session, tag_id, inherited):
-                if not pkg["blocked"]:
-                    found.add(pkg["package_name"])
+                for pkg in self.list_packages(session, tag_id, inherited):
+                    if not pkg["blocked"]:
+                        found.add(pkg["package_name"])
 
-        return found
+            return found
 
 
     def blocked_packages(
@@ -270,19 +468,20 @@ class CacheMixin(Sieve):
         containing only the package names which are blocked.
         """
 
-        cache = self._mixin_cache("blocked_packages")
+        with self._mixin_lock("blocked_packages"):
+            cache = self._mixin_cache("blocked_packages")
 
-        key = (tag_id, inherited)
-        found = cache.get(key)
+            key = (tag_id, inherited)
+            found = cache.get(key)
 
-        if found is None:
-            found = cache[key] = set()
+            if found is None:
+                found = cache[key] = set()
 
-            for pkg in self.list_packages(session, tag_id, inherited):
-                if pkg["blocked"]:
-                    found.add(pkg["package_name"])
+                for pkg in self.list_packages(session, tag_id, inherited):
+                    if pkg["blocked"]:
+                        found.add(pkg["package_name"])
 
-        return found
+            return found
 
 
     def get_tag_groups(
@@ -293,13 +492,16 @@ class CacheMixin(Sieve):
         a caching wrapper for ``session.getTagGroups``
         """
 
-        cache = self._mixin_cache("groups")
+        with self._mixin_lock("groups"):
+            cache = self._mixin_cache("groups")
 
-        found = cache.get(tag_id)
-        if found is None:
-            found = cache[tag_id] = session.getTagGroups(tag_id)
+            found = cache.get(tag_id)
+            if found is None:
+                loaded = self._tag_data(session, "groups", (tag_id, ),
+                                        session.getTagGroups, bulk=False)
+                found = cache[tag_id] = loaded[tag_id]
 
-        return found
+            return found
 
 
     def bulk_get_tag_groups(
@@ -311,22 +513,25 @@ class CacheMixin(Sieve):
         cache with `get_tag_groups`
         """
 
-        cache = self._mixin_cache("groups")
+        with self._mixin_lock("groups"):
+            cache = self._mixin_cache("groups")
 
-        result = {}
-        needed = []
+            result = {}
+            needed = []
 
-        for tid in tag_ids:
-            if tid in cache:
-                result[tid] = cache[tid]
-            else:
-                needed.append(tid)
+            for tid in tag_ids:
+                if tid in cache:
+                    result[tid] = cache[tid]
+                else:
+                    needed.append(tid)
 
-        fn = session.getTagGroups
-        for tid, found in iter_bulk_load(session, fn, needed):
-            result[tid] = cache[tid] = found
+            if needed:
+                loaded = self._tag_data(session, "groups", needed,
+                                        session.getTagGroups)
+                for tid, found in loaded.items():
+                    result[tid] = cache[tid] = found
 
-        return result
+            return result
 
 
 #
@@ -27,10 +27,12 @@ import re
 from abc import ABCMeta
 from codecs import decode
 from fnmatch import translate
-from functools import partial
+from functools import lru_cache, partial
 from io import StringIO
 from itertools import chain, product
-from typing import Iterable, Iterator, List, Sequence, Sized, Union, cast
+from typing import (
+    Any, Dict, Iterable, Iterator, List, Pattern, Sequence, Set, Sized,
+    Tuple, Union, cast, )
 
 from .. import BadDingo
 
@@ -42,6 +44,7 @@ __all__ = (
     "ItemMatch",
     "ItemPath",
     "Matcher",
+    "MatcherSet",
     "Null",
     "Number",
     "Reader",
@@ -254,6 +257,131 @@ class Glob(Matcher):
             return f"Glob({self._src!r})"
 
 
+# inline flags which apply to the whole of a pattern, rather than to
+# a scoped group within it
+_GLOBAL_FLAGS_RE = re.compile(r"\(\?[aiLmsux]+\)")
+
+
+def _fusable(compiled: Pattern) -> bool:
+    # whether a compiled pattern can be safely combined with others
+    # as one alternative among many. Groups could be renumbered or
+    # collide by name, a verbose pattern may comment out the rest of
+    # the alternation, and global inline flags would leak into the
+    # other alternatives.
+
+    return not (compiled.groups or
+                compiled.flags & re.VERBOSE or
+                _GLOBAL_FLAGS_RE.search(compiled.pattern))
+
+
+class MatcherSet(Matcher):
+    """
+    Matches any value which any one of a number of literals or
+    matchers would match.
+
+    Rather than checking each in turn, `Symbol`, `Number`, and
+    `SymbolGroup` literals are checked with a single set membership
+    test, and `Glob` and `Regex` matchers with the same flags are
+    fused into a single alternation where it is safe to do so. This
+    keeps the cost of checking against a long list of literals
+    roughly constant.
+
+    :since: 2.3
+    """
+
+    def __init__(self, matchers: Iterable[Union[str, Matcher]]):
+        self.matchers = tuple(matchers)
+
+        literals: Set[Union[int, str]] = set()
+        numbers = False
+        null = False
+        others: List[Matcher] = []
+
+        # compiled patterns to fuse, keyed by whether they're used
+        # via match (globs) or search (regexes), and their flags
+        fusing: Dict[Tuple[bool, int], List[Pattern]] = {}
+
+        for matcher in self.matchers:
+            if isinstance(matcher, SymbolGroup):
+                for sym in matcher:
+                    if isinstance(sym, Number):
+                        numbers = True
+                        literals.add(int(sym))
+                    else:
+                        literals.add(str(sym))
+
+            elif isinstance(matcher, Number):
+                numbers = True
+                literals.add(int(matcher))
+
+            elif isinstance(matcher, str):
+                literals.add(str(matcher))
+
+            elif isinstance(matcher, Null):
+                null = True
+
+            elif isinstance(matcher, (Glob, Regex)) and \
+                    _fusable(matcher._re):
+                compiled = matcher._re
+                key = (isinstance(matcher, Glob), compiled.flags)
+                fusing.setdefault(key, []).append(compiled)
+
+            else:
+                others.append(matcher)
+
+        patterns = []
+        for (use_match, flags), found in fusing.items():
+            if len(found) == 1:
+                compiled = found[0]
+            else:
+                src = "|".join(f"(?:{c.pattern})" for c in found)
+                compiled = re.compile(src, flags)
+            patterns.append((compiled, use_match))
+
+        self._literals = frozenset(literals)
+        self._numbers = numbers
+        self._null = null
+        self._patterns = tuple(patterns)
+        self._others = tuple(others)
+
+
+    def __eq__(self, val):
+        if val is None:
+            if self._null:
+                return True
+
+        else:
+            try:
+                if val in self._literals:
+                    return True
+            except TypeError:
+                # unhashable, so can't be equal to any of the literals
+                pass
+            else:
+                if self._numbers and isinstance(val, str) and \
+                   NUMBER_RE == val and int(val) in self._literals:
+                    return True
+
+            for compiled, use_match in self._patterns:
+                try:
+                    if use_match:
+                        found = compiled.match(val)
+                    else:
+                        found = compiled.search(val)
+                except TypeError:
+                    continue
+
+                if found is not None:
+                    return True
+
+        return any(other == val for other in self._others)
+
+
+    def __repr__(self):
+        matchers = ", ".join(map(repr, self.matchers))
+        return f"MatcherSet({matchers})"
+
+
 class Item():
     """
     Seeks path members by an int or str key.
@@ -366,6 +494,7 @@ class Reader(StringIO):
     def __init__(self, source: str):
         # force it to be readonly
         super().__init__(source)
+        self._source = source
 
 
     def peek(self, count: int = 1) -> str:
@@ -497,6 +626,41 @@ def convert_range(rng: str) -> Union[FormattedSeries, List[str]]:
     return FormattedSeries(fmt, range(istart, istop, istep))
 
 
+def _reader_text(reader: StringIO) -> str:
+    # a Reader retains its source, which saves copying the entire
+    # buffer each time a nested parse begins
+    if isinstance(reader, Reader):
+        return reader._source
+    else:
+        return reader.getvalue()
+
+
+@lru_cache(maxsize=None)
+def _expr_scanner(start: str, stop: str) -> Tuple[Pattern, str]:
+    # the master regex for parse_exprs with the given start and stop
+    # characters, and the characters which break a token. Each match
+    # skips any whitespace and comments, and then identifies the next
+    # token by its group name
+
+    # bandit thinks this is a password, haha
+    token_breaks = f"{start}{stop} [;#|/\"\'\n\r\t"  # nosec
+    not_break = "[^" + re.escape(token_breaks) + "\\\\]"
+
+    scanner = re.compile(
+        r"(?:[ \t\r\n]+|[;#][^\n]*\n?)*(?:"
+        r"(?P<path>[\[.])"
+        rf"|(?P<open>{re.escape(start)})"
+        rf"|(?P<close>{re.escape(stop)})"
+        r"|(?P<quote>[\"\'/|])"
+        rf"|(?P<token>(?:{not_break}+|\\[\s\S]?)+)"
+        r"|(?P<eof>\Z))")
+
+    return scanner, token_breaks
+
+
+_TOKEN_ESCAPE_RE = re.compile(r"\\([\s\S]?)")
+
+
 def parse_exprs(
         reader: Reader,
         start: str = None,
@@ -511,7 +675,8 @@ def parse_exprs(
     # worked with del.icio.us for finding and filtering through my
     # bookmarks. Then I used it in Spexy and a form of it is the basis
     # for Sibilant's parser as well. And now it lives here, in Koji
-    # Smoky Dingo.
+    # Smoky Dingo, where it has since learned to scan a token at a
+    # time rather than a character at a time.
 
     if not (start and stop):
         unterminated = True
@@ -520,73 +685,82 @@ def parse_exprs(
     else:
         unterminated = False
 
-    # bandit thinks this is a password, haha
-    token_breaks = f"{start}{stop} [;#|/\"\'\n\r\t"  # nosec
-
-    token: StringIO = None
-    esc: str = None
-
-    srciter = iter(partial(reader.read, 1), '')
-    for c in srciter:
-        if esc:
-            if not token:
-                token = StringIO()
-            if c not in token_breaks:
-                token.write(esc)
-            token.write(c)
-            esc = None
-            continue
+    scanner, token_breaks = _expr_scanner(start, stop)
+    scan = scanner.match
+
+    def unescape(m):
+        # an escaped break is kept without its escape, anything else
+        # keeps its escape for convert_escapes to deal with later. A
+        # trailing escape at the very end is simply dropped.
+        c = m.group(1)
+        return c if (not c or c in token_breaks) else m.group(0)
+
+    text = _reader_text(reader)
+    pos = reader.tell()
+    end = len(text)
+
+    # the lists which are still open, innermost last
+    stack: List[list] = []
+
+    # the parsed form of each token, quote, path, or closed list
+    expr: Any
+
+    while True:
+        found = scan(text, pos)
+        kind = found.lastgroup
+        pos = found.end()
+
+        if kind == "token":
+            val = found.group(kind)
+            if "\\" in val:
+                val = _TOKEN_ESCAPE_RE.sub(unescape, val)
+
+            if text.startswith("[", pos):
+                reader.seek(pos + 1)
+                expr = parse_itempath(reader, val, "[")
+                pos = reader.tell()
+            elif not val:
+                continue
+            elif pos == end and (stack or not unterminated):
+                # about to fail for the missing stop, so don't let
+                # the token complain first
+                continue
+            else:
+                expr = convert_token(val)
 
-        if c == '\\':
-            esc = c
-            continue
+        elif kind == "quote":
+            expr, pos = _parse_quoted(text, pos, found.group(kind))
 
-        elif c == '.' and token is None:
-            yield parse_itempath(reader, None, c)
+        elif kind == "open":
+            stack.append([])
             continue
 
-        elif c == '[':
-            prefix = None
-            if token:
-                prefix = token.getvalue()
-                token = None
-            yield parse_itempath(reader, prefix, c)
-            continue
+        elif kind == "close":
+            if stack:
+                expr = stack.pop()
+            elif unterminated:
+                raise ParserError(f"Unexpected closing {stop!r}")
+            else:
+                reader.seek(pos)
+                return
 
-        elif c in token_breaks:
-            if token:
-                yield convert_token(token.getvalue())
-                token = None
+        elif kind == "path":
+            reader.seek(pos)
+            expr = parse_itempath(reader, None, found.group(kind))
+            pos = reader.tell()
 
         else:
-            if not token:
-                token = StringIO()
-            token.write(c)
-            continue
-
-        # if we get this far, then c is in token_breaks
-
-        if c in ';#':
-            # comments run to end of line
-            reader.readline()
-
-        elif c == start:
-            yield list(parse_exprs(reader, start, stop))
-
-        elif c == stop:
-            if unterminated:
-                raise ParserError(f"Unexpected closing {c!r}")
-            else:
-                return
+            # eof
+            reader.seek(pos)
+            break
 
-        elif c in '\'\"/|':
-            yield parse_quoted(reader, c)
+        if stack:
+            stack[-1].append(expr)
+        else:
+            reader.seek(pos)
+            yield expr
 
-    if unterminated:
-        # leftovers are therefore allowed
-        if token:
-            yield convert_token(token.getvalue())
-    else:
+    if stack or not unterminated:
         # we shouldn't have reached this
         raise ParserError(f"Unexpected EOF, missing closing {stop!r}")
 
@@ -608,6 +782,9 @@ def convert_escapes(val: str) -> str:
     :param val: source str to decode
     """
 
+    if "\\" not in val:
+        return val
+
     def descape(m):
         return decode(m.group(0), 'unicode-escape')
     return ESCAPE_SEQUENCE_RE.sub(descape, val)
@@ -798,6 +975,63 @@ def parse_index(
 QuotedSpec = Union[Glob, Regex, str]
 
 
+@lru_cache(maxsize=None)
+def _quoted_scanner(quotec: str) -> Pattern:
+    # matches the remainder of a quoted value up to and including the
+    # closing quotec, honoring escapes
+    q = re.escape(quotec)
+    return re.compile(rf"[^{q}\\]*(?:\\[\s\S][^{q}\\]*)*{q}")
+
+
+_QUOTE_ESCAPE_RE = re.compile(r"\\([\s\S])")
+
+_REGEX_FLAGS_RE = re.compile(r"[aiLmsux]*")
+
+
+def _parse_quoted(
+        text: str,
+        pos: int,
+        quotec: str,
+        advanced_escapes: bool = True) -> Tuple[QuotedSpec, int]:
+
+    # the implementation of parse_quoted, working directly from the
+    # source text. Returns the value and the position just after it.
+
+    found = _quoted_scanner(quotec).match(text, pos)
+    if found is None:
+        msg = f"Unterminated matcher: missing closing {quotec!r}"
+        raise ParserError(msg)
+
+    pos = found.end()
+    val = found.group()[:-1]
+
+    if "\\" in val:
+        def unescape(m):
+            c = m.group(1)
+            return m.group(0) if (advanced_escapes and c != quotec) else c
+
+        val = _QUOTE_ESCAPE_RE.sub(unescape, val)
+
+    if advanced_escapes:
+        val = convert_escapes(val)
+
+    if quotec == "/":
+        # hard-coding the flags we support for regex
+        flags = _REGEX_FLAGS_RE.match(text, pos).group()
+        return Regex(val, flags), pos + len(flags)
+
+    elif quotec == "|":
+        # hard-coding that we only support a single flag for glob
+        if text.startswith("i", pos):
+            return Glob(val, ignorecase=True), pos + 1
+        else:
+            return Glob(val), pos
+
+    else:
+        # plain ol' string
+        return val, pos
+
+
 def parse_quoted(
         reader: Reader,
         quotec: str = None,
@@ -837,50 +1071,11 @@ def parse_quoted(
             msg = f"Unterminated matcher: missing closing {quotec!r}"
             raise ParserError(msg)
 
-    token = StringIO()
-    esc: str = None
+    val, pos = _parse_quoted(_reader_text(reader), reader.tell(),
+                             quotec, advanced_escapes)
+    reader.seek(pos)
 
-    srciter = iter(partial(reader.read, 1), '')
-    for c in srciter:
-        if esc:
-            if advanced_escapes and c != quotec:
-                token.write(esc)
-            token.write(c)
-            esc = None
-        elif c == quotec:
-            break
-        elif c == '\\':
-            esc = c
-        else:
-            token.write(c)
-
-    else:
-        msg = f"Unterminated matcher: missing closing {quotec!r}"
-        raise ParserError(msg)
-
-    val = token.getvalue()
-    if advanced_escapes:
-        val = convert_escapes(val)
-
-    if quotec == "/":
-        flags = []
-        # hard-coding the flags we support for regex
-        while reader.peek(1) in "aiLmsux":
-            flags.append(reader.read(1))
-
-        return Regex(val, "".join(flags))
-
-    elif quotec == "|":
-        iflag = False
-        # hard-coding that we only support a single flag for glob
-        if reader.peek(1) == 'i':
-            reader.read(1)
-            iflag = True
-        return Glob(val, ignorecase=iflag)
-
-    else:
-        # plain ol' string
-        return val
+    return val
 
 
 #
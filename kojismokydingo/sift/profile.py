@@ -0,0 +1,342 @@
+# This library is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this library; if not, see <http://www.gnu.org/licenses/>.
+
+
+"""
+Koji Smoky Dingo - Sieve Profiling
+
+Records where the time goes when a `kojismokydingo.sift.Sifter` is
+run, per sieve expression, and presents it as an annotated tree of
+those expressions.
+
+:author: Christopher O'Brien <obriencj@gmail.com>
+:license: GPL v3
+"""
+
+
+import sys
+
+from threading import local
+from time import perf_counter
+from typing import Dict, List, Optional, TextIO, Tuple
+
+from ..metrics import get_metrics
+from . import Logic, Sieve, Sifter
+
+
+__all__ = (
+    "SieveStats",
+    "SifterProfile",
+
+    "enable_profile",
+    "get_profile",
+)
+
+
+class SieveStats():
+    """
+    Accumulated measurements for a single sieve expression. The time
+    and hub calls of an expression include those of any expressions
+    nested within it.
+
+    :since: 2.3
+    """
+
+    def __init__(self):
+        self.calls = 0
+        """ count of times the expression was evaluated """
+
+        self.elapsed = 0.0
+        """ total seconds spent evaluating the expression """
+
+        self.items_in = 0
+        """ total count of info dicts given to the expression """
+
+        self.items_out = 0
+        """ total count of info dicts selected by the expression """
+
+        self.prep_elapsed = 0.0
+        """ total seconds spent in the prep method """
+
+        self.checks = 0
+        """ count of invocations of the check method """
+
+        self.check_elapsed = 0.0
+        """ total seconds spent in the check method """
+
+        self.cache_hits = 0
+        """ count of cache lookups which found an existing cache """
+
+        self.cache_misses = 0
+        """ count of cache lookups which created a new cache """
+
+        self.hub_calls = 0
+        """ count of requests made to the hub """
+
+
+    def annotation(self, hub: bool = True) -> str:
+        """
+        A summary of these measurements, as used by
+        `SifterProfile.report`
+
+        :param hub: include the count of hub calls
+        """
+
+        notes = [f"{self.elapsed:.3f}s",
+                 f"in:{self.items_in}",
+                 f"out:{self.items_out}"]
+
+        if self.prep_elapsed:
+            notes.append(f"prep:{self.prep_elapsed:.3f}s")
+        if self.checks:
+            notes.append(f"check:{self.check_elapsed:.3f}s/{self.checks}")
+        if self.cache_hits or self.cache_misses:
+            notes.append(f"cache:{self.cache_hits}/{self.cache_misses}")
+        if hub:
+            notes.append(f"hub:{self.hub_calls}")
+
+        return " ".join(notes)
+
+
+def _hub_calls(session) -> Optional[int]:
+    metrics = get_metrics(session) if session is not None else None
+    return metrics.total_calls() if metrics is not None else None
+
+
+class SifterProfile():
+    """
+    Collects a `SieveStats` for each sieve expression of a sifter, and
+    for the shared prefetch stage. Use `enable_profile` to attach an
+    instance to a sifter.
+
+    Hub calls are only counted if the session given to the sifter has
+    had `kojismokydingo.metrics.enable_metrics` invoked on it. When
+    the sifter has a concurrency greater than 1, the hub calls counted
+    for an expression may include some made by other expressions
+    being prepared at the same time.
+
+    :since: 2.3
+    """
+
+    def __init__(self, sifter: Sifter):
+        self.sifter = sifter
+
+        self.stats: Dict[Sieve, SieveStats] = {}
+        self.prefetch = SieveStats()
+
+        self.hub = False
+        """ whether the hub calls were counted """
+
+        # the stats of the expressions being evaluated, per thread
+        self._local = local()
+
+        for expr in sifter.sieve_exprs():
+            self._instrument(expr)
+        self._instrument_sifter()
+
+
+    def _stack(self) -> List[SieveStats]:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+
+    def _instrument(self, sieve: Sieve):
+        # shadows the evaluation methods of the sieve with wrappers
+        # set on the instance itself, in the same manner as
+        # enable_metrics
+
+        if sieve in self.stats:
+            return
+
+        stats = self.stats[sieve] = SieveStats()
+        stack = self._stack
+
+        select = sieve.select
+        prep = sieve.prep
+        check = sieve.check
+
+        def _select(session, indexes):
+            stats.calls += 1
+            stats.items_in += len(indexes)
+
+            hub = _hub_calls(session)
+            stack().append(stats)
+            start = perf_counter()
+            try:
+                found = select(session, indexes)
+            finally:
+                stats.elapsed += perf_counter() - start
+                stack().pop()
+                if hub is not None:
+                    self.hub = True
+                    stats.hub_calls += _hub_calls(session) - hub
+
+            stats.items_out += len(found)
+            return found
+
+        def _prep(session, info_dicts):
+            # when invoked outside of select, such as by
+            # Sifter.prep_branches, the hub calls are counted here
+            outer = not stack()
+            hub = _hub_calls(session) if outer else None
+
+            stack().append(stats)
+            start = perf_counter()
+            try:
+                return prep(session, info_dicts)
+            finally:
+                stats.prep_elapsed += perf_counter() - start
+                stack().pop()
+                if hub is not None:
+                    stats.hub_calls += _hub_calls(session) - hub
+
+        def _check(session, info):
+            start = perf_counter()
+            try:
+                return check(session, info)
+            finally:
+                stats.checks += 1
+                stats.check_elapsed += perf_counter() - start
+
+        setattr(sieve, "select", _select)
+        setattr(sieve, "prep", _prep)
+        if check is not None:
+            setattr(sieve, "check", _check)
+
+        for tok in sieve.tokens:
+            if isinstance(tok, Sieve):
+                self._instrument(tok)
+
+
+    def _instrument_sifter(self):
+        sifter = self.sifter
+        stack = self._stack
+        stats = self.prefetch
+
+        prefetch = sifter.prefetch
+        get_cache = sifter.get_cache
+        caches = sifter._cache
+
+        def _prefetch(session, info_dicts):
+            stats.calls += 1
+            stats.items_in += len(info_dicts)
+
+            hub = _hub_calls(session)
+            stack().append(stats)
+            start = perf_counter()
+            try:
+                return prefetch(session, info_dicts)
+            finally:
+                stats.elapsed += perf_counter() - start
+                stack().pop()
+                if hub is not None:
+                    self.hub = True
+                    stats.hub_calls += _hub_calls(session) - hub
+
+        def _get_cache(cachename, key):
+            current = stack()
+            if current:
+                if (cachename, key) in caches:
+                    current[-1].cache_hits += 1
+                else:
+                    current[-1].cache_misses += 1
+            return get_cache(cachename, key)
+
+        sifter.prefetch = _prefetch
+        sifter.get_cache = _get_cache
+
+
+    def _lines(
+            self,
+            sieve: Sieve,
+            depth: int,
+            lines: List[Tuple[str, str]]):
+
+        # mirrors the layout of Sieve.explain
+
+        hub = self.hub
+        note = self.stats[sieve].annotation(hub)
+
+        if isinstance(sieve, Logic):
+            lines.append(("  " * depth + sieve._explain_head(), note))
+            for expr in sieve.order:
+                self._lines(expr, depth + 1, lines)
+
+            text, last = lines[-1]
+            lines[-1] = (text + ")", last)
+
+        else:
+            lines.append(("  " * depth + repr(sieve), note))
+
+
+    def report(
+            self,
+            out: Optional[TextIO] = None) -> None:
+        """
+        Print the measurements as a tree of the sieve expressions, in
+        the order they are evaluated, with each annotated by its
+        `SieveStats`. Cache hits and misses are shown as
+        ``cache:HITS/MISSES``
+
+        :param out: stream to write to. Default, `sys.stderr`
+        """
+
+        if out is None:
+            out = sys.stderr
+
+        lines = [("; prefetch", self.prefetch.annotation(self.hub))]
+        for expr in self.sifter.sieve_exprs():
+            self._lines(expr, 0, lines)
+
+        width = max(len(text) for text, _note in lines)
+        for text, note in lines:
+            print(f"{text:<{width}}  ; {note}", file=out)
+
+
+def get_profile(sifter: Sifter) -> Optional[SifterProfile]:
+    """
+    The profile attached to the sifter by `enable_profile`, or None if
+    there isn't one
+
+    :param sifter: a sifter
+
+    :since: 2.3
+    """
+
+    return vars(sifter).get("__ksd_profile")
+
+
+def enable_profile(sifter: Sifter) -> SifterProfile:
+    """
+    Begin recording a profile of every run of the sifter. If the
+    sifter is already being profiled, its profile is returned
+    unchanged.
+
+    :param sifter: the sifter to profile
+
+    :since: 2.3
+    """
+
+    sifter_vars = vars(sifter)
+
+    found = sifter_vars.get("__ksd_profile")
+    if found is None:
+        found = sifter_vars["__ksd_profile"] = SifterProfile(sifter)
+
+    return found
+
+
+#
+# The end.
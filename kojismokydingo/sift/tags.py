@@ -29,7 +29,7 @@ from operator import itemgetter
 from typing import Dict, Iterable, Optional, List, Type, Union
 
 from . import (
-    DEFAULT_SIEVES,
+    COST_PER_ITEM, DEFAULT_SIEVES,
     IntStrSieve, ItemSieve, MatcherSieve, Sieve, Sifter,
     SymbolSieve, VariadicSieve,
     ensure_int_or_str, ensure_str, ensure_symbol, )
@@ -204,6 +204,9 @@ class TargetSieve(MatcherSieve):
     same principal, but use slightly different queries.
     """
 
+    cost = COST_PER_ITEM
+
+
     @abstractmethod
     def prep_targets(self, session, tagids):
         pass
@@ -285,6 +288,9 @@ class InheritanceSieve(MatcherSieve):
     for the given predicate.
     """
 
+    cost = COST_PER_ITEM
+
+
     @abstractmethod
     def prep_inheritance(self, session, tagids):
         pass
@@ -409,6 +415,9 @@ class HasDescendantSieve(InheritanceSieve):
 
 class NVRSieve(VariadicSieve):
 
+    cost = COST_PER_ITEM
+
+
     def __init__(self, sifter, nvr=None):
         if nvr is not None:
             nvr = ensure_int_or_str(nvr)
@@ -542,6 +551,7 @@ class CompareLatestSieve(Sieve):
     """
 
     name = "compare-latest"
+    cost = COST_PER_ITEM
 
 
     def __init__(self, sifter, pkgname, op='>=', ver='0'):
@@ -603,12 +613,21 @@ class CompareLatestSieve(Sieve):
 
 class PkgListSieve(SymbolSieve, CacheMixin):
 
+    cost = COST_PER_ITEM
+    needs = ("list_packages", )
+
+
     def __init__(self, sifter, pkgname, *pkgnames):
         super().__init__(sifter, pkgname, *pkgnames)
 
 
+    def need_keys(self, need, taginfos):
+        return [tag["id"] for tag in taginfos]
+
+
     def prep(self, session, taginfos):
-        self.bulk_list_packages(session, taginfos, True)
+        tag_ids = self.need_keys("list_packages", taginfos)
+        self.bulk_list_packages(session, tag_ids, True)
 
 
 class PkgAllowedSieve(PkgListSieve):
@@ -686,12 +705,19 @@ class GroupSieve(SymbolSieve, CacheMixin):
     """
 
     name = "group"
+    cost = COST_PER_ITEM
+    needs = ("tag_groups", )
 
 
     def __init__(self, sifter, group, *groups):
         super().__init__(sifter, group, *groups)
 
 
+    def need_keys(self, need, taginfos):
+        return [tag["id"] for tag in taginfos
+                if "group_names" not in self.get_info_cache(tag)]
+
+
     def prep(self, session, taginfos):
 
         needed = {}
@@ -726,6 +752,8 @@ class GroupPkgSieve(SymbolSieve, CacheMixin):
     """
 
     name = "group-pkg"
+    cost = COST_PER_ITEM
+    needs = ("tag_groups", )
 
 
     def __init__(self, sifter, group, pkg, *pkgs, require_all=False):
@@ -734,6 +762,11 @@ class GroupPkgSieve(SymbolSieve, CacheMixin):
         self.require_all = bool(require_all)
 
 
+    def need_keys(self, need, taginfos):
+        return [tag["id"] for tag in taginfos
+                if "group_pkgs" not in self.get_info_cache(tag)]
+
+
     def prep(self, session, taginfos):
 
         needed = {}
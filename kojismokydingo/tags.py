@@ -28,7 +28,7 @@ from typing import Dict, Iterable, List, Optional, Set, Union
 from . import (
     NoSuchTag,
     as_taginfo, as_targetinfo,
-    bulk_load, bulk_load_tags, )
+    bulk_load, bulk_load_tags, invalidate_identity_map, )
 from .common import unique
 from .types import (
     DecoratedTagExtras,
@@ -83,6 +83,8 @@ def ensure_tag(
         session.createTag(name)
     except GenericError:
         pass
+    else:
+        invalidate_identity_map(session, "tag", [name])
 
     return as_taginfo(session, name)
 
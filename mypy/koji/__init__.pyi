@@ -33,7 +33,7 @@ from datetime import datetime
 from typing import (
     Any, Dict, Generic, Iterable, List, Optional, Tuple,
     TypedDict, TypeVar, Union, Set, overload, )
-from xmlrpc.client import DateTime
+from xmlrpc.client import DateTime, ExpatParser, Unmarshaller
 
 from kojismokydingo.types import (
     ArchiveInfo, ArchiveTypeInfo, BuildInfo, BuildrootInfo, BuildState,
@@ -160,9 +160,16 @@ class TagError(GenericError):
 class ClientSession:
 
     baseurl: str
+    logged_in: bool
     multicall: "MultiCallHack"
     opts: Dict[str, Any]
 
+    # the underlying requests.Session, or None if not yet connected
+    rsession: Any
+
+    # the calls recorded while multicall is enabled
+    _calls: List[Dict[str, Any]]
+
     @property
     def hub_version(self) -> Tuple[int, ...]:
         """
@@ -184,6 +191,34 @@ class ClientSession:
             sinfo: Optional[Dict[str, Any]] = None):
         ...
 
+    def _callMethod(
+            self,
+            name: str,
+            args: Tuple[Any, ...],
+            kwargs: Optional[Dict[str, Any]] = None,
+            retry: bool = True) -> Any:
+        ...
+
+    def _prepCall(
+            self,
+            name: str,
+            args: Tuple[Any, ...],
+            kwargs: Optional[Dict[str, Any]] = None) -> \
+            Tuple[str, List[Tuple[str, str]], bytes]:
+        ...
+
+    def _read_xmlrpc_response(
+            self,
+            response: Any) -> Any:
+        ...
+
+    def callMethod(
+            self,
+            name: str,
+            *args: Any,
+            **opts: Any) -> Any:
+        ...
+
     def count(
             self,
             methodName: str,
@@ -321,6 +356,12 @@ class ClientSession:
         """
         ...
 
+    def getLastEvent(
+            self,
+            before: Optional[int] = None,
+            strict: bool = True) -> Dict[str, Any]:
+        ...
+
     def getLastHostUpdate(
             self,
             hostID: int,
@@ -770,7 +811,7 @@ class Enum(dict):
         ...
 
 
-class Fault:
+class Fault(Exception):
     def __init__(
             self,
             faultCode: int,
@@ -937,6 +978,12 @@ def convertFault(fault: Fault) -> GenericError:
     ...
 
 
+def getparser(
+        use_datetime: bool = False,
+        use_builtin_types: bool = False) -> Tuple[ExpatParser, Unmarshaller]:
+    ...
+
+
 def daemonize() -> None:
     ...
 
@@ -949,6 +996,12 @@ def dump_json(
     ...
 
 
+def encode_args(
+        *args: Any,
+        **opts: Any) -> Tuple[Any, ...]:
+    ...
+
+
 def ensuredir(
         directory: str) -> None:
     ...
@@ -14,6 +14,7 @@
 
 import koji
 
+from time import sleep
 from unittest import TestCase
 from unittest.mock import MagicMock, PropertyMock, patch
 
@@ -21,7 +22,11 @@ from kojismokydingo import (
     BadDingo, FeatureUnavailable,
     NoSuchBuild, NoSuchTag, NoSuchTarget, NoSuchUser,
     as_buildinfo, as_taginfo, as_targetinfo, as_userinfo,
-    bulk_load, iter_bulk_load,
+    bulk_load, bulk_load_builds, bulk_load_tags, bulk_load_tasks,
+    enable_identity_map, get_bulk_chunker, get_bulk_concurrency,
+    get_bulk_saved, invalidate_identity_map,
+    iter_bulk_load, iter_bulk_load_stream,
+    set_bulk_chunking, set_bulk_concurrency,
     version_check, version_require, )
 
 
@@ -78,6 +83,223 @@ class TestIterBulkLoad(TestCase):
                 self.assertEqual(call['params'], (i + offset,))
 
 
+class TestIterBulkLoadConcurrent(TestCase):
+
+    def setUp(self):
+        self.prep = patch('koji.ClientSession._prepCall').start()
+        self.send = patch('koji.ClientSession._sendCall').start()
+        self.session = koji.ClientSession('FAKE_URL')
+
+        # we pass the multicall list of calls through as the request,
+        # so that the send can produce results based on the params
+        def do_prep(name, args, kwargs):
+            self.assertEqual(name, "multiCall")
+            return (None, None, args[0])
+
+        self.prep.side_effect = do_prep
+
+
+    def tearDown(self):
+        patch.stopall()
+
+
+    def fault(self, code=koji.GenericError.faultCode, msg="ohnoes"):
+        return {"faultCode": code, "faultString": msg}
+
+
+    def test_ordering(self):
+
+        # the earlier chunks will take longer to come back than the
+        # later ones, but the results should still be in key order
+        def do_send(handler, headers, calls):
+            first = calls[0]['params'][0]
+            sleep(0.01 * (25 - first) / 5)
+            return [[100 + c['params'][0]] for c in calls]
+
+        self.send.side_effect = do_send
+
+        x = iter_bulk_load(self.session, self.session.ImpossibleDream,
+                           range(0, 25), True, size=5, concurrency=3)
+        x = list(x)
+
+        self.assertEqual(x, list(zip(range(0, 25), range(100, 125))))
+        self.assertEqual(self.prep.call_count, 5)
+        self.assertEqual(self.send.call_count, 5)
+
+        # the original session never sent anything itself, and was
+        # left out of multicall mode
+        self.assertFalse(self.session.multicall)
+        self.assertEqual(self.session._calls, [])
+
+
+    def test_session_default(self):
+        self.assertEqual(get_bulk_concurrency(self.session), 1)
+
+        set_bulk_concurrency(self.session, 4)
+        self.assertEqual(get_bulk_concurrency(self.session), 4)
+
+        def do_send(handler, headers, calls):
+            return [[{"id": c['params'][0], "nvr": "x"}] for c in calls]
+
+        self.send.side_effect = do_send
+
+        res = bulk_load_builds(self.session, range(0, 50), size=10)
+        self.assertEqual(list(res), list(range(0, 50)))
+        self.assertEqual([b["id"] for b in res.values()], list(range(0, 50)))
+        self.assertEqual(self.send.call_count, 5)
+
+        set_bulk_concurrency(self.session, 0)
+        self.assertEqual(get_bulk_concurrency(self.session), 1)
+
+
+    def test_err(self):
+        def do_send(handler, headers, calls):
+            return [self.fault() if c['params'][0] == 7
+                    else [c['params'][0]] for c in calls]
+
+        self.send.side_effect = do_send
+
+        res = iter_bulk_load(self.session, self.session.ImpossibleDream,
+                             range(0, 20), err=False, size=5,
+                             concurrency=2)
+        res = dict(res)
+        self.assertEqual(len(res), 20)
+        self.assertEqual(res[7], None)
+        self.assertEqual(res[8], 8)
+
+        res = iter_bulk_load(self.session, self.session.ImpossibleDream,
+                             range(0, 20), err=True, size=5,
+                             concurrency=2)
+        self.assertEqual(next(res), (0, 0))
+        self.assertRaises(koji.GenericError, list, res)
+
+
+    def test_stream(self):
+        consumed = []
+
+        def keys():
+            for key in range(0, 50):
+                consumed.append(key)
+                yield key
+
+        def do_send(handler, headers, calls):
+            return [[100 + c['params'][0]] for c in calls]
+
+        self.send.side_effect = do_send
+
+        res = iter_bulk_load_stream(self.session,
+                                    self.session.ImpossibleDream,
+                                    keys(), size=5, buffered=2)
+
+        # with two chunks buffered, the first result cannot be
+        # produced until the second chunk has been dispatched
+        self.assertEqual(next(res), (0, 100))
+        self.assertEqual(len(consumed), 10)
+
+        self.assertEqual(list(res)[-1], (49, 149))
+        self.assertEqual(len(consumed), 50)
+        self.assertEqual(self.send.call_count, 10)
+
+
+class TestIterBulkLoadAdaptive(TestCase):
+
+    def setUp(self):
+        self.prep = patch('koji.ClientSession._prepCall').start()
+        self.send = patch('koji.ClientSession._sendCall').start()
+        self.session = koji.ClientSession('FAKE_URL')
+
+        def do_prep(name, args, kwargs):
+            return (None, None, args[0])
+
+        def do_send(handler, headers, calls):
+            return [[c['params'][0]] for c in calls]
+
+        self.prep.side_effect = do_prep
+        self.send.side_effect = do_send
+
+
+    def tearDown(self):
+        patch.stopall()
+
+
+    def sizes(self):
+        return [len(prep[0][1][0]) for prep in self.prep.call_args_list]
+
+
+    def test_disabled(self):
+        self.assertIsNone(get_bulk_chunker(self.session, "getBuild"))
+
+        res = list(iter_bulk_load(self.session, self.session.getBuild,
+                                  range(0, 250)))
+        self.assertEqual(len(res), 250)
+        self.assertEqual(self.sizes(), [100, 100, 50])
+
+
+    def test_method_defaults(self):
+        set_bulk_chunking(self.session, sizes={"ImpossibleDream": 7})
+
+        chunker = get_bulk_chunker(self.session, "getBuild")
+        self.assertEqual(chunker.size, 500)
+        self.assertIs(chunker, get_bulk_chunker(self.session, "getbuild"))
+
+        chunker = get_bulk_chunker(self.session, "ImpossibleDream")
+        self.assertEqual(chunker.size, 7)
+
+        chunker = get_bulk_chunker(self.session, "UnlikelyDream", 33)
+        self.assertEqual(chunker.size, 33)
+
+
+    def test_adaptive(self):
+        set_bulk_chunking(self.session, target=1.0,
+                          sizes={"ImpossibleDream": 10})
+
+        perf = patch('kojismokydingo.perf_counter').start()
+
+        # every multicall appears to take a tenth of a second, so the
+        # chunks should double in size each time
+        perf.side_effect = [0.0, 0.1] * 10
+
+        res = list(iter_bulk_load(self.session,
+                                  self.session.ImpossibleDream,
+                                  range(0, 100)))
+
+        self.assertEqual(res, [(v, v) for v in range(0, 100)])
+        self.assertEqual(self.sizes(), [10, 20, 40, 30])
+
+        # the tuned size is retained for the next bulk load
+        chunker = get_bulk_chunker(self.session, "ImpossibleDream")
+        self.assertEqual(chunker.size, 160)
+
+
+    def test_adaptive_concurrent(self):
+        set_bulk_chunking(self.session, sizes={"ImpossibleDream": 10})
+
+        res = list(iter_bulk_load(self.session,
+                                  self.session.ImpossibleDream,
+                                  range(0, 200), concurrency=3))
+
+        self.assertEqual(res, [(v, v) for v in range(0, 200)])
+        self.assertEqual(sum(self.sizes()), 200)
+        self.assertEqual(self.sizes()[0], 10)
+
+
+    def test_tasks(self):
+        sess = MagicMock()
+        sess.getTaskInfo.side_effect = lambda ids, **kw: [{"id": i}
+                                                          for i in ids]
+
+        set_bulk_chunking(sess, target=1.0, sizes={"getTaskInfo": 4})
+
+        perf = patch('kojismokydingo.perf_counter').start()
+        perf.side_effect = [0.0, 0.1] * 10
+
+        res = bulk_load_tasks(sess, range(0, 20))
+        self.assertEqual(list(res), list(range(0, 20)))
+
+        sizes = [len(c[0][0]) for c in sess.getTaskInfo.call_args_list]
+        self.assertEqual(sizes, [4, 8, 8])
+
+
 class TestBulkLoad(TestCase):
 
 
@@ -154,6 +376,96 @@ class TestBulkLoad(TestCase):
         self.assertRaises(StopIteration, next, res)
 
 
+    def test_iter_bulk_load_dedup(self):
+        data = {val: "dream %i" % val for val in range(0, 10)}
+
+        sess = self.session(data)
+        self.assertEqual(get_bulk_saved(sess), 0)
+
+        keys = [1, 2, 1, 3, 2, 1, 4, 5, 4]
+        res = list(iter_bulk_load(sess, sess.ImpossibleDream, keys, size=2))
+
+        self.assertEqual(res, [(k, data[k]) for k in keys])
+        self.assertEqual([c[0][0] for c in
+                          sess.ImpossibleDream.call_args_list],
+                         [1, 2, 3, 4, 5])
+        self.assertEqual(sess.multiCall.call_count, 3)
+        self.assertEqual(get_bulk_saved(sess), 4)
+
+        # accumulates across loads
+        res = list(iter_bulk_load(sess, sess.ImpossibleDream, [6, 6]))
+        self.assertEqual(res, [(6, data[6]), (6, data[6])])
+        self.assertEqual(get_bulk_saved(sess), 5)
+
+
+    def test_iter_bulk_load_dedup_unhashable(self):
+        data = {1: "one", 2: "two"}
+
+        inputs = []
+
+        def do_call(value):
+            inputs.append(value)
+
+        def do_mc(strict=None):
+            results = [[data[v[0] if isinstance(v, list) else v]]
+                       for v in inputs]
+            inputs[:] = ()
+            return results
+
+        sess = MagicMock()
+        sess.ImpossibleDream.side_effect = do_call
+        sess.multiCall.side_effect = do_mc
+
+        keys = [1, [2], 1, [2]]
+        res = list(iter_bulk_load(sess, sess.ImpossibleDream, keys))
+        self.assertEqual(res, [(1, "one"), ([2], "two"),
+                               (1, "one"), ([2], "two")])
+        self.assertEqual(sess.ImpossibleDream.call_count, 3)
+        self.assertEqual(get_bulk_saved(sess), 1)
+
+
+    def test_iter_bulk_load_stream(self):
+        data = {val: "dream %i" % val for val in range(0, 20)}
+        consumed = []
+
+        def keys():
+            for key in (1, 2, 1, 3, 4, 5, 6):
+                consumed.append(key)
+                yield key
+
+        sess = self.session(data)
+        res = iter_bulk_load_stream(sess, sess.ImpossibleDream,
+                                    keys(), size=3)
+
+        # only the first chunk of keys has been read
+        self.assertEqual(next(res), (1, "dream 1"))
+        self.assertEqual(consumed, [1, 2, 1])
+        self.assertEqual(sess.multiCall.call_count, 1)
+
+        # duplicates are not collapsed when streaming
+        self.assertEqual(next(res), (2, "dream 2"))
+        self.assertEqual(next(res), (1, "dream 1"))
+
+        self.assertEqual([k for k, _v in res], [3, 4, 5, 6])
+        self.assertEqual(sess.ImpossibleDream.call_count, 7)
+        self.assertEqual(sess.multiCall.call_count, 3)
+
+
+    def test_iter_bulk_load_stream_err(self):
+        data = {"1": "one", "2": self.fault(), "3": "three"}
+
+        sess = self.session(data)
+        res = iter_bulk_load_stream(sess, sess.ImpossibleDream,
+                                    iter("123"), err=False)
+        self.assertEqual(list(res), [("1", "one"), ("2", None),
+                                     ("3", "three")])
+
+        sess = self.session(data)
+        res = iter_bulk_load_stream(sess, sess.ImpossibleDream,
+                                    iter("123"), err=True)
+        self.assertRaises(koji.GenericError, list, res)
+
+
     def test_bulk_load(self):
         data = {val: "dream %i" % val for val in range(0, 100)}
         expect = dict(data)
@@ -583,6 +895,124 @@ class TestAsUserinfo(TestCase):
         self.assertEqual(send.call_count, 0)
 
 
+class TestIdentityMap(TestCase):
+
+    TAG = {
+        "id": 1,
+        "name": "example-1.0-build",
+    }
+
+    BUILD = {
+        "id": 10,
+        "nvr": "example-1.0-1",
+    }
+
+
+    def session(self):
+        sess = MagicMock()
+        sess.getKojiVersion.return_value = "1.23"
+        sess.getTag.side_effect = lambda t, **kw: dict(self.TAG)
+        sess.getBuild.side_effect = lambda b: dict(self.BUILD)
+        enable_identity_map(sess)
+        return sess
+
+
+    def test_disabled(self):
+        sess = self.session()
+        enable_identity_map(sess, False)
+
+        as_taginfo(sess, 1)
+        as_taginfo(sess, 1)
+        self.assertEqual(sess.getTag.call_count, 2)
+
+
+    def test_name_and_id(self):
+        sess = self.session()
+
+        first = as_taginfo(sess, "example-1.0-build")
+        self.assertIs(as_taginfo(sess, 1), first)
+        self.assertIs(as_taginfo(sess, "example-1.0-build"), first)
+        self.assertEqual(sess.getTag.call_count, 1)
+
+        first = as_buildinfo(sess, 10)
+        self.assertIs(as_buildinfo(sess, "example-1.0-1"), first)
+        self.assertEqual(sess.getBuild.call_count, 1)
+
+
+    def test_missing(self):
+        sess = self.session()
+        sess.getTag.side_effect = [None, self.TAG]
+
+        self.assertRaises(NoSuchTag, as_taginfo, sess, 1)
+
+        # misses are not remembered
+        self.assertEqual(as_taginfo(sess, 1), self.TAG)
+        self.assertEqual(sess.getTag.call_count, 2)
+
+
+    def test_invalidate(self):
+        sess = self.session()
+
+        first = as_taginfo(sess, 1)
+        as_buildinfo(sess, 10)
+
+        # dropping by name also drops the ID
+        invalidate_identity_map(sess, "tag", ["example-1.0-build"])
+        second = as_taginfo(sess, 1)
+        self.assertIsNot(first, second)
+        self.assertEqual(sess.getTag.call_count, 2)
+
+        invalidate_identity_map(sess, "tag", [second])
+        as_taginfo(sess, "example-1.0-build")
+        self.assertEqual(sess.getTag.call_count, 3)
+
+        as_buildinfo(sess, 10)
+        self.assertEqual(sess.getBuild.call_count, 1)
+
+        invalidate_identity_map(sess)
+        as_taginfo(sess, 1)
+        as_buildinfo(sess, 10)
+        self.assertEqual(sess.getTag.call_count, 4)
+        self.assertEqual(sess.getBuild.call_count, 2)
+
+        # a key which is neither the ID nor the name is dropped too
+        third = as_taginfo(sess, "old-example-build")
+        self.assertIs(as_taginfo(sess, "old-example-build"), third)
+        self.assertEqual(sess.getTag.call_count, 5)
+
+        invalidate_identity_map(sess, "tag", [1])
+        self.assertIsNot(as_taginfo(sess, "old-example-build"), third)
+        self.assertEqual(sess.getTag.call_count, 6)
+
+
+    def test_bulk_load_tags(self):
+        sess = self.session()
+
+        first = as_taginfo(sess, 1)
+
+        def do_call(tag, **kw):
+            inputs.append(tag)
+
+        def do_mc(strict=None):
+            res = [[{"id": t, "name": f"tag-{t}"}] for t in inputs]
+            inputs[:] = ()
+            return res
+
+        inputs = []
+        sess.getTag.side_effect = do_call
+        sess.multiCall.side_effect = do_mc
+
+        res = bulk_load_tags(sess, [2, "example-1.0-build", 3])
+        self.assertEqual(list(res), [2, "example-1.0-build", 3])
+        self.assertIs(res["example-1.0-build"], first)
+        self.assertEqual(res[3]["name"], "tag-3")
+
+        # only the unknown tags were loaded, and now they're known
+        self.assertEqual(sess.getTag.call_count, 3)
+        self.assertIs(as_taginfo(sess, "tag-2"), res[2])
+        self.assertEqual(sess.getTag.call_count, 3)
+
+
 class TestBadDingo(TestCase):
 
     def test_bad_dingo(self):
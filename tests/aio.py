@@ -0,0 +1,258 @@
+# This library is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this library; if not, see <http://www.gnu.org/licenses/>.
+
+
+import asyncio
+
+from koji import ClientSession, GenericError
+from koji.xmlrpcplus import Fault, dumps, loads
+from unittest import TestCase
+
+from kojismokydingo import NoSuchBuild, ReplayClientSession
+from kojismokydingo.aio import (
+    AsyncHubTransport,
+    async_bulk_load, async_bulk_load_builds, async_iter_bulk_load, )
+from kojismokydingo.replay import enable_recording
+
+
+class StandInHub():
+    """
+    Just enough of a koji hub to answer multicalls, served over plain
+    HTTP on a local port. Results are produced by looking up the first
+    parameter of each call in a dict.
+    """
+
+    def __init__(self, data, chunked=False, delay=0):
+        self.data = data
+        self.chunked = chunked
+        self.delay = delay
+
+        self.requests = []
+        self.connections = 0
+        self.active = 0
+        self.max_active = 0
+
+
+    async def start(self):
+        self.server = await asyncio.start_server(self.handle,
+                                                 "127.0.0.1", 0)
+        port = self.server.sockets[0].getsockname()[1]
+        return f"http://127.0.0.1:{port}/kojihub"
+
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+
+    def answer(self, call):
+        key = call["params"][0]
+        if key in self.data:
+            return [self.data[key]]
+        else:
+            return {"faultCode": 1000, "faultString": f"no such {key}"}
+
+
+    async def handle(self, reader, writer):
+        self.connections += 1
+
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line == b"\r\n":
+                    break
+                name, _, value = line.decode().partition(":")
+                headers[name.strip().lower()] = value.strip()
+
+            body = await reader.readexactly(int(headers["content-length"]))
+            params, method = loads(body)
+            self.requests.append((method, headers, params))
+
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+            await asyncio.sleep(self.delay)
+            self.active -= 1
+
+            if method == "multiCall":
+                result = dumps(([self.answer(c) for c in params[0]], ),
+                               methodresponse=True)
+            else:
+                result = dumps(Fault(1000, "unsupported"),
+                               methodresponse=True)
+
+            result = result.encode()
+            if self.chunked:
+                half = len(result) // 2
+                payload = b"".join((b"%x\r\n" % half, result[:half], b"\r\n",
+                                    b"%x\r\n" % (len(result) - half),
+                                    result[half:], b"\r\n0\r\n\r\n"))
+                head = b"Transfer-Encoding: chunked\r\n"
+            else:
+                payload = result
+                head = b"Content-Length: %i\r\n" % len(result)
+
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/xml\r\n" +
+                         head + b"\r\n" + payload)
+            await writer.drain()
+
+        writer.close()
+
+
+class TestAsyncBulkLoad(TestCase):
+
+    def run_hub(self, hub, work):
+        # runs the stand-in hub and the work against a session
+        # pointed at it, in a fresh event loop
+
+        async def main():
+            url = await hub.start()
+            try:
+                return await work(ClientSession(url))
+            finally:
+                await hub.stop()
+
+        loop = asyncio.new_event_loop()
+        try:
+            return loop.run_until_complete(main())
+        finally:
+            loop.close()
+
+
+    def test_iter_bulk_load(self):
+        hub = StandInHub({i: i * 10 for i in range(0, 25)})
+
+        async def work(session):
+            res = async_iter_bulk_load(session, session.getBuild,
+                                       range(0, 25), size=10)
+            return [found async for found in res]
+
+        res = self.run_hub(hub, work)
+        self.assertEqual(res, [(i, i * 10) for i in range(0, 25)])
+
+        # three multicalls, all over a single kept-alive connection
+        self.assertEqual(len(hub.requests), 3)
+        self.assertEqual(hub.connections, 1)
+
+        method, headers, params = hub.requests[0]
+        self.assertEqual(method, "multiCall")
+        self.assertEqual(len(params[0]), 10)
+        self.assertEqual(params[0][0]["methodName"], "getBuild")
+
+
+    def test_concurrency(self):
+        hub = StandInHub({i: str(i) for i in range(0, 40)},
+                         chunked=True, delay=0.02)
+
+        async def work(session):
+            return await async_bulk_load(session, session.getBuild,
+                                         range(0, 40), size=5,
+                                         concurrency=4)
+
+        res = self.run_hub(hub, work)
+        self.assertEqual(list(res), list(range(0, 40)))
+        self.assertEqual(res[39], "39")
+
+        self.assertEqual(len(hub.requests), 8)
+        self.assertEqual(hub.connections, 4)
+        self.assertEqual(hub.max_active, 4)
+
+
+    def test_abandoned(self):
+        hub = StandInHub({i: i for i in range(0, 40)}, delay=0.02)
+
+        async def work(session):
+            res = async_iter_bulk_load(session, session.getBuild,
+                                       range(0, 40), size=5,
+                                       concurrency=4)
+            first = await res.__anext__()
+
+            # closing early cancels the multicalls still in flight
+            await res.aclose()
+            return first
+
+        self.assertEqual(self.run_hub(hub, work), (0, 0))
+        self.assertLess(len(hub.requests), 8)
+
+
+    def test_err(self):
+        hub = StandInHub({"foo-1-1": {"id": 1}})
+
+        async def work(session):
+            res = await async_bulk_load(session, session.getBuild,
+                                        ["foo-1-1", "bar-1-1"], err=False)
+            self.assertEqual(res, {"foo-1-1": {"id": 1}, "bar-1-1": None})
+
+            with self.assertRaises(GenericError):
+                await async_bulk_load(session, session.getBuild,
+                                      ["foo-1-1", "bar-1-1"])
+
+            # a None result for a build is not a fault, but is still
+            # an error for bulk_load_builds
+            hub.data["bar-1-1"] = None
+            with self.assertRaises(NoSuchBuild):
+                await async_bulk_load_builds(session,
+                                             ["foo-1-1", "bar-1-1"])
+
+            res = await async_bulk_load_builds(session,
+                                               ["foo-1-1", "bar-1-1"],
+                                               err=False)
+            self.assertEqual(res["bar-1-1"], None)
+
+        self.run_hub(hub, work)
+
+
+    def test_recording(self):
+        hub = StandInHub({"foo-1-1": {"id": 1}})
+
+        async def work(session):
+            recording = enable_recording(session)
+            await async_bulk_load(session, session.getBuild,
+                                  ["foo-1-1", "bar-1-1"], err=False)
+            return recording
+
+        recording = self.run_hub(hub, work)
+        self.assertEqual(len(recording.entries), 2)
+
+        # each call within the multicall was recorded on its own
+        replay = ReplayClientSession(recording)
+        self.assertEqual(replay.getBuild("foo-1-1"), {"id": 1})
+        with self.assertRaises(GenericError):
+            replay.getBuild("bar-1-1")
+
+
+    def test_transport_fault(self):
+        hub = StandInHub({})
+
+        async def work(session):
+            # the stand-in hub only knows multiCall, so this will be
+            # answered with a fault
+            prep = session._prepCall
+            session._prepCall = lambda *a: prep("getLoggedInUser", ())
+
+            transport = AsyncHubTransport(session)
+            try:
+                with self.assertRaises(GenericError):
+                    await transport.multicall([])
+            finally:
+                await transport.close()
+
+        self.run_hub(hub, work)
+
+
+#
+# The end.
@@ -0,0 +1,222 @@
+# This library is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this library; if not, see <http://www.gnu.org/licenses/>.
+
+
+from os.path import exists, join
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+from kojismokydingo import (
+    bulk_load_build_rpms, bulk_load_buildroots, bulk_load_builds,
+    get_object_cache, set_object_cache, )
+from kojismokydingo.cache import ObjectCache
+from kojismokydingo.types import BuildrootState, BuildrootType, BuildState
+
+
+HUB = "https://koji.example.com/kojihub"
+
+
+class TestObjectCache(TestCase):
+
+    def test_store_load(self):
+        with ObjectCache(":memory:") as cache:
+            self.assertEqual(cache.load(HUB, "build", [1, 2]), {})
+
+            stored = cache.store(HUB, "build", [(1, {"id": 1}),
+                                                ("foo-1-1", {"id": 1}),
+                                                (2, {"id": 2})])
+            self.assertEqual(stored, 3)
+
+            found = cache.load(HUB, "build", [1, 2, 3, "foo-1-1"])
+            self.assertEqual(found, {1: {"id": 1},
+                                     2: {"id": 2},
+                                     "foo-1-1": {"id": 1}})
+
+            # int and str keys are distinct
+            self.assertEqual(cache.load(HUB, "build", ["1"]), {})
+
+            # namespaces and kinds are distinct
+            self.assertEqual(cache.load("other", "build", [1]), {})
+            self.assertEqual(cache.load(HUB, "buildroot", [1]), {})
+
+            self.assertEqual(cache.contains(HUB, "build", [1, 3]), {1})
+
+
+    def test_unserializable(self):
+        with ObjectCache(":memory:") as cache:
+            stored = cache.store(HUB, "build", [(1, object()),
+                                                (2, {"id": 2})])
+            self.assertEqual(stored, 1)
+            self.assertEqual(cache.contains(HUB, "build", [1, 2]), {2})
+
+
+    def test_evict(self):
+        with ObjectCache(":memory:", max_bytes=100) as cache:
+            value = "x" * 18  # 20 bytes as JSON
+
+            cache.store(HUB, "build", [(i, value) for i in range(0, 5)])
+            self.assertEqual(cache.size(), 100)
+
+            # touch the first, so that the second is the oldest
+            cache.load(HUB, "build", [0])
+
+            cache.store(HUB, "build", [(5, value)])
+            self.assertEqual(cache.size(), 80)
+
+            found = cache.contains(HUB, "build", range(0, 6))
+            self.assertEqual(found, {0, 3, 4, 5})
+
+
+    def test_clear(self):
+        with ObjectCache(":memory:") as cache:
+            cache.store(HUB, "build", [(1, "a")])
+            cache.store(HUB, "buildroot", [(1, "b")])
+            cache.store("other", "build", [(1, "c")])
+
+            cache.clear(HUB, "build")
+            self.assertEqual(cache.contains(HUB, "build", [1]), set())
+            self.assertEqual(cache.contains(HUB, "buildroot", [1]), {1})
+
+            cache.clear()
+            self.assertEqual(cache.size(), 0)
+
+
+    def test_persistent(self):
+        with TemporaryDirectory() as tmpdir:
+            path = join(tmpdir, "nested", "objects.sqlite")
+
+            with ObjectCache(path) as cache:
+                cache.store(HUB, "build", [(1, {"id": 1})])
+
+            self.assertTrue(exists(path))
+
+            with ObjectCache(path) as cache:
+                found = cache.load(HUB, "build", [1])
+                self.assertEqual(found, {1: {"id": 1}})
+
+
+class TestCachedBulkLoad(TestCase):
+
+    def session(self, data):
+        inputs = []
+
+        def do_call(*args, **kwds):
+            inputs.append(args[0] if args else kwds)
+
+        def do_mc(strict=None):
+            results = [[data[i]] if i in data else None for i in inputs]
+            inputs[:] = ()
+            return results
+
+        sess = MagicMock()
+        sess.baseurl = HUB
+
+        sess.getBuild.side_effect = do_call
+        sess.getBuildroot.side_effect = do_call
+        sess.listRPMs.side_effect = do_call
+        sess.multiCall.side_effect = do_mc
+
+        set_object_cache(sess, self.cache)
+
+        return sess
+
+
+    def setUp(self):
+        self.cache = ObjectCache(":memory:")
+
+
+    def tearDown(self):
+        self.cache.close()
+
+
+    def test_set_object_cache(self):
+        sess = MagicMock()
+        self.assertIsNone(get_object_cache(sess))
+
+        set_object_cache(sess, self.cache)
+        self.assertIs(get_object_cache(sess), self.cache)
+
+        set_object_cache(sess, None)
+        self.assertIsNone(get_object_cache(sess))
+
+
+    def test_builds(self):
+        data = {
+            "foo-1-1": {"id": 1, "nvr": "foo-1-1",
+                        "state": BuildState.COMPLETE},
+            "bar-1-1": {"id": 2, "nvr": "bar-1-1",
+                        "state": BuildState.BUILDING},
+        }
+
+        sess = self.session(data)
+        res = bulk_load_builds(sess, ["foo-1-1", "bar-1-1"])
+        self.assertEqual(list(res), ["foo-1-1", "bar-1-1"])
+        self.assertEqual(sess.getBuild.call_count, 2)
+        self.assertEqual(sess.multiCall.call_count, 1)
+
+        # only the complete build was cached, under its NVR and ID
+        found = self.cache.contains(HUB, "build", ["foo-1-1", 1,
+                                                   "bar-1-1", 2])
+        self.assertEqual(found, {"foo-1-1", 1})
+
+        sess = self.session(data)
+        res = bulk_load_builds(sess, ["bar-1-1", "foo-1-1"])
+        self.assertEqual(list(res), ["bar-1-1", "foo-1-1"])
+        self.assertEqual(res["foo-1-1"]["id"], 1)
+        self.assertEqual(res["bar-1-1"]["id"], 2)
+        sess.getBuild.assert_called_once_with("bar-1-1")
+
+        # fully cached, so no calls at all
+        sess = self.session(data)
+        res = bulk_load_builds(sess, [1])
+        self.assertEqual(res[1]["nvr"], "foo-1-1")
+        self.assertEqual(sess.getBuild.call_count, 0)
+        self.assertEqual(sess.multiCall.call_count, 0)
+
+
+    def test_build_rpms(self):
+        self.cache.store(HUB, "build", [(1, {"id": 1})])
+
+        data = {1: [{"id": 100}], 2: [{"id": 200}]}
+
+        sess = self.session(data)
+        res = bulk_load_build_rpms(sess, [1, 2])
+        self.assertEqual(res, data)
+
+        # only the RPMs of the known complete build were cached
+        sess = self.session(data)
+        res = bulk_load_build_rpms(sess, [1, 2])
+        self.assertEqual(res, data)
+        sess.listRPMs.assert_called_once_with(2)
+
+
+    def test_buildroots(self):
+        data = {
+            1: {"id": 1, "state": BuildrootState.EXPIRED,
+                "br_type": BuildrootType.STANDARD},
+            2: {"id": 2, "state": BuildrootState.BUILDING,
+                "br_type": BuildrootType.STANDARD},
+            3: {"id": 3, "state": None,
+                "br_type": BuildrootType.EXTERNAL},
+        }
+
+        sess = self.session(data)
+        bulk_load_buildroots(sess, [1, 2, 3])
+
+        found = self.cache.contains(HUB, "buildroot", [1, 2, 3])
+        self.assertEqual(found, {1, 3})
+
+
+#
+# The end.
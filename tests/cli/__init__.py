@@ -13,13 +13,18 @@
 
 
 from io import StringIO
+from koji import ClientSession
+from os.path import join
 from sys import version_info
+from tempfile import TemporaryDirectory
 from unittest import TestCase
 from unittest.mock import patch
 
+from kojismokydingo import ReplayClientSession
 from kojismokydingo.cli import (
-    SmokyDingo, clean_lines, int_or_str,
-    print_history_results, resplit, space_normalize, tabulate)
+    AnonSmokyDingo, SmokyDingo, clean_lines, iclean_lines, int_or_str,
+    iread_clean_lines, print_history_results, resplit, space_normalize,
+    tabulate)
 
 
 if version_info < (3, 11):
@@ -139,6 +144,63 @@ class TestExpectedEntryPoints(TestCase):
             self.assertTrue(isinstance(cmd_inst, SmokyDingo))
 
 
+class VersionDingo(AnonSmokyDingo):
+
+    def activate(self):
+        # we don't have a hub to connect to
+        pass
+
+
+    def handle(self, options):
+        self.session.getKojiVersion()
+
+
+class TestMetricsSwitch(TestCase):
+
+    def run_dingo(self):
+        session = ClientSession("FAKE_URL")
+        dingo = VersionDingo("version-dingo")
+
+        with patch("koji.ClientSession._sendCall", return_value="1.35"), \
+             patch("sys.stderr", new_callable=StringIO) as err:
+            self.assertEqual(dingo(GOptions(), session, []), 0)
+
+        return err.getvalue()
+
+
+    def test_metrics(self):
+        with patch.dict("os.environ", {"KSD_METRICS": "1"}):
+            report = self.run_dingo()
+
+        self.assertTrue(report.startswith("Hub calls: 1 requests"))
+        self.assertIn("getKojiVersion", report)
+
+
+    def test_no_metrics(self):
+        with patch.dict("os.environ", {"KSD_METRICS": "0"}):
+            self.assertEqual(self.run_dingo(), "")
+
+
+class TestRecordSwitch(TestCase):
+
+    def test_record(self):
+        session = ClientSession("FAKE_URL")
+        dingo = VersionDingo("version-dingo")
+
+        with TemporaryDirectory() as tmpdir:
+            filename = join(tmpdir, "record.gz")
+
+            with patch.dict("os.environ", {"KSD_RECORD": filename}), \
+                 patch("koji.ClientSession._sendCall",
+                       return_value="1.35") as send:
+                self.assertEqual(dingo(GOptions(), session, []), 0)
+                self.assertEqual(send.call_count, 1)
+
+            replay = ReplayClientSession(filename)
+
+        self.assertEqual(replay.getKojiVersion(), "1.35")
+
+
 class TestUtils(TestCase):
 
 
@@ -193,6 +255,38 @@ class TestUtils(TestCase):
         self.assertEqual(clean_lines(expect_2, False), expect_2)
 
 
+    def test_iclean_lines(self):
+        read = []
+
+        def lines():
+            for line in ("  one", "# two", "three # 3", "four"):
+                read.append(line)
+                yield line
+
+        res = iclean_lines(lines())
+        self.assertEqual(read, [])
+        self.assertEqual(next(res), "one")
+        self.assertEqual(next(res), "three")
+        self.assertEqual(len(read), 3)
+        self.assertEqual(list(res), ["four"])
+
+
+    def test_iread_clean_lines(self):
+        with TemporaryDirectory() as tmpdir:
+            filename = join(tmpdir, "nvrs.txt")
+            with open(filename, "wt") as fout:
+                fout.write("foo-1-1\n# comment\n\n  bar-1-1  \n")
+
+            res = iread_clean_lines(filename)
+            self.assertEqual(list(res), ["foo-1-1", "bar-1-1"])
+
+        self.assertEqual(list(iread_clean_lines("")), [])
+
+        with patch("sys.stdin", new=StringIO("baz-1-1\n#\nqux-1-1")):
+            res = iread_clean_lines("-", skip_comments=False)
+            self.assertEqual(list(res), ["baz-1-1", "#", "qux-1-1"])
+
+
     def test_space_normalize(self):
         data = """
         This is a
@@ -22,10 +22,10 @@ from unittest import TestCase
 from unittest.mock import MagicMock, patch
 
 from kojismokydingo.common import (
-    chunkseq, escapable_replace, fnmatches,
+    AdaptiveChunker, chunkseq, escapable_replace, fnmatches,
     find_config_dirs, find_config_files, get_plugin_config,
-    globfilter, load_full_config, load_plugin_config, merge_extend,
-    parse_datetime, unique, update_extend)
+    globfilter, iunique, load_full_config, load_plugin_config,
+    merge_extend, parse_datetime, unique, update_extend)
 
 if version_info < (3, 11):
     from pkg_resources import resource_filename
@@ -124,6 +124,18 @@ class TestUnique(TestCase):
         self.assertEqual(unique(data, "val"), expect)
 
 
+    def test_iunique(self):
+        data = [{"id": 1, "v": "a"}, {"id": 2, "v": "b"},
+                {"id": 1, "v": "c"}, {"id": 3, "v": "d"}]
+
+        res = iunique(data, "id")
+        self.assertEqual(next(res), {"id": 1, "v": "a"})
+        self.assertEqual(list(res), [{"id": 2, "v": "b"},
+                                     {"id": 3, "v": "d"}])
+
+        self.assertEqual(list(iunique("abacabx")), list("abcx"))
+
+
 class TestChunkseq(TestCase):
 
     def test_chunkseq(self):
@@ -149,6 +161,66 @@ class TestChunkseq(TestCase):
         self.assertEqual(result, expect)
 
 
+class TestAdaptiveChunker(TestCase):
+
+    def test_record(self):
+        chunker = AdaptiveChunker(100, target=1.0, max_size=1000)
+        self.assertEqual(chunker.size, 100)
+
+        # fast chunks can at most double the size
+        self.assertEqual(chunker.record(100, 0.1), 200)
+        self.assertEqual(chunker.record(200, 0.1), 400)
+
+        # bounded by max_size
+        self.assertEqual(chunker.record(400, 0.1), 800)
+        self.assertEqual(chunker.record(800, 0.1), 1000)
+
+        # slow chunks can at most halve the size
+        self.assertEqual(chunker.record(1000, 10.0), 500)
+
+        # and in between, aim for the target
+        self.assertEqual(chunker.record(500, 2.0), 250)
+        self.assertEqual(chunker.record(250, 0.8), 312)
+
+        # empty chunks tell us nothing
+        self.assertEqual(chunker.record(0, 5.0), 312)
+
+
+    def test_record_bytes(self):
+        chunker = AdaptiveChunker(100, target=1.0, max_bytes=1000)
+
+        # fast, but too much data per call
+        self.assertEqual(chunker.record(100, 0.1, 4000), 50)
+        self.assertEqual(chunker.record(50, 0.1, 500), 100)
+
+        # unknown size has no effect
+        self.assertEqual(chunker.record(100, 1.0), 100)
+
+
+    def test_bounds(self):
+        chunker = AdaptiveChunker(5000, min_size=10, max_size=200)
+        self.assertEqual(chunker.size, 200)
+
+        chunker = AdaptiveChunker(1, min_size=10, max_size=200)
+        self.assertEqual(chunker.size, 10)
+
+        self.assertEqual(chunker.record(10, 100.0), 10)
+
+
+    def test_chunks(self):
+        chunker = AdaptiveChunker(5, target=1.0)
+
+        found = []
+        for chunk in chunker.chunks(range(0, 36)):
+            found.append(chunk)
+            chunker.record(len(chunk), 0.5)
+
+        self.assertEqual(found, [list(range(0, 5)),
+                                 list(range(5, 15)),
+                                 list(range(15, 35)),
+                                 [35]])
+
+
 class TestGlob(TestCase):
 
     def test_fnmatches(self):
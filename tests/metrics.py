@@ -0,0 +1,141 @@
+# This library is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this library; if not, see <http://www.gnu.org/licenses/>.
+
+
+import koji
+
+from io import StringIO
+from koji.xmlrpcplus import dumps
+from unittest import TestCase
+from unittest.mock import patch
+
+from kojismokydingo import bulk_load, clone_session
+from kojismokydingo.metrics import (
+    HubMetrics, enable_metrics, get_metrics, )
+
+
+class FakeResponse():
+
+    def __init__(self, result):
+        self.body = dumps((result, ), methodresponse=True).encode()
+
+
+    def iter_content(self, size):
+        for index in range(0, len(self.body), size):
+            yield self.body[index:index + size]
+
+
+class TestMetrics(TestCase):
+
+    def setUp(self):
+        self.send = patch('koji.ClientSession._sendCall').start()
+        self.session = koji.ClientSession('FAKE_URL')
+
+        # answer each call by reading an actual XML-RPC response, so
+        # that the response size is measured
+        def do_send(handler, headers, request):
+            params, method = koji.xmlrpcplus.loads(request)
+            if method == "multiCall":
+                result = [[c["params"][0]] for c in params[0]]
+            else:
+                result = method
+            return self.session._read_xmlrpc_response(FakeResponse(result))
+
+        self.send.side_effect = do_send
+
+
+    def tearDown(self):
+        patch.stopall()
+
+
+    def test_enable(self):
+        self.assertIsNone(get_metrics(self.session))
+
+        metrics = enable_metrics(self.session)
+        self.assertIs(get_metrics(self.session), metrics)
+        self.assertIs(enable_metrics(self.session), metrics)
+
+        shared = HubMetrics()
+        other = koji.ClientSession('FAKE_URL')
+        self.assertIs(enable_metrics(other, shared), shared)
+
+
+    def test_direct_calls(self):
+        metrics = enable_metrics(self.session)
+
+        self.assertEqual(self.session.getKojiVersion(), "getKojiVersion")
+        self.assertEqual(self.session.getKojiVersion(), "getKojiVersion")
+        self.assertEqual(self.session.getLoggedInUser(), "getLoggedInUser")
+
+        self.assertEqual(metrics.total_calls(), 3)
+
+        version = metrics.methods["getKojiVersion"]
+        self.assertEqual(version.calls, 2)
+        self.assertEqual(version.multicalled, 0)
+        self.assertEqual(sum(version.latency), 2)
+
+        size = len(FakeResponse("getKojiVersion").body)
+        self.assertEqual(version.nbytes, size * 2)
+
+
+    def test_multicalls(self):
+        metrics = enable_metrics(self.session)
+
+        res = bulk_load(self.session, self.session.getBuild,
+                        range(0, 30), size=20)
+        self.assertEqual(res, {i: i for i in range(0, 30)})
+
+        self.assertEqual(metrics.total_calls(), 2)
+        self.assertEqual(metrics.methods["multiCall"].calls, 2)
+        self.assertEqual(metrics.methods["getBuild"].calls, 0)
+        self.assertEqual(metrics.methods["getBuild"].multicalled, 30)
+
+        # one batch of 20 and one of 10
+        self.assertEqual(metrics.batches[1], 1)
+        self.assertEqual(metrics.batches[2], 1)
+
+
+    def test_clone(self):
+        metrics = enable_metrics(self.session)
+
+        clone = clone_session(self.session)
+        self.assertIs(get_metrics(clone), metrics)
+
+        clone.getKojiVersion()
+        self.assertEqual(metrics.methods["getKojiVersion"].calls, 1)
+
+
+    def test_report(self):
+        metrics = enable_metrics(self.session)
+
+        out = StringIO()
+        metrics.report(out)
+        self.assertEqual(out.getvalue(),
+                         "Hub calls: 0 requests, 0.000s,"
+                         " 0 bytes received\n")
+
+        self.session.getKojiVersion()
+        bulk_load(self.session, self.session.getBuild, range(0, 5))
+
+        out = StringIO()
+        metrics.report(out)
+        report = out.getvalue()
+
+        self.assertTrue(report.startswith("Hub calls: 2 requests"))
+        self.assertIn("getKojiVersion", report)
+        self.assertIn("getBuild", report)
+        self.assertIn("Multicall batch sizes: <=10:1", report)
+
+
+#
+# The end.
@@ -0,0 +1,148 @@
+# This library is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this library; if not, see <http://www.gnu.org/licenses/>.
+
+
+import asyncio
+import koji
+
+from unittest import TestCase
+from unittest.mock import patch
+
+from kojismokydingo import bulk_load, clone_session
+from kojismokydingo.aio import AsyncHubTransport, async_bulk_load
+from kojismokydingo.pinning import get_pinned_event, pin_event
+
+
+def decode(params):
+    # the args and kwargs of a call, as encoded by koji.encode_args
+
+    params = list(params)
+    if params and isinstance(params[-1], dict) and \
+       params[-1].pop("__starstar", False):
+        return [params[:-1], params[-1]]
+    return [params, {}]
+
+
+class TestPinning(TestCase):
+
+    def setUp(self):
+        self.send = patch('koji.ClientSession._sendCall').start()
+        self.session = koji.ClientSession('FAKE_URL')
+
+        # each call is answered with its own args and kwargs
+        self.calls = []
+
+        def do_send(handler, headers, request):
+            params, method = koji.xmlrpcplus.loads(request)
+            self.calls.append(method)
+
+            if method == "getLastEvent":
+                return {"id": 500, "ts": 0.0}
+            elif method == "multiCall":
+                return [[decode(c["params"])] for c in params[0]]
+            else:
+                return decode(params)
+
+        self.send.side_effect = do_send
+
+
+    def tearDown(self):
+        patch.stopall()
+
+
+    def test_pin(self):
+        self.assertIsNone(get_pinned_event(self.session))
+
+        self.assertEqual(pin_event(self.session), 500)
+        self.assertEqual(get_pinned_event(self.session), 500)
+        self.assertEqual(self.calls, ["getLastEvent"])
+
+        # pinning again keeps the original event
+        self.assertEqual(pin_event(self.session, 100), 500)
+
+        other = koji.ClientSession('FAKE_URL')
+        self.assertEqual(pin_event(other, 100), 100)
+        self.assertEqual(self.calls, ["getLastEvent"])
+
+
+    def test_direct_calls(self):
+        session = self.session
+        pin_event(session, 100)
+
+        self.assertEqual(session.getTag("foo"),
+                         [["foo"], {"event": 100}])
+        self.assertEqual(session.listTagged("foo", inherit=True),
+                         [["foo"], {"inherit": True, "event": 100}])
+
+        # an explicit event is left alone
+        self.assertEqual(session.getLatestBuilds("foo", event=50),
+                         [["foo"], {"event": 50}])
+
+        # and unrelated calls are unchanged
+        self.assertEqual(session.getBuild("bar"), [["bar"], {}])
+
+
+    def test_multicalls(self):
+        session = self.session
+        pin_event(session, 100)
+
+        res = bulk_load(session, session.getFullInheritance, ["a", "b"])
+        self.assertEqual(res, {"a": [["a"], {"event": 100}],
+                               "b": [["b"], {"event": 100}]})
+
+        res = bulk_load(session, session.getBuild, ["a"])
+        self.assertEqual(res, {"a": [["a"], {}]})
+
+        with session.multicall() as mc:
+            tagged = mc.listTagged("a", latest=True)
+            pinned = mc.getTag("a", event=50)
+
+        self.assertEqual(tagged.result,
+                         [["a"], {"latest": True, "event": 100}])
+        self.assertEqual(pinned.result, [["a"], {"event": 50}])
+
+
+    def test_async_multicalls(self):
+        session = self.session
+        pin_event(session, 100)
+
+        async def post(transport, handler, headers, request):
+            params, method = koji.xmlrpcplus.loads(request)
+            self.calls.append(method)
+            results = [[decode(c["params"])] for c in params[0]]
+            return koji.xmlrpcplus.dumps((results, ),
+                                         methodresponse=True).encode()
+
+        loop = asyncio.new_event_loop()
+        try:
+            with patch.object(AsyncHubTransport, "_post", post):
+                res = loop.run_until_complete(
+                    async_bulk_load(session, session.getTag, ["a", "b"]))
+        finally:
+            loop.close()
+
+        self.assertEqual(res, {"a": [["a"], {"event": 100}],
+                               "b": [["b"], {"event": 100}]})
+        self.assertEqual(self.calls, ["multiCall"])
+
+
+    def test_clone(self):
+        pin_event(self.session, 100)
+
+        clone = clone_session(self.session)
+        self.assertEqual(get_pinned_event(clone), 100)
+        self.assertEqual(clone.getTag("foo"), [["foo"], {"event": 100}])
+
+
+#
+# The end.
@@ -0,0 +1,207 @@
+# This library is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this library; if not, see <http://www.gnu.org/licenses/>.
+
+
+import koji
+
+from os.path import join
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+from unittest.mock import patch
+
+from kojismokydingo import (
+    NotRecorded, ReplayClientSession, bulk_load, clone_session, )
+from kojismokydingo.metrics import enable_metrics
+from kojismokydingo.replay import (
+    HubPlayback, HubRecording, enable_recording, get_recording, )
+
+
+def fake_send(handler, headers, request):
+    # getBuild answers with a dict for even IDs and a fault for odd
+    # IDs, getLastEvent counts upwards with each call
+
+    params, method = koji.xmlrpcplus.loads(request)
+
+    if method == "multiCall":
+        results = []
+        for call in params[0]:
+            build_id = call["params"][0]
+            if build_id % 2:
+                results.append({"faultCode": 1000,
+                                "faultString": f"no build {build_id}"})
+            else:
+                results.append([{"id": build_id}])
+        return results
+
+    elif method == "getLastEvent":
+        fake_send.event += 1
+        return {"id": fake_send.event}
+
+    elif method == "getBuild":
+        raise koji.Fault(1000, "direct fault")
+
+    else:
+        return method
+
+
+class TestRecording(TestCase):
+
+    def setUp(self):
+        fake_send.event = 100
+        self.send = patch('koji.ClientSession._sendCall',
+                          side_effect=fake_send).start()
+
+
+    def tearDown(self):
+        patch.stopall()
+
+
+    def test_enable(self):
+        session = koji.ClientSession('FAKE_URL')
+        self.assertIsNone(get_recording(session))
+
+        recording = enable_recording(session)
+        self.assertIs(get_recording(session), recording)
+        self.assertIs(enable_recording(session), recording)
+
+        clone = clone_session(session)
+        self.assertIs(get_recording(clone), recording)
+
+
+    def test_record(self):
+        session = koji.ClientSession('FAKE_URL')
+        recording = enable_recording(session)
+
+        self.assertEqual(session.getKojiVersion(), "getKojiVersion")
+        self.assertRaises(koji.GenericError, session.getBuild, 5)
+
+        res = bulk_load(session, session.getBuild, range(0, 4), err=False)
+        self.assertEqual(res, {0: {"id": 0}, 1: None,
+                               2: {"id": 2}, 3: None})
+
+        methods = [e["method"] for e in recording.entries]
+        self.assertEqual(methods, ["getKojiVersion", "getBuild",
+                                   "getBuild", "getBuild",
+                                   "getBuild", "getBuild"])
+
+        self.assertEqual(recording.entries[1]["fault"],
+                         {"faultCode": 1000, "faultString": "direct fault"})
+        self.assertEqual(recording.entries[2]["result"], {"id": 0})
+        self.assertEqual(recording.entries[3]["fault"]["faultCode"], 1000)
+
+
+    def test_save_load(self):
+        session = koji.ClientSession('FAKE_URL')
+        recording = enable_recording(session)
+
+        session.getKojiVersion()
+        session.getTag(4, strict=True)
+
+        with TemporaryDirectory() as tmpdir:
+            filename = join(tmpdir, "record.gz")
+            recording.save(filename)
+            loaded = HubRecording.load(filename)
+
+        self.assertEqual(len(loaded.entries), 2)
+        self.assertEqual(loaded.entries[0]["result"], "getKojiVersion")
+
+        # tuples come back as lists after XML-RPC, but they're still
+        # considered the same call
+        playback = HubPlayback(loaded)
+        entry = playback.respond("getTag", (4, {"strict": True,
+                                                "__starstar": True}))
+        self.assertEqual(entry["result"], "getTag")
+
+
+class TestReplay(TestCase):
+
+    def setUp(self):
+        fake_send.event = 100
+
+        with patch('koji.ClientSession._sendCall', side_effect=fake_send):
+            session = koji.ClientSession('FAKE_URL')
+            self.recording = enable_recording(session)
+
+            session.getKojiVersion()
+            session.getLastEvent()
+            session.getLastEvent()
+            self.assertRaises(koji.GenericError, session.getBuild, 5)
+            bulk_load(session, session.getBuild, range(0, 10), err=False)
+
+        # nothing should reach the hub from here on
+        self.send = patch('koji.ClientSession._sendCall',
+                          side_effect=AssertionError).start()
+
+
+    def tearDown(self):
+        patch.stopall()
+
+
+    def test_direct(self):
+        session = ReplayClientSession(self.recording)
+
+        self.assertEqual(session.getKojiVersion(), "getKojiVersion")
+        self.assertEqual(session.getKojiVersion(), "getKojiVersion")
+
+        # in the recorded order, repeating the last
+        self.assertEqual(session.getLastEvent(), {"id": 101})
+        self.assertEqual(session.getLastEvent(), {"id": 102})
+        self.assertEqual(session.getLastEvent(), {"id": 102})
+
+        with self.assertRaises(koji.GenericError) as ctx:
+            session.getBuild(5)
+        self.assertEqual(str(ctx.exception), "direct fault")
+
+        self.assertRaises(NotRecorded, session.getBuild, 500)
+        self.assertFalse(self.send.called)
+
+
+    def test_multicall(self):
+        session = ReplayClientSession(self.recording)
+
+        # batched differently than when recorded
+        res = bulk_load(session, session.getBuild, range(0, 10),
+                        err=False, size=3)
+        self.assertEqual(res, {i: (None if i % 2 else {"id": i})
+                               for i in range(0, 10)})
+
+        self.assertRaises(koji.GenericError, bulk_load,
+                          session, session.getBuild, range(0, 10))
+
+        self.assertRaises(NotRecorded, bulk_load,
+                          session, session.getBuild, range(8, 12))
+        self.assertFalse(self.send.called)
+
+
+    def test_concurrent(self):
+        session = ReplayClientSession(self.recording)
+
+        clone = clone_session(session)
+        self.assertIsInstance(clone, ReplayClientSession)
+        self.assertIs(clone.playback, session.playback)
+
+        metrics = enable_metrics(session)
+        res = bulk_load(session, session.getBuild, range(0, 10),
+                        err=False, size=2, concurrency=3)
+        self.assertEqual(len(res), 10)
+        self.assertEqual(metrics.methods["getBuild"].multicalled, 10)
+
+
+    def test_context(self):
+        with ReplayClientSession(self.recording) as session:
+            self.assertEqual(session.getKojiVersion(), "getKojiVersion")
+        self.assertFalse(self.send.called)
+
+
+#
+# The end.
@@ -14,9 +14,11 @@
 
 from unittest import TestCase
 
+from itertools import chain
+
 from kojismokydingo.rpm import (
-    _rpm_str_compare, evr_compare,
-    nevra_split, nevr_split, evr_split, )
+    EVRIndex, NEVRA, _rpm_str_compare, bulk_nevra_split, evr_compare,
+    evr_key, nevr_key, nevra_split, nevr_split, evr_split, )
 
 
 try:
@@ -169,6 +171,156 @@ class TestEVRSort(TestCase):
             self.assertEqual(evr_compare(evr_r, evr_l), -1, msg)
 
 
+    def test_evr_key_cmp_0(self):
+        for vl, vr in RPM_STR_CMP_0:
+            msg = f"left: {vl!r}, right: {vr!r}"
+            self.assertEqual(evr_key(("0", vl, "1")),
+                             evr_key(("0", vr, "1")), msg)
+
+
+    def test_evr_key_cmp_1(self):
+        for vl, vr in RPM_STR_CMP_1:
+            msg = f"left: {vl!r}, right: {vr!r}"
+            self.assertGreater(evr_key(("0", vl, "1")),
+                               evr_key(("0", vr, "1")), msg)
+
+
+    def test_evr_key_sorted(self):
+        # the keys must agree with evr_compare for every pairing, not
+        # just for the ones in the tables
+        versions = set(chain(*RPM_STR_CMP_0, *RPM_STR_CMP_1))
+        evrs = [(e, v, r) for e in (None, "1")
+                for v in versions for r in (None, "1~rc")]
+
+        def zeroed(evr):
+            return tuple("0" if x is None else x for x in evr)
+
+        for left in evrs:
+            lkey = evr_key(left)
+            for right in evrs:
+                rkey = evr_key(right)
+                expected = evr_compare(zeroed(left), zeroed(right))
+                found = (lkey > rkey) - (lkey < rkey)
+                self.assertEqual(found, expected, f"{left} {right}")
+
+
+    def test_nevr_key(self):
+        nevrs = [
+            ("bind", None, "9.10.2", "2"),
+            ("bind", "1", "9.0", "1"),
+            ("bind", None, "9.10.2", "2.P1"),
+            ("abc", None, "10", "1"),
+            ("bind", None, "9.10.2~rc1", "2"),
+        ]
+        ordered = sorted(nevrs, key=lambda n: nevr_key(*n))
+        self.assertEqual(ordered, [nevrs[3], nevrs[4], nevrs[0],
+                                   nevrs[2], nevrs[1]])
+
+
+def info(nvr, epoch=None, id=None):
+    name, version, release = nvr.rsplit("-", 2)
+    return {"id": id or nvr, "name": name, "epoch": epoch,
+            "version": version, "release": release}
+
+
+INDEXED = [
+    info("foo-1.0-2"),
+    info("bar-2.0-1"),
+    info("foo-1.0-10"),
+    info("foo-1.0~rc1-1"),
+    info("foo-0.9-1", epoch=1),
+    info("bar-1.0-1"),
+    info("foo-1.0-1"),
+    info("foo-1.00-1", id="dup"),
+]
+
+
+class TestEVRIndex(TestCase):
+
+    def ids(self, infos):
+        return [i["id"] for i in infos]
+
+
+    def test_order(self):
+        index = EVRIndex(INDEXED)
+
+        self.assertEqual(index.names(), ["foo", "bar"])
+        self.assertIn("foo", index)
+        self.assertNotIn("baz", index)
+
+        self.assertEqual(index.latest("foo")["id"], "foo-0.9-1")
+        self.assertEqual(index.latest("bar")["id"], "bar-2.0-1")
+        self.assertIsNone(index.latest("baz"))
+
+        self.assertEqual(self.ids(index.lowest("foo", 3)),
+                         ["foo-1.0~rc1-1", "foo-1.0-1", "dup"])
+
+        # equal EVRs stay in their given order, as with a stable sort
+        self.assertEqual(self.ids(index.highest("foo", 4)),
+                         ["foo-0.9-1", "foo-1.0-10", "foo-1.0-2",
+                          "foo-1.0-1"])
+        self.assertEqual(self.ids(index.highest("foo", 10)),
+                         ["foo-0.9-1", "foo-1.0-10", "foo-1.0-2",
+                          "foo-1.0-1", "dup", "foo-1.0~rc1-1"])
+        self.assertEqual(index.highest("baz", 2), [])
+
+
+    def test_compare(self):
+        index = EVRIndex(INDEXED)
+        compare = index.compare
+
+        self.assertEqual(self.ids(compare("foo", ">", (None, "1.0", "2"))),
+                         ["foo-1.0-10", "foo-0.9-1"])
+        self.assertEqual(self.ids(compare("foo", ">=", (None, "1.0", "2"))),
+                         ["foo-1.0-2", "foo-1.0-10", "foo-0.9-1"])
+        self.assertEqual(self.ids(compare("foo", "==", ("0", "1.0", "1"))),
+                         ["foo-1.0-1", "dup"])
+
+        # without a release, only the epoch and version are compared
+        self.assertEqual(self.ids(compare("foo", "==", (None, "1.0", None))),
+                         ["foo-1.0-1", "dup", "foo-1.0-2", "foo-1.0-10"])
+        self.assertEqual(self.ids(compare("foo", "<", (None, "1.0", None))),
+                         ["foo-1.0~rc1-1"])
+        self.assertEqual(self.ids(compare("foo", ">", (None, "1.0", None))),
+                         ["foo-0.9-1"])
+        self.assertEqual(self.ids(compare("foo", "!=", (None, "1.0", None))),
+                         ["foo-1.0~rc1-1", "foo-0.9-1"])
+        self.assertEqual(self.ids(compare("foo", "<=", ("1", "0", None))),
+                         ["foo-1.0~rc1-1", "foo-1.0-1", "dup", "foo-1.0-2",
+                          "foo-1.0-10"])
+
+        self.assertEqual(compare("baz", ">", (None, "1.0", None)), [])
+
+        self.assertEqual(self.ids(index.select(">=", (None, "2", None))),
+                         ["foo-0.9-1", "bar-2.0-1"])
+
+        with self.assertRaises(ValueError):
+            compare("foo", "~=", (None, "1.0", None))
+        with self.assertRaises(ValueError):
+            index.select("~=", (None, "1.0", None))
+
+
+    def test_agrees(self):
+        # every comparison agrees with evr_compare
+        index = EVRIndex(INDEXED)
+        ops = {"==": lambda c: c == 0, "!=": lambda c: c != 0,
+               ">": lambda c: c > 0, ">=": lambda c: c >= 0,
+               "<": lambda c: c < 0, "<=": lambda c: c <= 0}
+
+        for other in INDEXED:
+            evr = (other["epoch"], other["version"], other["release"])
+            for op, test in ops.items():
+                expected = set()
+                for i in INDEXED:
+                    left = (str(i["epoch"] or 0), i["version"], i["release"])
+                    right = (str(evr[0] or 0), evr[1], evr[2])
+                    if test(evr_compare(left, right)):
+                        expected.add(i["id"])
+
+                found = set(self.ids(index.select(op, evr)))
+                self.assertEqual(found, expected, f"{op} {evr}")
+
+
 NEVRA_SPLITS = [
     ("bind-32:9.10.2-2.P1.fc22.x86_64",
      ("bind", "32", "9.10.2", "2.P1.fc22", "x86_64")),
@@ -248,5 +400,40 @@ class TestSplits(TestCase):
             self.assertEqual(nevr_split(src), expect)
 
 
+    def test_bulk_nevra_split(self):
+        srcs = [src for src, _expect in NEVRA_SPLITS]
+        found = bulk_nevra_split(iter(srcs))
+
+        self.assertEqual(len(found), len(srcs))
+        for src, rec in zip(srcs, found):
+            self.assertIsInstance(rec, NEVRA)
+            self.assertEqual(rec, nevra_split(src))
+
+        rec = found[0]
+        self.assertEqual(rec.name, rec[0])
+        self.assertEqual(rec.arch, rec[4])
+
+        self.assertEqual(bulk_nevra_split([]), [])
+
+
+    def test_bulk_nevra_interned(self):
+        # build the strings at runtime, so that they aren't already
+        # shared constants
+        srcs = ["-".join(("ksdbulk", f"{n}.0", "1.el9.x86_64"))
+                for n in (1, 2, 1)]
+
+        one, two, again = bulk_nevra_split(srcs)
+        self.assertEqual(one, ("ksdbulk", None, "1.0", "1.el9", "x86_64"))
+
+        # the repeated entry is the very same record
+        self.assertIs(one, again)
+
+        # and distinct entries share their common components
+        self.assertIs(one.name, two.name)
+        self.assertIs(one.release, two.release)
+        self.assertIs(one.arch, two.arch)
+        self.assertEqual(two.version, "2.0")
+
+
 #
 # The end.
@@ -12,10 +12,13 @@
 # along with this library; if not, see <http://www.gnu.org/licenses/>.
 
 
+from threading import Lock
+from time import sleep
 from unittest import TestCase
+from unittest.mock import MagicMock, patch
 
 from kojismokydingo.sift import (
-    DEFAULT_SIEVES,
+    COST_PER_ITEM, DEFAULT_SIEVES,
     Flagged, IntStrSieve, ItemPathSieve, ItemSieve,
     LogicAnd, LogicNot, LogicOr, MatcherSieve,
     Sieve, Sifter, SifterError, SymbolSieve,
@@ -24,10 +27,11 @@ from kojismokydingo.sift import (
     ensure_str, ensure_symbol, gather_args,
 )
 from kojismokydingo.sift.parse import (
-    AllItems, Glob, Item, ItemMatch, ItemPath,
+    AllItems, Glob, Item, ItemMatch, ItemPath, MatcherSet,
     Null, Number, ParserError, Reader, Regex, Symbol, SymbolGroup,
     convert_token,
 )
+from kojismokydingo.sift.common import CacheMixin
 
 
 class ExIntStrSieve(IntStrSieve):
@@ -71,6 +75,17 @@ class BrandSieve(ItemSieve):
     name = field = "brand"
 
 
+class UpperNameSieve(ItemSieve):
+    # overrides __init__ to accept only a single value, so it must not
+    # be fused
+
+    name = "upper-name"
+    field = "name"
+
+    def __init__(self, sifter, value):
+        super().__init__(sifter, Symbol(str(value).upper()))
+
+
 class Poke(Sieve):
     # for testing cache. Increments a poke counter each time it sees a
     # data item. If a maximum value is provided, then filters for only
@@ -96,6 +111,116 @@ class Poke(Sieve):
         return (self._max < 0) or (seen <= self._max)
 
 
+class Expensive(Sieve):
+    # for testing the plan. Records the IDs of the items it was asked
+    # to check, and passes them all.
+
+    name = "expensive"
+    cost = COST_PER_ITEM
+
+
+    def __init__(self, sifter):
+        super().__init__(sifter)
+        self.checked = []
+
+
+    def check(self, _session, data):
+        self.checked.append(data["id"])
+        return True
+
+
+class Backwards(Sieve):
+    # for testing selection. Passes everything, but in reverse order
+
+    name = "backwards"
+
+
+    def run(self, _session, info_dicts):
+        return reversed(info_dicts)
+
+
+class Loaded(Sieve):
+    # for testing concurrent prep. Records the sessions it was
+    # prepped with, and loads the names of the items into their cache
+    # if they haven't been already
+
+    name = "loaded"
+
+
+    def __init__(self, sifter, *names):
+        super().__init__(sifter, *names)
+        self.prepped = []
+
+
+    def prep(self, session, info_dicts):
+        self.prepped.append(session)
+        for data in info_dicts:
+            cache = self.get_info_cache(data)
+            if "name" not in cache:
+                cache["name"] = data["name"]
+
+
+    def check(self, _session, data):
+        return self.get_info_cache(data)["name"] in self.tokens
+
+
+class Overlap():
+    # counts how many preps are running at once
+
+    def __init__(self):
+        self.lock = Lock()
+        self.active = 0
+        self.most = 0
+
+
+    def __enter__(self):
+        with self.lock:
+            self.active += 1
+            self.most = max(self.most, self.active)
+
+
+    def __exit__(self, *exc):
+        with self.lock:
+            self.active -= 1
+
+
+class Slow(Sieve):
+    # for testing concurrent prep. Lingers in its prep, so that preps
+    # which are permitted to overlap will do so
+
+    name = "slow"
+
+    overlap = None
+
+
+    def prep(self, session, info_dicts):
+        with self.overlap:
+            sleep(0.05)
+
+
+    def check(self, _session, data):
+        return True
+
+
+class BuildTags(CacheMixin):
+    # for testing concurrent prep. Loads into a mixin cache shared
+    # with OtherBuildTags
+
+    name = "build-tags"
+
+
+    def prep(self, session, info_dicts):
+        self.bulk_build_tags(session, [d["id"] for d in info_dicts])
+
+
+    def check(self, _session, data):
+        return True
+
+
+class OtherBuildTags(BuildTags):
+    name = "other-build-tags"
+
+
 TACOS = {
     "id": 1,
     "type": "food",
@@ -139,11 +264,14 @@ DATA = [
 class SifterTest(TestCase):
 
 
-    def compile_sifter(self, src, **params):
-        sieves = [NameSieve, TypeSieve, BrandSieve, CategorySieve, Poke]
+    def compile_sifter(self, src, reorder=True, concurrency=1, **params):
+        sieves = [NameSieve, TypeSieve, BrandSieve, CategorySieve, Poke,
+                  Expensive, Backwards, Loaded, Slow, BuildTags,
+                  OtherBuildTags, UpperNameSieve]
         sieves.extend(DEFAULT_SIEVES)
 
-        return Sifter(sieves, Reader(src), params=params)
+        return Sifter(sieves, Reader(src), params=params, reorder=reorder,
+                      concurrency=concurrency)
 
 
     def test_from_str(self):
@@ -264,6 +392,49 @@ class SifterTest(TestCase):
         self.assertEqual(res["default"], [PIZZA])
 
 
+    def test_multi_item(self):
+
+        src = """
+        (name Pizza Tacos |Dr*|)
+        """
+        sifter = self.compile_sifter(src)
+
+        # a single sieve checks all of the values at once
+        sieves = sifter.sieve_exprs()
+        self.assertEqual(len(sieves), 1)
+        self.assertTrue(isinstance(sieves[0], NameSieve))
+        self.assertTrue(isinstance(sieves[0].token, MatcherSet))
+        self.assertEqual(repr(sieves[0]),
+                         "(name Symbol('Pizza') Symbol('Tacos')"
+                         " Glob('Dr*'))")
+
+        res = sifter(None, DATA)
+        self.assertEqual(res["default"], [TACOS, PIZZA, DRAINO])
+
+        # sieves which aren't fusable are still wrapped in an or
+        src = """
+        (flag food (type food))
+        (flagged food nothing)
+        """
+        sifter = self.compile_sifter(src)
+
+        sieves = sifter.sieve_exprs()
+        self.assertEqual(repr(sieves[1]),
+                         "(or (flagged Symbol('food'))"
+                         " (flagged Symbol('nothing')))")
+
+        # nor are item sieves with their own __init__
+        src = """
+        (upper-name pizza tacos)
+        """
+        sifter = self.compile_sifter(src)
+
+        sieves = sifter.sieve_exprs()
+        self.assertEqual(repr(sieves[0]),
+                         "(or (upper-name Symbol('PIZZA'))"
+                         " (upper-name Symbol('TACOS')))")
+
+
     def test_str_item(self):
 
         src = """
@@ -437,6 +608,84 @@ class SifterTest(TestCase):
         self.assertEqual(res["good"], [TACOS, PIZZA, BEER])
 
 
+    def test_plan(self):
+
+        src = """
+        (and (expensive) (type food) (name Tacos Beer))
+        """
+        sifter = self.compile_sifter(src)
+        sieves = sifter.sieve_exprs()
+        self.assertEqual(len(sieves), 1)
+
+        expr = sieves[0]
+        self.assertEqual(repr(expr),
+                         "(and (expensive) (type Symbol('food'))"
+                         " (name Symbol('Tacos') Symbol('Beer')))")
+        self.assertEqual([repr(e) for e in expr.order],
+                         ["(type Symbol('food'))",
+                          "(name Symbol('Tacos') Symbol('Beer'))",
+                          "(expensive)"])
+
+        res = sifter(None, DATA)
+        self.assertEqual(res["default"], [TACOS])
+        self.assertEqual(expr.tokens[0].checked, [1])
+
+        # the same, evaluated as written
+        sifter = self.compile_sifter(src, reorder=False)
+        expr = sifter.sieve_exprs()[0]
+        self.assertEqual(expr.order, expr.tokens)
+
+        res = sifter(None, DATA)
+        self.assertEqual(res["default"], [TACOS])
+        self.assertEqual(expr.tokens[0].checked, [1, 2, 3, 4])
+
+
+    def test_plan_barrier(self):
+
+        # flags are side effects, so nothing may cross them
+        src = """
+        (and (expensive) (name Tacos Pizza) (flag seen (type food))
+             (expensive) (flagged seen) (type food))
+        """
+        sifter = self.compile_sifter(src)
+        expr = sifter.sieve_exprs()[0]
+
+        order = [e.name for e in expr.order]
+        self.assertEqual(order, ["name", "expensive", "flag",
+                                 "flagged", "type", "expensive"])
+
+        res = sifter(None, DATA)
+        self.assertEqual(res["default"], [TACOS, PIZZA])
+        self.assertEqual(res["seen"], [TACOS, PIZZA])
+
+        # the flag is nested, but still prevents the reorder
+        src = """
+        (and (expensive) (or (flag seen (type food))) (type food))
+        """
+        sifter = self.compile_sifter(src)
+        expr = sifter.sieve_exprs()[0]
+        self.assertEqual(expr.order, expr.tokens)
+
+
+    def test_explain(self):
+
+        src = """
+        (flag yum (expensive) (type food))
+        (not (expensive) (name Beer))
+        """
+        sifter = self.compile_sifter(src)
+
+        expected = "\n".join((
+            "per-item  (flag Symbol('yum')  ; reordered",
+            "local       (type Symbol('food'))",
+            "per-item    (expensive))",
+            "per-item  (not",
+            "per-item    (expensive)",
+            "local       (name Symbol('Beer')))",
+        ))
+        self.assertEqual(sifter.explain(), expected)
+
+
     def test_not(self):
 
         src = """
@@ -471,6 +720,227 @@ class SifterTest(TestCase):
         self.assertEqual(res["everything"], DATA)
 
 
+    def test_select(self):
+        src = """
+        (and (backwards) (or (type food) (name Draino)))
+        (flag kept (not (name Beer)) (backwards))
+        """
+        sifter = self.compile_sifter(src)
+
+        # the order produced by a sieve is kept by the sieves which
+        # follow it, and in the results
+        res = sifter(None, DATA)
+        self.assertEqual(res["default"], [PIZZA, TACOS, DRAINO])
+        self.assertEqual(res["kept"], [DRAINO, PIZZA, TACOS])
+
+        # and the sieves still work when invoked directly
+        expr = sifter.sieve_exprs()[0]
+        self.assertEqual(list(expr(None, DATA)), [PIZZA, TACOS, DRAINO])
+
+
+    def test_prep_branches(self):
+        src = """
+        (flag a (loaded Tacos Pizza))
+        (flag b (loaded Beer))
+        (flag c (flagged a) (loaded Tacos))
+        (or (loaded Draino) (loaded Beer))
+        """
+
+        session = object()
+        expected = self.compile_sifter(src)(session, DATA)
+
+        clones = []
+
+        def clone_session(orig):
+            self.assertIs(orig, session)
+            clone = MagicMock()
+            clones.append(clone)
+            return clone
+
+        sifter = self.compile_sifter(src, concurrency=2)
+        with patch("kojismokydingo.sift.clone_session",
+                   side_effect=clone_session):
+            res = sifter(session, DATA)
+
+        self.assertEqual(res, expected)
+        self.assertEqual(list(res), list(expected))
+
+        # one clone per thread, and each is done with once the preps
+        # have completed
+        self.assertEqual(len(clones), 2)
+        for clone in clones:
+            clone.logout.assert_called_once_with()
+            self.assertIsNone(clone.rsession)
+
+        a, b, c, d = sifter.sieve_exprs()
+        first = a.tokens[0]
+        self.assertEqual(len(first.prepped), 2)
+        self.assertIn(first.prepped[0], clones)
+        self.assertIs(first.prepped[1], session)
+
+        second = b.tokens[0]
+        self.assertEqual(len(second.prepped), 2)
+        self.assertIn(second.prepped[0], clones)
+
+        # checks a flag, so is only prepped when evaluated
+        third = c.tokens[1]
+        self.assertEqual(third.prepped, [session])
+
+        # only the leading branch of an or is prepped ahead
+        fourth, fifth = d.tokens
+        self.assertEqual(len(fourth.prepped), 2)
+        self.assertIn(fourth.prepped[0], clones)
+        self.assertEqual(fifth.prepped, [session])
+
+
+    def test_prep_branches_single(self):
+        sifter = self.compile_sifter("(loaded Tacos)", concurrency=4)
+
+        with patch("kojismokydingo.sift.clone_session") as clone_session:
+            res = sifter(None, DATA)
+            self.assertFalse(clone_session.called)
+
+        self.assertEqual(res["default"], [TACOS])
+
+
+    def test_prep_branches_same_name(self):
+        # sieves of the same name share their info caches, so their
+        # preps must not overlap
+        src = """
+        (flag a (slow))
+        (flag b (slow))
+        (flag c (slow))
+        """
+
+        overlap = Overlap()
+        sifter = self.compile_sifter(src, concurrency=3)
+        with patch.object(Slow, "overlap", overlap), \
+             patch("kojismokydingo.sift.clone_session"):
+            sifter(None, DATA)
+
+        self.assertEqual(overlap.most, 1)
+
+
+    def test_prep_branches_mixin(self):
+        # sieves of different names sharing a mixin cache load each
+        # item only once, even when prepared concurrently
+        src = """
+        (flag a (build-tags))
+        (flag b (other-build-tags))
+        """
+
+        loads = []
+
+        def iter_bulk_load(session, fn, keys):
+            loads.append(list(keys))
+            sleep(0.05)
+            return [(key, []) for key in keys]
+
+        sifter = self.compile_sifter(src, concurrency=2)
+        with patch("kojismokydingo.sift.common.iter_bulk_load",
+                   side_effect=iter_bulk_load), \
+             patch("kojismokydingo.sift.clone_session"):
+            res = sifter(None, DATA)
+
+        self.assertEqual(loads, [[1, 2, 3, 4]])
+        self.assertEqual(res["a"], DATA)
+        self.assertEqual(res["b"], DATA)
+
+
+    def test_run_stream_clones(self):
+        src = """
+        (flag a (loaded Tacos Pizza))
+        (flag b (loaded Beer))
+        """
+
+        clones = []
+
+        def clone_session(orig):
+            clone = MagicMock()
+            clones.append(clone)
+            return clone
+
+        sifter = self.compile_sifter(src, concurrency=2)
+        with patch("kojismokydingo.sift.clone_session",
+                   side_effect=clone_session):
+            stream = sifter.run_stream(None, DATA, chunk=1)
+            found = [next(stream), next(stream)]
+
+            # the clones are kept between chunks
+            self.assertEqual(len(clones), 2)
+            for clone in clones:
+                clone.logout.assert_not_called()
+
+            found.extend(stream)
+
+        self.assertEqual(found, [
+            {"a": [TACOS]}, {"a": [PIZZA]}, {"b": [BEER]}, {},
+        ])
+
+        # and are done with once the stream ends
+        self.assertEqual(len(clones), 2)
+        for clone in clones:
+            clone.logout.assert_called_once_with()
+            self.assertIsNone(clone.rsession)
+
+        a, b = sifter.sieve_exprs()
+        prepped = a.tokens[0].prepped
+        self.assertEqual(len(prepped), 8)
+        for clone in prepped[::2]:
+            self.assertIn(clone, clones)
+
+
+    def test_get_cache_lock(self):
+        sifter = self.compile_sifter("(name Tacos)")
+
+        lock = sifter.get_cache_lock("name", 1)
+        self.assertIs(sifter.get_cache_lock("name", 1), lock)
+        self.assertIsNot(sifter.get_cache_lock("name", 2), lock)
+
+        # reentrant, as a sieve may call into another of its own
+        # caching methods
+        with lock:
+            with lock:
+                pass
+
+        # and kept across a reset
+        sifter.reset()
+        self.assertIs(sifter.get_cache_lock("name", 1), lock)
+
+
+    def test_run_stream(self):
+        src = """
+        (flag food (type food))
+        (flag cheap (flagged food) (poke))
+        (!name Beer)
+        """
+        sifter = self.compile_sifter(src)
+        self.assertFalse(sifter.needs_full_pass())
+
+        # duplicates are skipped, even across chunks
+        data = [TACOS, PIZZA, None, TACOS, BEER, DRAINO, PIZZA]
+        found = list(sifter.run_stream(None, data, chunk=2))
+
+        self.assertEqual(found, [
+            {"food": [TACOS, PIZZA],
+             "cheap": [TACOS, PIZZA],
+             "default": [TACOS, PIZZA]},
+            {"default": [DRAINO]},
+        ])
+
+        # the data caches are kept between chunks, and the food was
+        # only poked once
+        for data in (TACOS, PIZZA):
+            cache = sifter.get_info_cache("poke", data)
+            self.assertEqual(cache["count"], 1)
+
+        for data in (BEER, DRAINO):
+            cache = sifter.get_info_cache("poke", data)
+            self.assertNotIn("count", cache)
+
+        self.assertEqual(list(sifter.run_stream(None, [])), [])
+
+
     def test_or(self):
         src = """
         (or (name) (type))
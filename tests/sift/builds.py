@@ -12,8 +12,11 @@
 # along with this library; if not, see <http://www.gnu.org/licenses/>.
 
 
+import koji
+
+from collections import Counter
 from unittest import TestCase
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
 
 from kojismokydingo.builds import build_id_sort
 from kojismokydingo.sift import Sifter, SifterError
@@ -683,6 +686,26 @@ class EVRHighLowTest(TestCase):
             sift_builds(None, src, BUILD_SAMPLES)
 
 
+    def test_full_pass(self):
+
+        src = """
+        (flag newest (or (state COMPLETE) (evr-high)))
+        """
+        sifter = build_info_sifter(src)
+        self.assertTrue(sifter.needs_full_pass())
+
+        # despite the chunk size, the builds are all sifted together
+        expected = sifter(None, BUILD_SAMPLES)
+        found = list(sifter.run_stream(None, BUILD_SAMPLES, chunk=2))
+        self.assertEqual(found, [expected])
+
+        sifter = build_info_sifter("(!evr-low) (type rpm)")
+        self.assertTrue(sifter.needs_full_pass())
+
+        sifter = build_info_sifter("(state COMPLETE)")
+        self.assertFalse(sifter.needs_full_pass())
+
+
     def test_evr_low(self):
 
         src = """
@@ -749,6 +772,18 @@ class EVRHighLowTest(TestCase):
             sift_builds(None, src, BUILD_SAMPLES)
 
 
+class CompareLatestNVRTest(TestCase):
+
+
+    def test_comparison(self):
+        sifter = build_info_sifter("(compare-latest-nvr > foo)")
+        sieve = sifter.sieve_exprs()[0]
+
+        self.assertTrue(sieve.comparison(BUILD_SAMPLE_5, BUILD_SAMPLE_1))
+        self.assertFalse(sieve.comparison(BUILD_SAMPLE_1, BUILD_SAMPLE_5))
+        self.assertFalse(sieve.comparison(BUILD_SAMPLE_1, BUILD_SAMPLE_1))
+
+
 class SiftNVRsTest(TestCase):
 
 
@@ -776,5 +811,91 @@ class SiftNVRsTest(TestCase):
         self.assertEqual(mc.call_count, 1)
 
 
+
+class PrefetchTest(TestCase):
+
+    BUILDS = [{"id": bid, "name": f"pkg-{bid}",
+               "nvr": f"pkg-{bid}-1.0-1"} for bid in range(1, 7)]
+
+
+    def setUp(self):
+        self.calls = calls = Counter()
+        self.batches = batches = []
+
+        def answer(method, params):
+            calls[method] += 1
+
+            if method == "listRPMs":
+                bid = params[0]
+                return [{"id": bid * 10, "build_id": bid,
+                         "buildroot_id": None}]
+            elif method == "queryRPMSigs":
+                return [{"sigkey": "cafe"}] if params[0] > 30 else []
+            elif method == "listTags":
+                return [{"id": 1, "name": "tag-1"}]
+            else:
+                return []
+
+        def send(handler, headers, request):
+            params, method = koji.xmlrpcplus.loads(request)
+            if method == "multiCall":
+                batch = params[0]
+                batches.append(Counter(c["methodName"] for c in batch))
+                return [[answer(c["methodName"], c["params"])]
+                        for c in batch]
+            else:
+                return answer(method, params)
+
+        patch('koji.ClientSession._sendCall', side_effect=send).start()
+
+
+    def tearDown(self):
+        patch.stopall()
+
+
+    def test_shared_rpms(self):
+        src = """
+        (flag signed (signed))
+        (flag cg (cg-imported))
+        """
+        sifter = build_info_sifter(src)
+        res = sifter(koji.ClientSession("FAKE_URL"), self.BUILDS)
+
+        self.assertEqual(res["signed"], self.BUILDS[3:])
+        self.assertNotIn("cg", res)
+
+        # both sieves need the RPMs of every build, but they're only
+        # loaded once, in a single batch
+        self.assertEqual(self.calls["listRPMs"], 6)
+        self.assertEqual(self.batches[0], Counter(listRPMs=6))
+
+
+    def test_shared_tags(self):
+        src = """
+        (flag any (tagged))
+        (flag one (tagged tag-1))
+        """
+        sifter = build_info_sifter(src)
+        res = sifter(koji.ClientSession("FAKE_URL"), self.BUILDS)
+
+        self.assertEqual(res["any"], self.BUILDS)
+        self.assertEqual(res["one"], self.BUILDS)
+        self.assertEqual(self.calls["listTags"], 6)
+        self.assertEqual(len(self.batches), 1)
+
+
+    def test_leading_only(self):
+        # the signed sieve will only see the builds which pass the
+        # name sieve, so its data isn't loaded for everything
+        src = """
+        (flag signed (signed) (name pkg-5))
+        """
+        sifter = build_info_sifter(src)
+        res = sifter(koji.ClientSession("FAKE_URL"), self.BUILDS)
+
+        self.assertEqual(res["signed"], [self.BUILDS[4]])
+        self.assertEqual(self.calls["listRPMs"], 1)
+
+
 #
 # The end.
@@ -0,0 +1,340 @@
+# This library free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this library; if not, see <http://www.gnu.org/licenses/>.
+
+
+import koji
+
+from collections import Counter
+from glob import glob
+from os.path import join
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+from unittest.mock import patch
+
+from kojismokydingo.cache import ObjectCache
+from kojismokydingo.pinning import pin_event
+from kojismokydingo.sift import (
+    DEFAULT_SIEVES, Sieve, Sifter, ensure_all_int_or_str, )
+from kojismokydingo.sift.cache import SieveCache, TagDataCache
+from kojismokydingo.sift.common import CacheMixin
+
+from . import BrandSieve, NameSieve, TypeSieve, DATA
+
+
+SRC = """
+(type food)
+(or (name Tacos Pizza) (not (brand None)))
+(!name /^Hot/ |*dog|)
+"""
+
+
+class Local(Sieve):
+    # can't be pickled by reference, so cannot be cached
+
+    name = "local"
+
+
+    def __init__(self, sifter):
+        super().__init__(sifter)
+        self.fn = lambda data: True
+
+
+    def check(self, session, data):
+        return self.fn(data)
+
+
+class TestSieveCache(TestCase):
+
+    def setUp(self):
+        self.tmpdir = TemporaryDirectory()
+        self.cache = SieveCache(self.tmpdir.name)
+
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+
+    def sifter(self, src=SRC, extra=(), **params):
+        sieves = [NameSieve, TypeSieve, BrandSieve, *extra]
+        sieves.extend(DEFAULT_SIEVES)
+        return Sifter(sieves, src, params=params, cache=self.cache)
+
+
+    def entries(self):
+        return glob(join(self.tmpdir.name, "*.pickle"))
+
+
+    def test_round_trip(self):
+        first = self.sifter()
+        self.assertEqual(len(self.entries()), 1)
+
+        with patch.object(Sifter, "_compile") as compile:
+            second = self.sifter()
+            self.assertFalse(compile.called)
+
+        self.assertEqual(repr(first._exprs), repr(second._exprs))
+        self.assertEqual(first(None, DATA), second(None, DATA))
+
+        # the loaded sieves belong to the sifter which loaded them
+        for expr in second._exprs:
+            self.assertIs(expr.sifter, second)
+
+
+    def test_key(self):
+        self.sifter()
+        self.sifter()
+        self.assertEqual(len(self.entries()), 1)
+
+        # params and available sieves are part of the key
+        self.sifter(flavor="spicy")
+        self.assertEqual(len(self.entries()), 2)
+
+        self.sifter(extra=[Local])
+        self.assertEqual(len(self.entries()), 3)
+
+        self.sifter(src="(name Tacos)")
+        self.assertEqual(len(self.entries()), 4)
+
+
+    def test_code_changed(self):
+        self.sifter()
+        self.assertEqual(len(self.entries()), 1)
+
+        # as though a different version of the sieves were installed,
+        # so that the stored entry may no longer suit them
+        with patch("kojismokydingo.sift.cache._module_digest",
+                   return_value="changed"), \
+             patch.object(Sifter, "_compile",
+                          side_effect=Sifter._compile,
+                          autospec=True) as compile:
+
+            self.sifter()
+            self.assertTrue(compile.called)
+
+        self.assertEqual(len(self.entries()), 2)
+
+
+    def test_damaged(self):
+        first = self.sifter()
+        for filename in self.entries():
+            with open(filename, "wb") as fout:
+                fout.write(b"not a pickle")
+
+        second = self.sifter()
+        self.assertEqual(repr(first._exprs), repr(second._exprs))
+
+        # and the damaged entry was replaced
+        with patch.object(Sifter, "_compile") as compile:
+            self.sifter()
+            self.assertFalse(compile.called)
+
+
+    def test_unpicklable(self):
+        sifter = self.sifter("(local)", extra=[Local])
+        self.assertEqual(len(sifter._exprs), 1)
+        self.assertEqual(self.entries(), [])
+        self.assertEqual(glob(join(self.tmpdir.name, "*")), [])
+
+
+class FakeHub():
+    # answers the few calls needed to load and revalidate the latest
+    # builds of tags, counting each call made
+
+    def __init__(self):
+        self.event = 100
+        self.parents = {1: [3], 2: [], 3: []}
+        self.latest = {
+            1: [{"id": 10, "name": "tacos"}, {"id": 11, "name": "pizza"}],
+            2: [{"id": 20, "name": "beer"}],
+            3: [{"id": 10, "name": "tacos"}],
+        }
+        self.changed = set()
+        self.calls = Counter()
+
+
+    def call(self, method, params):
+        self.calls[method] += 1
+
+        if method == "getLastEvent":
+            return {"id": self.event}
+
+        elif method == "getLatestBuilds":
+            return self.latest[params[0]]
+
+        elif method == "getFullInheritance":
+            return [{"parent_id": p} for p in self.parents[params[0]]]
+
+        elif method == "tagChangedSinceEvent":
+            event, tags = params
+            if event < 0:
+                raise koji.GenericError("no such event")
+            return any(tid in self.changed for tid in tags)
+
+        raise koji.GenericError(f"unexpected call {method}")
+
+
+    def __call__(self, handler, headers, request):
+        params, method = koji.xmlrpcplus.loads(request)
+
+        if method != "multiCall":
+            return self.call(method, params)
+
+        self.calls[method] += 1
+        results = []
+        for call in params[0]:
+            try:
+                results.append([self.call(call["methodName"],
+                                          call["params"])])
+            except koji.GenericError as ge:
+                results.append({"faultCode": ge.faultCode,
+                                "faultString": str(ge)})
+        return results
+
+
+class LatestIn(CacheMixin):
+    # passes the builds which are latest in any of the given tag IDs
+
+    name = "latest-in"
+
+
+    def __init__(self, sifter, *tag_ids):
+        super().__init__(sifter, *ensure_all_int_or_str(tag_ids))
+
+
+    def prep(self, session, info_dicts):
+        self.bulk_latest_builds(session, self.tokens)
+
+
+    def check(self, session, info):
+        return any(info["id"] in self.latest_build_ids(session, tid)
+                   for tid in self.tokens)
+
+
+BUILDS = [
+    {"id": 10, "name": "tacos"},
+    {"id": 11, "name": "pizza"},
+    {"id": 20, "name": "beer"},
+    {"id": 30, "name": "draino"},
+]
+
+
+class TestTagDataCache(TestCase):
+
+    def setUp(self):
+        self.hub = FakeHub()
+        patch("koji.ClientSession._sendCall", side_effect=self.hub).start()
+
+        self.session = koji.ClientSession("FAKE_URL")
+        self.objects = ObjectCache(":memory:")
+
+
+    def tearDown(self):
+        patch.stopall()
+        self.objects.close()
+
+
+    def sift(self, src="(latest-in 1 2)"):
+        # a new TagDataCache and Sifter each time, as though this were
+        # a separate invocation of a command
+        tag_cache = TagDataCache(self.objects)
+        sifter = Sifter([LatestIn], src, tag_cache=tag_cache)
+        return sifter(self.session, BUILDS)["default"]
+
+
+    def test_revalidate(self):
+        calls = self.hub.calls
+
+        self.assertEqual(self.sift(), BUILDS[:3])
+        self.assertEqual(calls["getLatestBuilds"], 2)
+        self.assertEqual(calls["getFullInheritance"], 2)
+        self.assertEqual(calls["tagChangedSinceEvent"], 0)
+
+        # unchanged, so only revalidated
+        self.assertEqual(self.sift(), BUILDS[:3])
+        self.assertEqual(calls["getLatestBuilds"], 2)
+        self.assertEqual(calls["tagChangedSinceEvent"], 2)
+        self.assertEqual(calls["multiCall"], 3)
+
+        # a change to the parent of tag 1 invalidates it, but not 2
+        self.hub.event = 101
+        self.hub.changed.add(3)
+        self.hub.latest[1] = [{"id": 30, "name": "draino"}]
+
+        self.assertEqual(self.sift(), BUILDS[2:])
+        self.assertEqual(calls["getLatestBuilds"], 3)
+        self.assertEqual(calls["tagChangedSinceEvent"], 4)
+
+        # and the reloaded entry was stored as of the new event
+        self.hub.changed.clear()
+        self.assertEqual(self.sift(), BUILDS[2:])
+        self.assertEqual(calls["getLatestBuilds"], 3)
+
+
+    def test_pinned(self):
+        calls = self.hub.calls
+        pin_event(self.session, 90)
+
+        self.assertEqual(self.sift(), BUILDS[:3])
+        self.assertEqual(calls["getLatestBuilds"], 2)
+        self.assertEqual(calls["getFullInheritance"], 0)
+        self.assertEqual(calls["getLastEvent"], 0)
+
+        # the pinned entries can't change, so are used without being
+        # revalidated
+        self.hub.changed.add(1)
+        self.assertEqual(self.sift(), BUILDS[:3])
+        self.assertEqual(calls["getLatestBuilds"], 2)
+        self.assertEqual(calls["tagChangedSinceEvent"], 0)
+
+        # and are kept apart from the entries of an unpinned session
+        self.session = koji.ClientSession("FAKE_URL")
+        self.assertEqual(self.sift(), BUILDS[:3])
+        self.assertEqual(calls["getLatestBuilds"], 4)
+
+
+    def test_store(self):
+        tag_cache = TagDataCache(self.objects)
+        session = self.session
+
+        event = tag_cache.event_id(session)
+        self.assertEqual(event, 100)
+
+        # fetched once
+        self.hub.event = 200
+        self.assertEqual(tag_cache.event_id(session), 100)
+        self.assertEqual(self.hub.calls["getLastEvent"], 1)
+
+        stored = tag_cache.store(session, "stuff", event,
+                                 {1: ["one"], 2: ["two"]}, inherit=False)
+        self.assertEqual(stored, 2)
+        self.assertEqual(self.hub.calls["getFullInheritance"], 0)
+
+        found = tag_cache.load(session, "stuff", [1, 2, 3])
+        self.assertEqual(found, {1: ["one"], 2: ["two"]})
+
+        # entries from a different call aren't shared
+        self.assertEqual(tag_cache.load(session, "other", [1, 2]), {})
+
+        # without inheritance, a change to a parent doesn't matter
+        self.hub.changed.add(3)
+        found = tag_cache.load(session, "stuff", [1, 2])
+        self.assertEqual(found, {1: ["one"], 2: ["two"]})
+
+        # a fault is treated as a change
+        tag_cache.store(session, "stuff", -1, {2: ["bad"]}, inherit=False)
+        found = tag_cache.load(session, "stuff", [1, 2])
+        self.assertEqual(found, {1: ["one"]})
+
+
+#
+# The end.
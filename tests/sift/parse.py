@@ -16,7 +16,7 @@ from unittest import TestCase
 
 from kojismokydingo.sift import ItemPathSieve, ItemSieve, SifterError
 from kojismokydingo.sift.parse import (
-    AllItems, Glob, Item, ItemMatch, ItemPath, Null,
+    AllItems, Glob, Item, ItemMatch, ItemPath, MatcherSet, Null,
     Number, ParserError, Reader, Regex, RegexError, Symbol, SymbolGroup,
     convert_range, parse_exprs, parse_index, parse_itempath, parse_quoted,
 )
@@ -138,6 +138,29 @@ class MatcherTest(TestCase):
         self.assertRaises(ValueError, Number, "Hello")
 
 
+    def test_matcher_set(self):
+        matchers = [
+            Symbol("Hello"), Number(3), Number(99), "98",
+            Glob("*orl*"), Glob("x?"), Glob("HEL*", True),
+            Regex(r"^\d{3}$"), Regex("XYZ", "i"), Regex(r"(\d)\1"),
+            SymbolGroup("{1..2}", [["1", "2"]]),
+        ]
+        mset = MatcherSet(matchers)
+
+        for val in self.DATA + [True, 3.0, "03", "xy", "hello", "11"]:
+            expected = any(m == val for m in matchers)
+            self.assertEqual(mset == val, expected, repr(val))
+
+        # the globs and regexes are fused by their flags, but the
+        # regex with a group is left to be checked on its own
+        self.assertEqual(len(mset._patterns), 4)
+        self.assertEqual(len(mset._others), 1)
+
+        self.not_in_data(MatcherSet([Symbol("1"), Glob("1")]))
+        self.in_data(MatcherSet([Null(), Number(0)]), 10, 0)
+        self.in_data(MatcherSet([Null(), Symbol("nope")]), 12, None)
+
+
 class ItemPathTest(TestCase):
 
     DATA = {
@@ -922,6 +945,48 @@ class ParserTest(TestCase):
         self.assertRaises(ParserError, self.parse, src)
 
 
+    def test_trailing_matcher(self):
+        # a regex or glob as the very last thing in the source
+        res = self.parse("/foo/")
+        self.assertEqual(repr(res), "[Regex('foo')]")
+
+        res = self.parse("/foo/i")
+        self.assertEqual(repr(res), "[Regex('foo', flags='i')]")
+
+        res = self.parse("|foo|i")
+        self.assertEqual(repr(res), "[Glob('foo', ignorecase=True)]")
+
+
+    def test_escapes(self):
+        res = self.parse(r"foo\ bar \(baz\) qu\ux \\")
+        self.assertEqual(res, [Symbol("foo bar"), Symbol("(baz)"),
+                               Symbol(r"qu\ux"), Symbol("\\")])
+
+        # a dangling escape at the very end is dropped
+        res = self.parse("foo\\")
+        self.assertEqual(res, [Symbol("foo")])
+        self.assertEqual(self.parse("\\"), [])
+
+
+    def test_deep_nesting(self):
+        depth = 5000
+        res = self.parse(("(" * depth) + "foo" + (")" * depth))
+
+        for _ in range(0, depth):
+            self.assertEqual(len(res), 1)
+            res = res[0]
+
+        self.assertEqual(res, [Symbol("foo")])
+
+
+    def test_reader_position(self):
+        reader = Reader("(foo) bar")
+        found = parse_exprs(reader)
+
+        self.assertEqual(next(found), [Symbol("foo")])
+        self.assertEqual(reader.read(), " bar")
+
+
 class TestParseQuoted(TestCase):
 
 
@@ -0,0 +1,156 @@
+# This library free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this library; if not, see <http://www.gnu.org/licenses/>.
+
+
+from io import StringIO
+from unittest import TestCase
+
+from kojismokydingo.metrics import HubMetrics, get_metrics
+from kojismokydingo.sift import DEFAULT_SIEVES, Sieve, Sifter
+from kojismokydingo.sift.profile import enable_profile, get_profile
+
+from . import NameSieve, TypeSieve, DATA
+
+
+class Session():
+    # just enough of a session to carry a metrics collector
+
+    def __init__(self):
+        self.__dict__["__ksd_metrics"] = HubMetrics()
+
+
+class Remote(Sieve):
+    # makes one pretend hub call during prep, if there's a metrics
+    # collector to record it, and caches the name of each item
+
+    name = "remote"
+
+
+    def prep(self, session, info_dicts):
+        metrics = get_metrics(session) if session else None
+        if metrics is not None:
+            metrics.record_call("getName", 0.0)
+        for info in info_dicts:
+            cache = self.get_info_cache(info)
+            if "name" not in cache:
+                cache["name"] = info["name"]
+
+
+    def check(self, session, info):
+        return self.get_info_cache(info)["name"] in self.tokens
+
+
+class TestSifterProfile(TestCase):
+
+    def sifter(self, src):
+        sieves = [NameSieve, TypeSieve, Remote]
+        sieves.extend(DEFAULT_SIEVES)
+        return Sifter(sieves, src)
+
+
+    def test_enable(self):
+        sifter = self.sifter("(name Tacos)")
+        self.assertIsNone(get_profile(sifter))
+
+        profile = enable_profile(sifter)
+        self.assertIs(get_profile(sifter), profile)
+        self.assertIs(enable_profile(sifter), profile)
+
+
+    def test_stats(self):
+        src = """
+        (flag food (type food) (remote Tacos))
+        (!name Beer)
+        """
+        expected = self.sifter(src)(None, DATA)
+
+        sifter = self.sifter(src)
+        profile = enable_profile(sifter)
+        session = Session()
+        self.assertEqual(sifter(session, DATA), expected)
+
+        flagger, notter = sifter.sieve_exprs()
+        typer, remote = flagger.order
+        namer = notter.tokens[0]
+
+        stats = profile.stats[flagger]
+        self.assertEqual(stats.calls, 1)
+        self.assertEqual(stats.items_in, 4)
+        self.assertEqual(stats.items_out, 1)
+        self.assertEqual(stats.hub_calls, 1)
+
+        stats = profile.stats[typer]
+        self.assertEqual(stats.items_in, 4)
+        self.assertEqual(stats.items_out, 2)
+        self.assertEqual(stats.checks, 4)
+        self.assertEqual(stats.hub_calls, 0)
+
+        stats = profile.stats[remote]
+        self.assertEqual(stats.items_in, 2)
+        self.assertEqual(stats.items_out, 1)
+        self.assertEqual(stats.checks, 2)
+        self.assertEqual(stats.cache_misses, 2)
+        self.assertEqual(stats.cache_hits, 2)
+        self.assertEqual(stats.hub_calls, 1)
+
+        stats = profile.stats[namer]
+        self.assertEqual(stats.items_in, 4)
+        self.assertEqual(stats.items_out, 1)
+
+        # and the stats accumulate over runs
+        sifter(session, DATA)
+        self.assertEqual(profile.stats[flagger].calls, 2)
+        self.assertEqual(profile.stats[remote].hub_calls, 2)
+        self.assertEqual(profile.stats[remote].cache_hits, 6)
+
+
+    def test_report(self):
+        src = """
+        (flag food (type food) (remote Tacos))
+        (!name Beer)
+        """
+        sifter = self.sifter(src)
+        profile = enable_profile(sifter)
+        sifter(Session(), DATA)
+
+        out = StringIO()
+        profile.report(out)
+        lines = out.getvalue().splitlines()
+
+        self.assertEqual(len(lines), 6)
+        heads = [line.split(";")[0].rstrip() for line in lines]
+        self.assertEqual(heads, [
+            "",
+            "(flag Symbol('food')",
+            "  (type Symbol('food'))",
+            "  (remote Symbol('Tacos')))",
+            "(not",
+            "  (name Symbol('Beer')))",
+        ])
+
+        self.assertIn("in:2 out:1", lines[3])
+        self.assertIn("cache:2/2", lines[3])
+        self.assertIn("hub:1", lines[3])
+
+        # without metrics on the session, hub calls aren't shown
+        sifter = self.sifter(src)
+        profile = enable_profile(sifter)
+        sifter(None, DATA)
+
+        out = StringIO()
+        profile.report(out)
+        self.assertNotIn("hub:", out.getvalue())
+
+
+#
+# The end.
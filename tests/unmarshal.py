@@ -0,0 +1,234 @@
+# This library is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this library; if not, see <http://www.gnu.org/licenses/>.
+
+
+import koji
+
+from koji.xmlrpcplus import dumps
+from unittest import TestCase
+from unittest.mock import patch
+from xmlrpc.client import Binary, DateTime, Fault, ResponseError, loads
+
+from kojismokydingo import ManagedClientSession, bulk_load
+from kojismokydingo.metrics import enable_metrics
+from kojismokydingo.unmarshal import (
+    FastUnmarshaller, enable_fast_unmarshal, loads_response, )
+
+
+SAMPLE = {
+    "id": 123,
+    "nvr": "foo-1.0-1",
+    "epoch": None,
+    "draft": False,
+    "volume_id": 0,
+    "size": 2 ** 40,
+    "ts": 1700000000.25,
+    "empty": "",
+    "escaped": "<&> \"quoted\" ☃",
+    "when": DateTime("20240102T03:04:05"),
+    "blob": Binary(b"\x00\x01binary"),
+    "nested": {"list": [1, [2, 3], {"x": []}], "dict": {}},
+}
+
+
+class FakeResponse():
+
+    def __init__(self, body):
+        self.body = body
+
+
+    def iter_content(self, size):
+        for index in range(0, len(self.body), 7):
+            yield self.body[index:index + 7]
+
+
+class TestFastUnmarshaller(TestCase):
+
+    def compare(self, body):
+        expected = loads(body)[0]
+        found = loads_response(body)
+        self.assertEqual(found, expected)
+        return found
+
+
+    def test_response(self):
+        body = dumps((SAMPLE, ), methodresponse=True,
+                     allow_none=True).encode()
+        found = self.compare(body)
+
+        info = found[0]
+        self.assertIsInstance(info["when"], DateTime)
+        self.assertIsInstance(info["blob"], Binary)
+        self.assertEqual(info["blob"].data, b"\x00\x01binary")
+        self.assertIs(info["draft"], False)
+
+
+    def test_untyped_values(self):
+        body = (b"<?xml version='1.0'?><methodResponse><params>"
+                b"<param><value><array><data>"
+                b"<value>plain</value><value></value>"
+                b"<value><ex:nil/></value><value><ex:i8>9</ex:i8></value>"
+                b"</data></array></value></param>"
+                b"</params></methodResponse>")
+
+        found = self.compare(body)
+        self.assertEqual(found, (["plain", "", None, 9], ))
+
+
+    def test_untyped_last(self):
+        # an untyped value ending an array or struct must not be
+        # repeated by the end of the value enclosing it
+        params = (b"<param><value><array><data>"
+                  b"<value>x</value>"
+                  b"</data></array></value></param>"
+                  b"<param><value><struct><member>"
+                  b"<name>a</name><value><array><data>"
+                  b"<value><int>1</int></value><value>y</value>"
+                  b"</data></array></value></member><member>"
+                  b"<name>b</name><value>z</value>"
+                  b"</member></struct></value></param>"
+                  b"<param><value>last</value></param>")
+        body = (b"<?xml version='1.0'?><methodResponse><params>" +
+                params + b"</params></methodResponse>")
+
+        found = self.compare(body)
+        self.assertEqual(found, (["x"], {"a": [1, "y"], "b": "z"},
+                                 "last"))
+
+
+    def test_incremental(self):
+        body = dumps(([SAMPLE] * 5, ), methodresponse=True,
+                     allow_none=True).encode()
+
+        unmarshaller = FastUnmarshaller()
+        for index in range(0, len(body), 3):
+            unmarshaller.feed(body[index:index + 3])
+
+        self.assertEqual(unmarshaller.close(), loads(body)[0])
+
+
+    def test_call(self):
+        body = dumps((1, "two"), "getBuild", allow_none=True).encode()
+
+        unmarshaller = FastUnmarshaller()
+        unmarshaller.feed(body)
+        self.assertEqual(unmarshaller.close(), (1, "two"))
+        self.assertEqual(unmarshaller.getmethodname(), "getBuild")
+
+
+    def test_fault(self):
+        body = dumps(Fault(1000, "oh no"), methodresponse=True).encode()
+
+        with self.assertRaises(Fault) as ctx:
+            loads_response(body)
+
+        self.assertEqual(ctx.exception.faultCode, 1000)
+        self.assertEqual(ctx.exception.faultString, "oh no")
+
+
+    def test_bad(self):
+        self.assertRaises(ResponseError, loads_response,
+                          b"<methodResponse></methodResponse>")
+
+        self.assertRaises(TypeError, loads_response,
+                          b"<methodResponse><params><param><value>"
+                          b"<boolean>2</boolean></value></param>"
+                          b"</params></methodResponse>")
+
+        self.assertRaises(ResponseError, loads_response,
+                          b"<methodResponse><params><param><value>"
+                          b"<bogus>2</bogus></value></param>"
+                          b"</params></methodResponse>")
+
+
+    def test_entities(self):
+        body = (b"<?xml version='1.0'?>"
+                b"<!DOCTYPE bomb [<!ENTITY a 'aaaa'>]>"
+                b"<methodResponse><params><param><value>&a;</value>"
+                b"</param></params></methodResponse>")
+
+        self.assertRaises(ResponseError, loads_response, body)
+
+
+class TestEnableFastUnmarshal(TestCase):
+
+    def setUp(self):
+        self.send = patch('koji.ClientSession._sendCall').start()
+        self.fast = patch('kojismokydingo.unmarshal.FastUnmarshaller',
+                          wraps=FastUnmarshaller).start()
+
+
+    def tearDown(self):
+        patch.stopall()
+
+
+    def session(self, cls=koji.ClientSession):
+        session = cls('FAKE_URL')
+
+        # answer multicalls via the session's response reader
+        def do_send(handler, headers, request):
+            params, method = loads(request)
+            result = [[c["params"][0]] for c in params[0]]
+            body = dumps((result, ), methodresponse=True).encode()
+            return session._read_xmlrpc_response(FakeResponse(body))
+
+        self.send.side_effect = do_send
+        return session
+
+
+    def test_enable(self):
+        session = self.session()
+        enable_fast_unmarshal(session)
+
+        res = bulk_load(session, session.getBuild, range(0, 10))
+        self.assertEqual(res, {i: i for i in range(0, 10)})
+        self.assertEqual(self.fast.call_count, 1)
+
+        enable_fast_unmarshal(session, False)
+
+        res = bulk_load(session, session.getBuild, range(0, 10))
+        self.assertEqual(res, {i: i for i in range(0, 10)})
+        self.assertEqual(self.fast.call_count, 1)
+
+
+    def test_debug_xmlrpc(self):
+        session = self.session()
+        session.opts["debug_xmlrpc"] = True
+        enable_fast_unmarshal(session)
+
+        with patch.object(session, "_logger"):
+            bulk_load(session, session.getBuild, range(0, 10))
+        self.assertEqual(self.fast.call_count, 0)
+
+
+    def test_with_metrics(self):
+        for metrics_first in (True, False):
+            self.fast.reset_mock()
+            session = self.session(ManagedClientSession)
+
+            if metrics_first:
+                metrics = enable_metrics(session)
+                session.enable_fast_unmarshal()
+            else:
+                session.enable_fast_unmarshal()
+                metrics = enable_metrics(session)
+
+            bulk_load(session, session.getBuild, range(0, 10))
+            self.assertEqual(self.fast.call_count, 1)
+
+            self.assertEqual(metrics.methods["getBuild"].multicalled, 10)
+            self.assertTrue(metrics.methods["multiCall"].nbytes)
+
+
+#
+# The end.